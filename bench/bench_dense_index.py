@@ -0,0 +1,150 @@
+"""
+인메모리 dense 색인(trag.dense_index) vs Chroma(HNSW) 검색 벤치마크.
+
+- 합성 임베딩(가우시안 클러스터)을 N개 만들어 임시 Chroma 컬렉션과 dense 색인에 같은 벡터를 넣고
+- 질의 지연(p50/p99), 메모리(행렬 바이트 / Chroma 디스크 크기), recall@k(float32 정확 검색 기준)를 비교합니다.
+- Ollama 없이 실행됩니다(임베딩은 난수).
+
+사용 예:
+    python bench/bench_dense_index.py --sizes 10000 100000 1000000 --dim 1024
+    python bench/bench_dense_index.py --sizes 10000 --skip-chroma-above 0
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from trag.dense_index import DenseIndex  # noqa: E402
+
+
+def _synthetic(n: int, dim: int, seed: int = 0, clusters: int = 256) -> np.ndarray:
+    """실제 문서 임베딩처럼 주제별로 뭉친 분포(완전 균일 난수는 recall 비교가 무의미해짐)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vecs = centers[labels] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def _queries(base: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = base[rng.integers(0, len(base), size=n)]
+    q = picks + 0.1 * rng.normal(size=picks.shape).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def _exact_topk(base: np.ndarray, queries: np.ndarray, k: int) -> list:
+    out = []
+    sq = np.einsum("ij,ij->i", base, base)
+    for q in queries:
+        d = sq - 2.0 * (base @ q)
+        top = np.argpartition(d, k - 1)[:k]
+        out.append(set(top[np.argsort(d[top])].tolist()))
+    return out
+
+
+def _pct(xs, p):
+    return float(np.percentile(np.asarray(xs) * 1000.0, p))
+
+
+def _dir_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(root, f))
+    return total / 1024 / 1024
+
+
+def bench_dense(base, queries, truth, k, dtype):
+    idx = DenseIndex(dtype)
+    started = time.perf_counter()
+    ids = [str(i) for i in range(len(base))]
+    for s in range(0, len(base), 50_000):
+        idx.add(ids[s:s + 50_000], base[s:s + 50_000])
+    build = time.perf_counter() - started
+
+    lat, hits = [], 0
+    for q, t in zip(queries, truth):
+        t0 = time.perf_counter()
+        res = idx.search(q, k)
+        lat.append(time.perf_counter() - t0)
+        hits += len(t & {int(i) for i, _ in res})
+    return {
+        "engine": f"dense-{dtype}",
+        "build_s": build,
+        "p50_ms": _pct(lat, 50),
+        "p99_ms": _pct(lat, 99),
+        "mem_mb": idx.nbytes() / 1024 / 1024,
+        "recall": hits / (k * len(queries)),
+    }
+
+
+def bench_chroma(base, queries, truth, k):
+    import chromadb
+
+    path = tempfile.mkdtemp(prefix="bench_chroma_")
+    try:
+        client = chromadb.PersistentClient(path=path)
+        col = client.create_collection("bench_collection")
+        started = time.perf_counter()
+        ids = [str(i) for i in range(len(base))]
+        step = 5000
+        for s in range(0, len(base), step):
+            col.add(ids=ids[s:s + step], embeddings=base[s:s + step])
+        build = time.perf_counter() - started
+
+        lat, hits = [], 0
+        for q, t in zip(queries, truth):
+            t0 = time.perf_counter()
+            res = col.query(query_embeddings=[q], n_results=k, include=[])
+            lat.append(time.perf_counter() - t0)
+            hits += len(t & {int(i) for i in res["ids"][0]})
+        return {
+            "engine": "chroma-hnsw",
+            "build_s": build,
+            "p50_ms": _pct(lat, 50),
+            "p99_ms": _pct(lat, 99),
+            "mem_mb": _dir_mb(path),  # HNSW는 Rust 쪽 메모리라 디스크 크기로 대신 표시
+            "recall": hits / (k * len(queries)),
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    ap.add_argument("--skip-chroma-above", type=int, default=1_000_000,
+                    help="이 크기를 넘으면 Chroma 측정 생략(적재 시간이 매우 김)")
+    args = ap.parse_args()
+
+    print(f"dim={args.dim} k={args.k} queries={args.queries}")
+    print(f"{'N':>9}  {'engine':<14} {'build_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'mem_mb':>9} {'recall':>7}")
+    for n in args.sizes:
+        base = _synthetic(n, args.dim)
+        queries = _queries(base, args.queries)
+        truth = _exact_topk(base, queries, args.k)
+
+        rows = [bench_dense(base, queries, truth, args.k, dt) for dt in args.dtypes]
+        if n <= args.skip_chroma_above:
+            rows.append(bench_chroma(base, queries, truth, args.k))
+        for r in rows:
+            print(
+                f"{n:>9}  {r['engine']:<14} {r['build_s']:>8.2f} {r['p50_ms']:>8.2f} "
+                f"{r['p99_ms']:>8.2f} {r['mem_mb']:>9.1f} {r['recall']:>7.3f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
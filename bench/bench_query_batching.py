@@ -0,0 +1,115 @@
+"""
+질의 임베딩 마이크로 배칭(trag.embeddings.QueryMicroBatcher) 벤치마크.
+
+동시 호출 스레드 N개가 서로 다른 질문으로 embed_query를 호출할 때
+배칭 끔 / 배칭 켬(window_ms별)의 지연(p50/p99), 처리량, embed 요청 수를 비교합니다.
+캐시(LRU/디스크)는 끄고 매번 미스가 나도록 측정합니다.
+
+가짜 Ollama로 실행(배치 크기와 거의 무관한 고정 지연 + 요청 직렬 처리):
+    python tools/fake_ollama.py --port 11500 --embed-ms 20 --embed-per-text-ms 0.5 --embed-parallel 1 &
+    OLLAMA_HOST=http://127.0.0.1:11500 python bench/bench_query_batching.py --threads 1 8 32 --queries 400
+실제 Ollama에 대해서도 OLLAMA_HOST 없이 그대로 실행할 수 있습니다.
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from trag.config import EMBEDDING_MODEL, QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_IN_FLIGHT  # noqa: E402
+from trag.embeddings import BatchedEmbeddings  # noqa: E402
+from trag.vectorstore import _ollama_embeddings  # noqa: E402
+
+
+class _CountingEmbeddings:
+    """inner 임베딩 호출 수(= embed HTTP 요청 수)를 셈."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.model = getattr(inner, "model", "")
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text):
+        with self._lock:
+            self.calls += 1
+        return self.inner.embed_query(text)
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p / 100.0))] * 1000.0 if xs else 0.0
+
+
+def run(model: str, threads: int, queries: int, batch: bool, window_ms: float, max_batch: int, max_in_flight: int, run_id: str):
+    inner = _CountingEmbeddings(_ollama_embeddings(model))
+    emb = BatchedEmbeddings(
+        inner,
+        cache=None,
+        query_lru_size=0,
+        query_batch=batch,
+        query_batch_window_ms=window_ms,
+        query_batch_max_size=max_batch,
+        query_batch_max_in_flight=max_in_flight,
+    )
+    emb.embed_query("warmup")
+    inner.calls = 0
+
+    texts = [f"벤치마크 질문 {run_id}-{i}: 헌법 제{i % 130 + 1}조의 내용은?" for i in range(queries)]
+    lat = []
+    lat_lock = threading.Lock()
+
+    def _one(t):
+        t0 = time.perf_counter()
+        emb.embed_query(t)
+        with lat_lock:
+            lat.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(_one, texts))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": f"batch w={window_ms:g}ms" if batch else "no-batch",
+        "p50_ms": _pct(lat, 50),
+        "p99_ms": _pct(lat, 99),
+        "qps": queries / elapsed if elapsed else 0.0,
+        "requests": inner.calls,
+        "avg_batch": emb.query_batch_stats().get("avg_batch", 1.0) if batch else 1.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=EMBEDDING_MODEL)
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--queries", type=int, default=400)
+    ap.add_argument("--windows", type=float, nargs="+", default=[2.0, 5.0, 10.0])
+    ap.add_argument("--max-batch", type=int, default=QUERY_BATCH_MAX_SIZE)
+    ap.add_argument("--max-in-flight", type=int, default=QUERY_BATCH_MAX_IN_FLIGHT)
+    args = ap.parse_args()
+
+    print(f"model={args.model} queries={args.queries} max_batch={args.max_batch} max_in_flight={args.max_in_flight} host={os.environ.get('OLLAMA_HOST', 'default')}")
+    print(f"{'threads':>7}  {'mode':<16} {'p50_ms':>8} {'p99_ms':>8} {'qps':>8} {'requests':>9} {'avg_batch':>9}")
+    for n in args.threads:
+        configs = [(False, 0.0)] + [(True, w) for w in args.windows]
+        for i, (batch, window) in enumerate(configs):
+            r = run(args.model, n, args.queries, batch, window, args.max_batch, args.max_in_flight, run_id=f"{n}-{i}")
+            print(
+                f"{n:>7}  {r['mode']:<16} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['qps']:>8.1f} "
+                f"{r['requests']:>9} {r['avg_batch']:>9.2f}",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
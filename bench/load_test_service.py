@@ -0,0 +1,134 @@
+"""
+trag.service 부하 테스트 클라이언트(aiohttp).
+
+동시 클라이언트 N개가 총 M개의 질문을 보내고 상태 코드별 개수, 지연(p50/p95/p99),
+첫 토큰까지 시간(--stream), 처리량을 출력합니다. 끝나면 서비스의 /health 통계도 함께 출력합니다.
+
+사용 예:
+    python tools/fake_ollama.py --port 11500 &
+    OLLAMA_HOST=http://127.0.0.1:11500 TRAG_CHROMA_PATH=./chroma_db_loadtest python -m trag.service &
+    python bench/load_test_service.py --concurrency 16 --requests 200 --stream
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+import aiohttp
+
+QUESTIONS = (
+    "헌법 제10조의 내용은 무엇인가요?",
+    "국회의원의 임기는 몇 년인가요?",
+    "대통령의 권한을 요약해 주세요.",
+    "기본권 제한의 한계는 무엇인가요?",
+    "최근 AI 안전 관련 뉴스가 있나요?",
+    "자동차 기능안전 표준에 대해 알려주세요.",
+    "소프트웨어 공학 동향을 알려주세요.",
+    "지방자치단체의 종류는?",
+)
+
+
+def _pct(xs, p):
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p / 100.0))]
+
+
+async def _one(session, args, i, results):
+    question = random.choice(QUESTIONS)
+    if args.unique:
+        question = f"{question} (#{args.run_id}-{i})"
+    body = {
+        "question": question,
+        "session_id": f"load-{i % args.sessions}",
+        "model": args.model,
+    }
+    url = args.url.rstrip("/") + ("/query/stream" if args.stream else "/query")
+    started = time.perf_counter()
+    ttft = None
+    try:
+        async with session.post(url, json=body) as resp:
+            if resp.status != 200:
+                await resp.read()
+                results["status"][resp.status] += 1
+                return
+            if args.stream:
+                async for line in resp.content:
+                    if not line.strip():
+                        continue
+                    ev = json.loads(line)
+                    if ev.get("type") == "token" and ttft is None:
+                        ttft = time.perf_counter() - started
+                    elif ev.get("type") == "error":
+                        results["status"]["stream_error"] += 1
+                        return
+            else:
+                data = await resp.json()
+                ttft = (data.get("timings") or {}).get("ttft_ms", 0) / 1000.0
+            results["status"][200] += 1
+            results["latency"].append(time.perf_counter() - started)
+            if ttft is not None:
+                results["ttft"].append(ttft)
+    except Exception as e:
+        results["status"][type(e).__name__] += 1
+
+
+async def run(args):
+    results = {"status": Counter(), "latency": [], "ttft": []}
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+
+        async def worker():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await _one(session, args, i, results)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        try:
+            async with session.get(args.url.rstrip("/") + "/health") as resp:
+                health = await resp.json()
+        except Exception as e:
+            health = {"error": str(e)}
+
+    ok = results["status"].get(200, 0)
+    print(f"requests={args.requests} concurrency={args.concurrency} stream={args.stream} model={args.model}")
+    print(f"status={dict(results['status'])}")
+    print(f"elapsed_s={elapsed:.2f} throughput_rps={ok / elapsed if elapsed else 0:.2f}")
+    lat = [x * 1000 for x in results["latency"]]
+    print(f"latency_ms p50={_pct(lat, 50):.0f} p95={_pct(lat, 95):.0f} p99={_pct(lat, 99):.0f}")
+    if results["ttft"]:
+        tt = [x * 1000 for x in results["ttft"]]
+        print(f"ttft_ms    p50={_pct(tt, 50):.0f} p95={_pct(tt, 95):.0f} p99={_pct(tt, 99):.0f}")
+    print(f"health={json.dumps(health, ensure_ascii=False)}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default="http://127.0.0.1:8765")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--sessions", type=int, default=50, help="서로 다른 session_id 수")
+    ap.add_argument("--model", default=None, help="기본값: 서비스의 SERVICE_DEFAULT_MODEL")
+    ap.add_argument("--stream", action="store_true", help="/query/stream(NDJSON) 사용")
+    ap.add_argument("--unique", action="store_true", help="질문마다 번호를 붙여 임베딩/답변 캐시를 우회")
+    ap.add_argument("--timeout", type=float, default=600.0)
+    args = ap.parse_args()
+    args.run_id = int(time.time())
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
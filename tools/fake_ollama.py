@@ -0,0 +1,187 @@
+"""
+부하 테스트용 가짜 Ollama 서버(aiohttp). 실제 모델 없이 trag.service / Streamlit 앱을 띄울 수 있습니다.
+
+지원 API (langchain_ollama / ollama 클라이언트가 쓰는 것만):
+    POST /api/embed   → 결정적(같은 텍스트 = 같은 벡터) 해시 기반 임베딩
+    POST /api/chat    → NDJSON 토큰 스트리밍(stream=false면 한 번에)
+    GET  /api/tags, GET /   → 상태 확인
+    GET  /stats       → 모델별 요청 수 / 최대 동시 실행 수(서비스의 동시성 제한이 지켜지는지 확인용)
+
+지연 시뮬레이션:
+    --parallel     모델별 동시 생성 수(Ollama의 OLLAMA_NUM_PARALLEL), 초과 요청은 서버 안에서 대기
+    --ttft-ms      첫 토큰까지 시간(프롬프트 처리), --token-ms 토큰 간격, --tokens 답변 토큰 수
+    --embed-ms     임베딩 요청 1회 고정 지연, --embed-per-text-ms 텍스트당 추가 지연
+    --embed-parallel  동시에 처리하는 임베딩 요청 수(실제 Ollama처럼 초과 요청은 줄을 섬)
+
+사용 예:
+    python tools/fake_ollama.py --port 11500 --parallel 2 --ttft-ms 300 --token-ms 20
+    OLLAMA_HOST=http://127.0.0.1:11500 TRAG_CHROMA_PATH=./chroma_db_loadtest python -m trag.service
+"""
+import re
+import json
+import math
+import asyncio
+import hashlib
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+_WORD_RE = re.compile(r"[0-9a-z가-힣]+")
+
+_ANSWER_WORDS = (
+    "검색된 문서에 따르면 ", "질문하신 ", "내용은 ", "다음과 ", "같습니다. ", "관련 ", "조항을 ",
+    "참고하시면 ", "됩니다 ", "😊 ", "추가로 ", "확인이 ", "필요하면 ", "말씀해 ", "주세요. ",
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    """단어/글자 bigram 해시를 누적한 정규화 벡터(같은 단어를 공유하는 텍스트끼리 가까워짐)."""
+    vec = [0.0] * dim
+    t = (text or "").lower()
+    feats = _WORD_RE.findall(t)
+    feats += [t[i:i + 2] for i in range(max(0, len(t) - 1))]
+    for f in feats or [t]:
+        h = hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest()
+        idx = int.from_bytes(h[:4], "little") % dim
+        vec[idx] += 1.0 if h[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+class FakeOllama:
+    def __init__(self, args):
+        self.args = args
+        self._sems = defaultdict(lambda: asyncio.Semaphore(self.args.parallel))
+        self._embed_sems = defaultdict(lambda: asyncio.Semaphore(self.args.embed_parallel))
+        self.requests = defaultdict(int)
+        self.in_flight = defaultdict(int)
+        self.max_in_flight = defaultdict(int)
+
+    async def embed(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        model = body.get("model")
+        self.requests[f"embed:{model}"] += 1
+        self.requests[f"embed_texts:{model}"] += len(inputs)
+        delay_ms = self.args.embed_ms + self.args.embed_per_text_ms * len(inputs)
+        async with self._embed_sems[model]:
+            if delay_ms:
+                await asyncio.sleep(delay_ms / 1000.0)
+        return web.json_response({
+            "model": model,
+            "embeddings": [fake_embedding(t, self.args.dim) for t in inputs],
+            "total_duration": int(delay_ms * 1e6),
+            "load_duration": 0,
+            "prompt_eval_count": sum(len(t) for t in inputs) // 4,
+        })
+
+    def _answer_tokens(self, messages) -> list:
+        question = ""
+        for m in reversed(messages or []):
+            if m.get("role") == "user":
+                question = m.get("content") or ""
+                break
+        head = [w + " " for w in _WORD_RE.findall(question.lower())[:5]]
+        body = [_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(max(0, self.args.tokens - len(head)))]
+        return head + body
+
+    async def chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model") or "unknown"
+        stream = body.get("stream", True)
+        tokens = self._answer_tokens(body.get("messages"))
+        num_predict = (body.get("options") or {}).get("num_predict")
+        if num_predict and num_predict > 0:
+            tokens = tokens[:num_predict]
+        self.requests[f"chat:{model}"] += 1
+
+        async with self._sems[model]:
+            self.in_flight[model] += 1
+            self.max_in_flight[model] = max(self.max_in_flight[model], self.in_flight[model])
+            try:
+                await asyncio.sleep(self.args.ttft_ms / 1000.0)
+                final = {
+                    "model": model,
+                    "created_at": _now(),
+                    "message": {"role": "assistant", "content": ""},
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": int((self.args.ttft_ms + self.args.token_ms * len(tokens)) * 1e6),
+                    "load_duration": 0,
+                    "prompt_eval_count": sum(len(m.get("content") or "") for m in body.get("messages") or []) // 4,
+                    "prompt_eval_duration": int(self.args.ttft_ms * 1e6),
+                    "eval_count": len(tokens),
+                    "eval_duration": int(self.args.token_ms * len(tokens) * 1e6),
+                }
+                if not stream:
+                    await asyncio.sleep(self.args.token_ms * len(tokens) / 1000.0)
+                    final["message"]["content"] = "".join(tokens)
+                    return web.json_response(final)
+
+                resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+                await resp.prepare(request)
+                for tok in tokens:
+                    chunk = {"model": model, "created_at": _now(),
+                             "message": {"role": "assistant", "content": tok}, "done": False}
+                    await resp.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+                    await asyncio.sleep(self.args.token_ms / 1000.0)
+                await resp.write((json.dumps(final) + "\n").encode("utf-8"))
+                await resp.write_eof()
+                return resp
+            finally:
+                self.in_flight[model] -= 1
+
+    async def tags(self, request: web.Request) -> web.Response:
+        models = sorted({k.split(":", 1)[1] for k in self.requests if not k.startswith("embed_texts:")})
+        return web.json_response({"models": [{"name": m, "model": m} for m in models]})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": dict(self.requests),
+            "in_flight": dict(self.in_flight),
+            "max_in_flight": dict(self.max_in_flight),
+        })
+
+    async def root(self, request: web.Request) -> web.Response:
+        return web.Response(text="Ollama is running")
+
+
+def create_app(args) -> web.Application:
+    fake = FakeOllama(args)
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/api/embed", fake.embed)
+    app.router.add_post("/api/chat", fake.chat)
+    app.router.add_get("/api/tags", fake.tags)
+    app.router.add_get("/stats", fake.stats)
+    app.router.add_get("/", fake.root)
+    return app
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11500)
+    ap.add_argument("--dim", type=int, default=256, help="임베딩 차원")
+    ap.add_argument("--parallel", type=int, default=2, help="모델별 동시 생성 수")
+    ap.add_argument("--ttft-ms", type=float, default=300.0)
+    ap.add_argument("--token-ms", type=float, default=20.0)
+    ap.add_argument("--tokens", type=int, default=60)
+    ap.add_argument("--embed-ms", type=float, default=15.0)
+    ap.add_argument("--embed-per-text-ms", type=float, default=0.5)
+    ap.add_argument("--embed-parallel", type=int, default=1)
+    args = ap.parse_args()
+    print(f"[FAKE_OLLAMA] http://{args.host}:{args.port} dim={args.dim} parallel={args.parallel} "
+          f"ttft_ms={args.ttft_ms} token_ms={args.token_ms} tokens={args.tokens}", flush=True)
+    web.run_app(create_app(args), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+뉴스 데몬 테스트용 RSS 스텁 서버(aiohttp). Google News RSS 검색 API 모양만 흉내 냅니다.
+
+    GET /rss/search?q=키워드&hl=..&gl=..&ceid=..
+        --feeds-dir에 녹화해 둔 피드(<키워드 slug>.xml)가 있으면 그대로, 없으면 키워드별 합성 피드를 응답
+        ETag/Last-Modified를 붙이고 If-None-Match/If-Modified-Since가 맞으면 304
+    GET /stats
+        요청 수, 200/304 수, 최대 동시 요청 수(데몬의 호스트당 동시성 제한 확인용)
+
+지연 시뮬레이션:
+    --delay-ms        모든 요청 고정 지연
+    --slow KEYWORD    이 키워드만 --slow-ms만큼 느리게(느린 피드 하나가 tick 전체를 막는지 확인)
+    --change-every-sec  합성 피드에 이 주기마다 새 기사 1건 추가(0이면 내용 고정 → 두 번째부터 304)
+
+실제 피드 녹화(한 번만, 네트워크 필요):
+    python tools/stub_rss_server.py --record --feeds-dir ./bench/feeds
+
+사용 예:
+    python tools/stub_rss_server.py --port 11600 --delay-ms 200 --slow "AI 안전" --slow-ms 3000 &
+    TRAG_NEWS_RSS_BASE_URL=http://127.0.0.1:11600/rss/search python -c "from trag.news_daemon import run_once; print(run_once())"
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import hashlib
+import argparse
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def slug(keyword: str) -> str:
+    return re.sub(r"[^0-9A-Za-z가-힣]+", "_", keyword or "").strip("_") or "feed"
+
+
+def synthetic_feed(keyword: str, items: int, generation: int) -> bytes:
+    """키워드별로 결정적인 RSS. generation이 1 늘 때마다 맨 앞에 새 기사 1건이 추가됨."""
+    entries = []
+    for i in range(generation + items - 1, generation - 1, -1):
+        title = f"{keyword} 관련 소식 {i}"
+        link = f"https://news.example.com/{slug(keyword)}/{i}"
+        pub = formatdate(1_700_000_000 + i * 3600, usegmt=True)
+        desc = f"<a href=\"{link}\">{title}</a> {keyword} 분야에서 {i}번째 발표가 있었다. 자세한 내용은 기사를 참고."
+        entries.append(
+            f"<item><title>{escape(title)}</title><link>{escape(link)}</link>"
+            f"<pubDate>{pub}</pubDate><description>{escape(desc)}</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(keyword)} - Stub News</title>{''.join(entries[:items])}</channel></rss>"
+    ).encode("utf-8")
+
+
+class StubRss:
+    def __init__(self, args):
+        self.args = args
+        self.started = time.time()
+        self.counts = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _feed(self, keyword: str):
+        """(본문, 마지막 수정 시각 epoch)."""
+        path = os.path.join(self.args.feeds_dir or "", slug(keyword) + ".xml")
+        if self.args.feeds_dir and os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read(), int(os.path.getmtime(path))
+        every = self.args.change_every_sec
+        generation = int((time.time() - self.started) // every) if every > 0 else 0
+        modified = int(self.started + generation * every) if every > 0 else int(self.started)
+        return synthetic_feed(keyword, self.args.items, generation), modified
+
+    async def search(self, request: web.Request) -> web.Response:
+        keyword = request.query.get("q", "")
+        self.counts["requests"] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.args.delay_ms + (self.args.slow_ms if keyword in (self.args.slow or []) else 0)
+            if delay:
+                await asyncio.sleep(delay / 1000.0)
+
+            body, modified = self._feed(keyword)
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True)}
+
+            if request.headers.get("If-None-Match") == etag:
+                self.counts["not_modified"] += 1
+                return web.Response(status=304, headers=headers)
+            ims = request.headers.get("If-Modified-Since")
+            if ims and "If-None-Match" not in request.headers:
+                try:
+                    if parsedate_to_datetime(ims).timestamp() >= modified:
+                        self.counts["not_modified"] += 1
+                        return web.Response(status=304, headers=headers)
+                except (TypeError, ValueError):
+                    pass
+
+            self.counts["ok"] += 1
+            return web.Response(body=body, headers={**headers, "Content-Type": "application/rss+xml; charset=utf-8"})
+        finally:
+            self.in_flight -= 1
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.counts, "in_flight": self.in_flight, "max_in_flight": self.max_in_flight})
+
+
+def create_app(args) -> web.Application:
+    stub = StubRss(args)
+    app = web.Application()
+    app.router.add_get("/rss/search", stub.search)
+    app.router.add_get("/stats", stub.stats)
+    return app
+
+
+def record(args):
+    """NEWS_KEYWORDS의 실제 Google News RSS를 --feeds-dir에 저장."""
+    from trag.config import NEWS_KEYWORDS, NEWS_RSS_HL, NEWS_RSS_GL, NEWS_RSS_CEID
+    from trag.news_fetcher import google_news_rss_url, get_http_session
+
+    os.makedirs(args.feeds_dir, exist_ok=True)
+    for kw in NEWS_KEYWORDS or []:
+        url = google_news_rss_url(kw, NEWS_RSS_HL, NEWS_RSS_GL, NEWS_RSS_CEID, base_url="https://news.google.com/rss/search")
+        r = get_http_session().get(url, timeout=20)
+        r.raise_for_status()
+        path = os.path.join(args.feeds_dir, slug(kw) + ".xml")
+        with open(path, "wb") as f:
+            f.write(r.content)
+        print(f"[STUB_RSS] recorded keyword='{kw}' bytes={len(r.content)} -> {path}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11600)
+    ap.add_argument("--feeds-dir", default=None, help="녹화한 피드(<slug>.xml) 폴더")
+    ap.add_argument("--items", type=int, default=20, help="합성 피드의 기사 수")
+    ap.add_argument("--delay-ms", type=float, default=0.0)
+    ap.add_argument("--slow", action="append", help="느리게 응답할 키워드(여러 번 지정 가능)")
+    ap.add_argument("--slow-ms", type=float, default=3000.0)
+    ap.add_argument("--change-every-sec", type=float, default=0.0)
+    ap.add_argument("--record", action="store_true", help="실제 피드를 --feeds-dir에 저장하고 종료")
+    args = ap.parse_args()
+    if args.record:
+        if not args.feeds_dir:
+            ap.error("--record에는 --feeds-dir이 필요합니다")
+        record(args)
+        return
+    print(f"[STUB_RSS] http://{args.host}:{args.port}/rss/search feeds_dir={args.feeds_dir} "
+          f"delay_ms={args.delay_ms} slow={args.slow}", flush=True)
+    web.run_app(create_app(args), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
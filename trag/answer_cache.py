@@ -0,0 +1,125 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, List, Optional
+
+import numpy as np
+
+from .config import (
+    ANSWER_CACHE_MAX_DISTANCE,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_TTL_SEC,
+)
+
+
+class SemanticAnswerCache:
+    """
+    질문 임베딩 기반 답변 캐시(프로세스 내).
+    - LLM 모델별로 (정규화된 질문 벡터, 답변, 근거 문서, 컬렉션 버전)을 보관
+    - 새 질문 벡터와의 코사인 거리가 max_distance 이하인 가장 가까운 항목을 반환
+    - 저장 당시와 컬렉션 버전이 다르면(문서 추가/삭제) 그 항목은 버림
+      (version은 비교만 하는 값: 체인은 검색한 파티션의 버전 튜플을 넘김, vectorstore.collection_version 참고)
+    """
+
+    def __init__(
+        self,
+        max_distance: float = ANSWER_CACHE_MAX_DISTANCE,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_sec: float = ANSWER_CACHE_TTL_SEC,
+    ):
+        self.max_distance = float(max_distance)
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_sec = float(ttl_sec)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        # 모델별 (entry id 목록, 벡터 행렬): lookup마다 행렬을 다시 쌓지 않도록 캐시
+        self._matrix: Dict[str, Any] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+    @staticmethod
+    def _normalize(vec) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else v
+
+    def _evict(self, ids: List[int]) -> None:
+        for i in ids:
+            entry = self._entries.pop(i, None)
+            if entry is not None:
+                self._matrix.pop(entry["model"], None)
+
+    def _model_matrix(self, model: str):
+        m = self._matrix.get(model)
+        if m is None:
+            ids = [i for i, e in self._entries.items() if e["model"] == model]
+            mat = np.stack([self._entries[i]["vec"] for i in ids]) if ids else None
+            m = self._matrix[model] = (ids, mat)
+        return m
+
+    def lookup(self, model: str, query_vec, version: Hashable) -> Optional[Dict[str, Any]]:
+        q = self._normalize(query_vec)
+        now = time.time()
+        with self._lock:
+            stale = [
+                i for i, e in self._entries.items()
+                if e["version"] != version or now - e["created_at"] > self.ttl_sec
+            ]
+            if stale:
+                self._stats["invalidated"] += len(stale)
+                self._evict(stale)
+
+            ids, mat = self._model_matrix(model)
+            if mat is None or mat.shape[1] != q.shape[0]:
+                self._stats["misses"] += 1
+                return None
+
+            dists = 1.0 - mat @ q
+            best = int(np.argmin(dists))
+            if float(dists[best]) > self.max_distance:
+                self._stats["misses"] += 1
+                return None
+
+            entry_id = ids[best]
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            entry = self._entries[entry_id]
+            return {"answer": entry["answer"], "context": entry["context"], "distance": float(dists[best])}
+
+    def put(self, model: str, query_vec, answer: str, context: List[Any], version: Hashable) -> None:
+        with self._lock:
+            self._entries[self._next_id] = {
+                "model": model,
+                "vec": self._normalize(query_vec),
+                "answer": answer,
+                "context": list(context or []),
+                "version": version,
+                "created_at": time.time(),
+            }
+            self._next_id += 1
+            self._matrix.pop(model, None)
+            while len(self._entries) > self.max_entries:
+                self._evict([next(iter(self._entries))])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._entries)
+        return s
+
+
+_CACHE: Optional[SemanticAnswerCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = SemanticAnswerCache()
+        return _CACHE
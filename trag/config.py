@@ -1,8 +1,4 @@
 import os
-import chromadb
-
-# Streamlit hot-reload에서 Chroma 공유 클라이언트 꼬임 방지
-chromadb.api.client.SharedSystemClient.clear_system_cache()
 
 # --- Data directory (Single source of truth) ---
 DATA_DIR = r"./data"  # ✅ ./data 폴더 내 PDF 전체를 임베딩 대상으로 사용
@@ -17,23 +13,160 @@ UPLOAD_DIR = DATA_DIR
 EMBEDDING_MODEL = "qwen3-embedding"
 FALLBACK_EMBEDDING_MODEL = "nomic-embed-text"
 
-CHROMA_PATH = f"./chroma_db_ollama_{EMBEDDING_MODEL}"
+# 임베딩 요청 배치/동시성 (임베딩 호스트 성능에 맞춰 튜닝)
+EMBED_BATCH_SIZE = 32           # 요청 1회당 최대 텍스트 수
+EMBED_BATCH_MAX_CHARS = 32000   # 요청 1회당 최대 글자 수(긴 청크가 몰린 배치 분할)
+EMBED_CONCURRENCY = 4           # 동시에 보내는 임베딩 요청 수
+EMBED_MAX_RETRIES = 3           # 일시 오류 시 배치 재시도 횟수
+EMBED_RETRY_BACKOFF_SEC = 1.0   # 재시도 대기(지수 백오프 기준값)
+QUERY_EMBED_LRU_SIZE = 1024     # 질의 임베딩 프로세스 내 LRU 크기(0이면 끔)
+# 동시 질의 임베딩 마이크로 배칭: 처리 중인 요청이 있으면 짧게 모았다가 한 번의 embed 요청으로 보냄
+# (부하가 없을 때는 기다리지 않고 바로 보내므로 단일 사용자 지연은 그대로)
+QUERY_BATCH_ENABLED = True
+QUERY_BATCH_WINDOW_MS = 5.0     # 배치를 모으는 최대 대기 시간
+QUERY_BATCH_MAX_SIZE = 16       # 이 개수가 모이면 대기 없이 바로 보냄
+QUERY_BATCH_MAX_IN_FLIGHT = 2   # 동시에 보내는 질의 배치 수(초과분은 앞 배치가 끝날 때까지 모아서 다음 배치로)
+
+# 프로세스 공용 임베딩/벡터스토어 레지스트리
+EMBED_HEALTH_TTL_SEC = 300      # 임베딩 모델 ping 결과를 재사용하는 시간(만료 후 다음 호출에서 1회 재확인)
+OLLAMA_KEEP_ALIVE = 1800        # Ollama 서버가 모델을 메모리에 유지하는 시간(초)
+OLLAMA_HTTP_KEEPALIVE_SEC = 60  # Ollama HTTP 연결 keep-alive 유지 시간(연결 풀 재사용)
+# Ollama 서버 주소(None이면 기본값 http://127.0.0.1:11434). 부하 테스트 시 OLLAMA_HOST로 가짜 서버 지정
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_HOST") or None
+
+# TRAG_CHROMA_PATH로 덮어쓰기 가능(가짜 Ollama로 부하 테스트할 때 실제 컬렉션/임베딩 캐시와 분리)
+CHROMA_PATH = os.environ.get("TRAG_CHROMA_PATH") or f"./chroma_db_ollama_{EMBEDDING_MODEL}"
 COLLECTION_NAME = "rag_collection"
+# 뉴스는 별도 컬렉션(10분마다 늘어나는 뉴스가 문서 검색 top-k/속도에 영향을 주지 않도록)
+NEWS_COLLECTION_NAME = "news_collection"
+
+# 임베딩 캐시: (모델, 정규화 텍스트 sha256) → 벡터. 재수집/재구축 시 중복 임베딩 제거
+EMBED_CACHE_ENABLED = True
+EMBED_CACHE_PATH = os.path.join(CHROMA_PATH, "embedding_cache.sqlite3")
+EMBED_CACHE_MAX_MB = 1024  # 초과 시 오래 안 쓴 벡터부터 삭제
 
-# 임베딩 완료된 PDF를 기록(새 파일만 추가 임베딩하기 위함)
+# 임베딩 완료된 PDF/뉴스를 기록하는 SQLite 매니페스트(새 파일만 추가 임베딩하기 위함)
+MANIFEST_DB_PATH = os.path.join(CHROMA_PATH, "manifest.sqlite3")
+# (구) JSON 매니페스트: 최초 실행 시 MANIFEST_DB_PATH로 1회 마이그레이션
 MANIFEST_PATH = os.path.join(CHROMA_PATH, "ingested_manifest.json")
 
 # --- Chunking ---
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 100
 
+# --- Ingestion pipeline ---
+# 대량 백필 시 PDF 파싱(CPU)과 임베딩(네트워크)을 겹쳐서 처리
+# 파싱 프로세스 풀 → (bounded queue) → 임베딩 단계 → (bounded queue) → Chroma 단일 writer
+INGEST_PIPELINE_ENABLED = True
+INGEST_PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+INGEST_QUEUE_MAXSIZE = 8
+
+# 포맷별 파싱 워커 풀(프로세스 풀: PDF/DOCX처럼 CPU 바운드, 나머지는 스레드 풀)
+INGEST_FORMAT_WORKERS = {
+    ".pdf": INGEST_PARSE_WORKERS,
+    ".docx": 2,
+    ".csv": 1,
+    ".txt": 1,
+    ".md": 1,
+}
+INGEST_PROCESS_FORMATS = (".pdf", ".docx")
+
+# CSV는 행 단위로 청크화(청크당 최대 행 수, 글자 수는 CHUNK_SIZE로 제한)
+CSV_ROWS_PER_CHUNK = 20
+
+# 대용량 PDF 스트리밍 인제스트: 이 크기 이상이면 페이지를 window 단위로 읽고/분할/임베딩/커밋
+# (피크 메모리가 문서 크기와 무관하게 window 크기로 제한되고, 중단 시 마지막 커밋 window부터 재개)
+INGEST_STREAM_MIN_BYTES = 20 * 1024 * 1024
+INGEST_STREAM_WINDOW_PAGES = 16
+
+# 백그라운드 인제스트 작업 큐(업로드는 작업만 등록하고 UI는 진행률만 폴링)
+INGEST_JOB_POLL_SEC = 2.0       # 워커가 새 작업을 확인하는 주기
+INGEST_JOB_UI_REFRESH_SEC = 2   # UI 진행률 갱신 주기
+
 # --- Retriever ---
 TOP_K = 4
 
+# 파티션별 검색: 문서/뉴스 컬렉션을 각각의 k로 검색한 뒤 합침
+RETRIEVE_DOC_K = TOP_K
+RETRIEVE_NEWS_K = 2
+NEWS_FETCH_K = 10                 # 최신성 재정렬 전에 뉴스 컬렉션에서 가져오는 후보 수
+NEWS_DECAY_HALF_LIFE_DAYS = 7.0   # 뉴스 점수 시간 감쇠 반감기(일)
+
+# 하이브리드 검색: 문자 n-gram BM25 + 벡터 검색을 RRF로 결합
+HYBRID_RETRIEVAL_ENABLED = True
+HYBRID_FETCH_K = 20      # 각 검색기에서 가져오는 후보 수
+HYBRID_RRF_K = 60        # RRF 상수(클수록 하위 순위 가중치가 완만)
+LEXICAL_INDEX_PATH = os.path.join(CHROMA_PATH, "lexical_index.sqlite3")
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 인메모리 dense 색인(선택): 컬렉션 임베딩을 float16/int8 행렬로 복제해 브루트포스 정확 검색
+# (필터가 있는 질의는 Chroma where 검색을 그대로 사용, 벤치마크: bench/bench_dense_index.py)
+DENSE_INDEX_ENABLED = False
+DENSE_INDEX_DTYPE = "int8"      # float32 / float16 / int8 (NumPy의 float16→float32 변환이 느려 int8 권장)
+
+# 의미 기반 답변 캐시: 질문 임베딩이 캐시된 질문과 충분히 가까우면 저장된 답변+근거 문서를 바로 반환
+# (검색하는 컬렉션에 청크가 추가/삭제되면 무효화. 뉴스는 파티션별 top-k가 모든 답변의 근거에 들어가므로
+#  RETRIEVE_NEWS_K > 0이면 뉴스 데몬이 기사를 넣거나 지울 때마다 문서만 근거로 쓴 답변까지 모두 비워짐)
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MAX_DISTANCE = 0.05   # 코사인 거리(1 - 코사인 유사도) 기준, 작을수록 엄격
+ANSWER_CACHE_MAX_ENTRIES = 512
+ANSWER_CACHE_TTL_SEC = 24 * 3600
+
 # --- UI ---
 UI_TITLE = "TG RAG 챗봇 (Ollama Ver) 💬 📚"
 AVAILABLE_LLM_MODELS = ("llama3.2", "mistral", "gemma2")
 
+# --- Context packing ---
+# 모델별 컨텍스트(검색 문서) 토큰 예산. 대화 이력/질문/답변 몫을 남기도록 num_ctx보다 작게 잡습니다.
+CONTEXT_TOKEN_BUDGET = {
+    "llama3.2": 3000,
+    "mistral": 3000,
+    "gemma2": 2500,
+}
+CONTEXT_TOKEN_BUDGET_DEFAULT = 2000
+CONTEXT_DUP_JACCARD = 0.85   # 문자 3-gram 유사도가 이 이상이면 중복 블록으로 보고 제외
+
+# --- Chat history (대화 이력) ---
+# 최근 N턴은 원문 그대로, 그 이전 턴은 답변이 끝난 뒤 백그라운드에서 누적 요약으로 접어 넣음
+# 프롬프트에 들어가는 이력(요약 + 최근 턴)은 모델별 토큰 상한을 넘지 않도록 오래된 메시지부터 제외
+HISTORY_KEEP_TURNS = 4
+HISTORY_TOKEN_BUDGET = {
+    "llama3.2": 1500,
+    "mistral": 1500,
+    "gemma2": 1200,
+}
+HISTORY_TOKEN_BUDGET_DEFAULT = 1000
+HISTORY_SUMMARY_ENABLED = True      # False면 오래된 턴은 요약 없이 버림(최근 N턴만 유지)
+HISTORY_SUMMARY_MAX_TOKENS = 256    # 요약 생성 토큰 상한
+
+# --- History-aware retrieval (후속 질문 재작성) ---
+# 대화 이력이 있고 질문이 이전 맥락에 기대는 경우에만 LLM으로 독립 질문을 만들어 검색에 사용
+# (이력이 없거나 질문에 구체적인 용어가 있으면 재작성 없이 원문으로 검색)
+REWRITE_ENABLED = True
+REWRITE_HISTORY_MESSAGES = 6        # 재작성 프롬프트에 넣는 최근 메시지 수(캐시 키도 이 범위로 계산)
+REWRITE_MAX_TOKENS = 64             # 재작성 생성 토큰 상한(답변이 아니라 질문 한 줄만 필요)
+REWRITE_CACHE_SIZE = 512            # (모델, 이력 해시, 질문) → 재작성 결과 LRU
+REWRITE_SHORT_QUESTION_CHARS = 12   # 이보다 짧은 후속 질문은 맥락 의존으로 봄
+REWRITE_ANCHOR_MIN_IDF = 2.0        # 이 이상 idf인 어휘 색인 용어가 있으면 "구체적인 질문"으로 봄
+
+# --- Query service (python -m trag.service) ---
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_DEFAULT_MODEL = AVAILABLE_LLM_MODELS[0]
+# Ollama 모델별 동시 생성 수(Ollama의 OLLAMA_NUM_PARALLEL에 맞춰 설정, 초과 요청은 대기열에서 대기)
+SERVICE_MODEL_CONCURRENCY = {
+    "llama3.2": 2,
+    "mistral": 1,
+    "gemma2": 1,
+}
+SERVICE_MODEL_CONCURRENCY_DEFAULT = 1
+SERVICE_MAX_QUEUE = 32               # 모델별 최대 대기 요청 수(초과 시 즉시 429)
+SERVICE_QUEUE_TIMEOUT_SEC = 30.0     # 대기열에서 이 시간 안에 차례가 안 오면 503
+SERVICE_REQUEST_TIMEOUT_SEC = 300.0  # 차례를 받은 뒤 답변 생성 전체 제한 시간
+SERVICE_SESSION_MAX = 1000           # 메모리에 유지할 세션(대화 이력) 수, 초과 시 오래 안 쓴 세션부터 제거
+SERVICE_SESSION_TTL_SEC = 3600       # 이 시간 동안 요청이 없는 세션은 제거
+
 # =========================
 # News ingestion (RSS)
 # =========================
@@ -46,9 +179,21 @@ NEWS_KEYWORDS = [
     "자동차 기능안전",
 ]
 
-# 검색 주기(초) - 기본 10분
+# 검색 주기(초) - 기본 10분. 키워드별 적응형 스케줄의 시작 주기
 NEWS_POLL_INTERVAL_SEC = 600
 
+# 키워드별 적응형 폴링(trag.news_scheduler): 새 기사가 많으면 주기를 줄이고 조용하면 늘림
+NEWS_SCHEDULE_MIN_INTERVAL_SEC = 300
+NEWS_SCHEDULE_MAX_INTERVAL_SEC = 6 * 3600
+NEWS_SCHEDULE_HIGH_YIELD = 5          # 한 번에 이 수 이상 새 기사가 추가되면 주기 단축
+NEWS_SCHEDULE_SPEEDUP = 0.5           # 단축 배율
+NEWS_SCHEDULE_SLOWDOWN = 1.5          # 새 기사가 없을 때 연장 배율
+NEWS_SCHEDULE_JITTER = 0.1            # 다음 예정 시각에 ±10% 무작위(키워드들이 한 tick에 몰리지 않도록)
+NEWS_SCHEDULE_BACKOFF_BASE_SEC = 60   # 실패 시 지수 백오프 시작값(연속 실패마다 2배, 지터 포함)
+NEWS_SCHEDULE_BACKOFF_MAX_SEC = 6 * 3600
+NEWS_SCHEDULE_MAX_PER_TICK = 10       # tick당 최대 폴링 키워드 수(밀린 키워드는 다음 tick에 오래된 순으로)
+NEWS_SCHEDULE_MIN_SLEEP_SEC = 30      # tick 사이 최소 대기 겸 예정 키워드/설정 변경 확인 간격
+
 # 뉴스 대표문장 저장 폴더 (PDF ./data 와 분리)
 NEWS_TEXT_DIR = r"./news_texts"
 NEWS_SENTENCE_FILENAME = "./Representative.txt"
@@ -62,11 +207,35 @@ NEWS_RSS_CEID = "KR:ko"
 # 키워드당 가져올 최대 기사 수
 NEWS_MAX_ITEMS_PER_KEYWORD = 20
 
+# RSS 검색 주소(로컬 스텁 서버로 테스트할 때 TRAG_NEWS_RSS_BASE_URL로 변경)
+NEWS_RSS_BASE_URL = os.environ.get("TRAG_NEWS_RSS_BASE_URL") or "https://news.google.com/rss/search"
+# 키워드별 RSS를 동시에 가져옴(keep-alive 세션 공유, 호스트당 동시 요청 수 제한)
+NEWS_FETCH_CONCURRENCY = 8
+NEWS_FETCH_PER_HOST = 4
+NEWS_FETCH_CONNECT_TIMEOUT_SEC = 5
+NEWS_FETCH_READ_TIMEOUT_SEC = 20
+
 # 유사 뉴스 제외 임계값(Chroma distance 기준, 작을수록 더 엄격)
 # 보통 0.10~0.25 사이에서 튜닝합니다.
 NEWS_DUP_DISTANCE_THRESHOLD = 0.15
 
-# 데몬/로그/매니페스트
+# 임베딩 전 어휘 기반 근사 중복 제외(SimHash, 한글 글자 shingle): 통신사 기사 복제본을 임베딩 없이 거름
+NEWS_NEAR_DUP_ENABLED = True
+NEWS_NEAR_DUP_PATH = os.path.join(CHROMA_PATH, "near_dup.sqlite3")
+NEWS_NEAR_DUP_SHINGLE = 3          # 글자 n-gram 길이
+NEWS_NEAR_DUP_MAX_HAMMING = 8      # 64비트 SimHash 해밍 거리 이하면 중복(밴드 수 = 이 값 + 1), 복제본 3~6 / 무관 20+
+NEWS_NEAR_DUP_TTL_DAYS = 14        # 이보다 오래된 문장은 색인에서 제거
+
+# 뉴스 보존 정책(trag.news_retention): 데몬이 주기적으로 오래된/초과분 뉴스 벡터를 지우고 매니페스트를 압축
+NEWS_RETENTION_MAX_AGE_DAYS = 90          # published 기준, 0이면 나이 제한 없음(이보다 오래된 기사는 새로 넣지도 않음)
+NEWS_RETENTION_MAX_PER_KEYWORD = 2000     # 키워드별 최대 보관 수(최신순), 0이면 제한 없음
+NEWS_RETENTION_KEYWORD_CAPS = {}          # 키워드별 개별 상한(선택), 예: {"AI 안전": 5000}
+NEWS_RETENTION_DELETE_BATCH = 500         # 벡터 삭제 배치 크기
+NEWS_MANIFEST_SKIPPED_TTL_DAYS = 30       # 중복으로 건너뛴 기사 기록 보관 기간
+NEWS_MANIFEST_TOMBSTONE_DAYS = 30         # 만료(expired) 표시를 남겨 두는 기간(그동안 같은 기사를 다시 넣지 않음)
+NEWS_MAINTENANCE_INTERVAL_SEC = 6 * 3600  # 유지보수 실행 간격
+
+# 데몬/로그/매니페스트 (news_manifest.json은 MANIFEST_DB_PATH로 마이그레이션됨)
 NEWS_MANIFEST_PATH = os.path.join(CHROMA_PATH, "news_manifest.json")
 NEWS_LOG_PATH = r"./logs/news_daemon.log"
 NEWS_PID_PATH = r"./run/news_daemon.pid"
\ No newline at end of file
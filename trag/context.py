@@ -0,0 +1,168 @@
+import re
+import unicodedata
+from typing import Dict, Any, List, Tuple
+
+from .config import (
+    CHUNK_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_TOKEN_BUDGET_DEFAULT,
+    CONTEXT_DUP_JACCARD,
+)
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+# 겹침으로 인정하는 최소 길이(너무 짧으면 우연히 같은 글자로 잘못 이어 붙임)
+_MIN_OVERLAP_CHARS = 20
+# 잘라서라도 넣을 가치가 있는 최소 잔여 토큰 수
+_MIN_TAIL_TOKENS = 50
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 근사치: 한글 1글자 ≈ 1토큰, 그 외 ≈ 4글자당 1토큰.
+    (로컬 모델마다 토크나이저가 달라 정확한 값 대신 예산 관리용 추정치로만 사용)
+    """
+    if not text:
+        return 0
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def token_budget(model: str) -> int:
+    return int(CONTEXT_TOKEN_BUDGET.get(model, CONTEXT_TOKEN_BUDGET_DEFAULT))
+
+
+def _overlap(a: str, b: str, max_chars: int) -> int:
+    """a의 끝과 b의 앞이 겹치는 길이(없으면 0)."""
+    for n in range(min(len(a), len(b), max_chars), _MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+
+def _merge_group(items: List[Tuple[int, str]], max_overlap: int) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    같은 출처/페이지의 (검색 순위, 청크) 중 앞뒤로 겹치는 것들을 이어 붙임. ((순위, 블록) 목록, 병합 횟수).
+    이어 붙인 블록의 순위는 구성 청크 중 가장 높은 순위.
+    """
+    blocks = list(items)
+    merged = 0
+    changed = True
+    while changed and len(blocks) > 1:
+        changed = False
+        for i in range(len(blocks)):
+            for j in range(len(blocks)):
+                if i == j:
+                    continue
+                n = _overlap(blocks[i][1], blocks[j][1], max_overlap)
+                if n:
+                    blocks[i] = (min(blocks[i][0], blocks[j][0]), blocks[i][1] + blocks[j][1][n:])
+                    del blocks[j]
+                    merged += 1
+                    changed = True
+                    break
+            if changed:
+                break
+    return blocks, merged
+
+
+def _group_key(meta: Dict[str, Any], rank: int) -> Tuple[Any, Any]:
+    """겹침 병합이 가능한 청크끼리만 같은 키(뉴스는 기사별, 페이지 정보가 없는 청크는 단독)."""
+    if meta.get("type") == "news":
+        return ("news", meta.get("uid") or meta.get("url") or rank)
+    if meta.get("page") is None:
+        return ("rank", rank)
+    return (meta.get("source"), meta.get("page"))
+
+
+def _shingles(text: str, n: int = 3) -> set:
+    # 구두점/공백 차이(… vs ..., 띄어쓰기)는 무시하고 비교
+    t = re.sub(r"[\W_]+", "", unicodedata.normalize("NFKC", text).lower())
+    return {t[i:i + n] for i in range(max(1, len(t) - n + 1))}
+
+
+def _is_near_dup(sh: set, kept: List[set], threshold: float) -> bool:
+    for other in kept:
+        inter = len(sh & other)
+        if not inter:
+            continue
+        # 짧은 뉴스 문장이 긴 청크에 거의 포함되는 경우도 중복으로 처리
+        if inter / len(sh | other) >= threshold or inter / min(len(sh), len(other)) >= threshold:
+            return True
+    return False
+
+
+def pack_context(docs, model: str = None, budget: int = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    검색된 청크를 프롬프트용 컨텍스트 문자열로 조립.
+    1) 같은 source/page의 인접 청크는 CHUNK_OVERLAP 겹침을 제거하고 이어 붙임
+    2) 문자 3-gram Jaccard 기준 거의 같은 블록은 하위 순위 쪽을 버림
+    3) 검색 순위 순서대로 모델별 토큰 예산까지 채움(마지막 블록은 잘라서라도 넣음)
+    """
+    docs = list(docs or [])
+    budget = budget if budget is not None else token_budget(model)
+    texts = [getattr(d, "page_content", str(d)) for d in docs]
+    tokens_in = estimate_tokens("\n\n".join(texts))
+
+    # 출처/페이지별로 묶어 겹침을 이어 붙인 뒤, 블록마다 첫 구성 청크의 검색 순위로 다시 정렬
+    groups: Dict[Tuple[Any, Any], List[Tuple[int, str]]] = {}
+    for rank, (d, text) in enumerate(zip(docs, texts)):
+        meta = getattr(d, "metadata", None) or {}
+        groups.setdefault(_group_key(meta, rank), []).append((rank, text))
+
+    merged = 0
+    ranked: List[Tuple[int, str]] = []
+    for items in groups.values():
+        group_blocks, n = _merge_group(items, CHUNK_OVERLAP * 2)
+        ranked.extend(group_blocks)
+        merged += n
+    blocks = [text for _, text in sorted(ranked, key=lambda b: b[0])]
+
+    dropped = 0
+    kept_blocks: List[str] = []
+    kept_shingles: List[set] = []
+    for block in blocks:
+        sh = _shingles(block)
+        if _is_near_dup(sh, kept_shingles, CONTEXT_DUP_JACCARD):
+            dropped += 1
+            continue
+        kept_blocks.append(block)
+        kept_shingles.append(sh)
+
+    out: List[str] = []
+    used = 0
+    truncated = 0
+    for block in kept_blocks:
+        t = estimate_tokens(block) + 1
+        if used + t <= budget:
+            out.append(block)
+            used += t
+            continue
+        remaining = budget - used
+        if remaining >= _MIN_TAIL_TOKENS:
+            # 토큰/글자 비율대로 앞부분만 잘라서 넣음
+            cut = block[: max(1, int(len(block) * remaining / t))]
+            out.append(cut)
+            used += estimate_tokens(cut)
+        truncated += 1
+        break
+
+    text = "\n\n".join(out)
+    tokens_out = estimate_tokens(text)
+    stats = {
+        "docs": len(docs),
+        "blocks": len(out),
+        "merged": merged,
+        "dup_dropped": dropped,
+        "truncated": truncated,
+        "budget": budget,
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": max(0, tokens_in - tokens_out),
+    }
+    print(
+        f"[CONTEXT] model={model} docs={stats['docs']} blocks={stats['blocks']} merged={merged} "
+        f"dup_dropped={dropped} tokens={tokens_in}->{tokens_out} saved={stats['tokens_saved']} budget={budget}",
+        flush=True,
+    )
+    return text, stats
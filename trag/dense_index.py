@@ -0,0 +1,164 @@
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# 검색 시 한 번에 float32로 풀어서 계산하는 행 수(블록 단위라 임시 메모리가 행렬 크기와 무관).
+# 풀어 쓴 블록이 CPU 캐시에 남을 정도로 작게 잡아야 int8/float16 변환 비용이 줄어듦
+_BLOCK_ROWS = 512
+# 삭제 표시(tombstone) 비율이 이 이상이면 행렬을 다시 채움
+_COMPACT_DEAD_RATIO = 0.25
+
+DTYPES = ("float32", "float16", "int8")
+
+
+class DenseIndex:
+    """
+    Chroma 컬렉션 임베딩을 그대로 복제한 인메모리 브루트포스 색인.
+    - 저장: 연속된 float32/float16/int8(행별 scale) 행렬 + 행별 제곱 노름(float32)
+    - 검색: 블록 단위 행렬곱으로 전체 거리 계산 → argpartition top-k
+      (HNSW 같은 그래프 근사 없이 전부 비교, float16/int8은 양자화 오차만 있음)
+    - 거리: Chroma 기본(l2)과 같은 제곱 L2 = |q|² - 2 q·x + |x|²
+    """
+
+    def __init__(self, dtype: str = "int8"):
+        if dtype not in DTYPES:
+            raise ValueError(f"unsupported dtype: {dtype}")
+        self.dtype = dtype
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._mat = None
+        self._scale = np.zeros(0, dtype=np.float32)
+        self._sqnorm = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._n = 0
+        self._dead = 0
+        # 이 색인에 반영된 변경 로그 위치(vectorstore에서 관리)
+        self.synced_seq = 0
+
+    def __len__(self) -> int:
+        return self._n - self._dead
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row
+
+    @property
+    def dim(self) -> int:
+        return 0 if self._mat is None else self._mat.shape[1]
+
+    def nbytes(self) -> int:
+        if self._mat is None:
+            return 0
+        return int(self._mat[: self._n].nbytes + self._scale[: self._n].nbytes + self._sqnorm[: self._n].nbytes)
+
+    def _quantize(self, vecs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.dtype == "int8":
+            scale = np.abs(vecs).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            q = np.clip(np.rint(vecs / scale[:, None]), -127, 127).astype(np.int8)
+            return q, scale.astype(np.float32)
+        return vecs.astype(self.dtype), np.ones(len(vecs), dtype=np.float32)
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        if self._mat is None:
+            cap = max(1024, rows)
+            self._mat = np.zeros((cap, dim), dtype=self.dtype)
+            self._scale = np.zeros(cap, dtype=np.float32)
+            self._sqnorm = np.zeros(cap, dtype=np.float32)
+            self._alive = np.zeros(cap, dtype=bool)
+            return
+        if dim != self._mat.shape[1]:
+            raise ValueError(f"dimension mismatch: index={self._mat.shape[1]} vectors={dim}")
+        need = self._n + rows
+        cap = self._mat.shape[0]
+        if need <= cap:
+            return
+        new_cap = max(need, cap * 2)
+        for name in ("_mat", "_scale", "_sqnorm", "_alive"):
+            old = getattr(self, name)
+            grown = np.zeros((new_cap,) + old.shape[1:], dtype=old.dtype)
+            grown[: self._n] = old[: self._n]
+            setattr(self, name, grown)
+
+    def add(self, ids: Sequence[str], vectors) -> None:
+        """upsert: 이미 있는 ID는 그 행을 덮어씀."""
+        if not len(ids):
+            return
+        vecs = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._reserve(len(ids), vecs.shape[1])
+            q, scale = self._quantize(vecs)
+            # 복원값 기준 노름을 써야 거리 계산이 양자화 오차와 일관됨
+            restored = q.astype(np.float32) * scale[:, None]
+            sqnorm = np.einsum("ij,ij->i", restored, restored)
+            for i, doc_id in enumerate(ids):
+                row = self._row.get(doc_id)
+                if row is None:
+                    row = self._n
+                    self._n += 1
+                    self._ids.append(doc_id)
+                    self._row[doc_id] = row
+                self._mat[row] = q[i]
+                self._scale[row] = scale[i]
+                self._sqnorm[row] = sqnorm[i]
+                self._alive[row] = True
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                row = self._row.pop(doc_id, None)
+                if row is not None and self._alive[row]:
+                    self._alive[row] = False
+                    self._dead += 1
+            if self._n and self._dead / self._n >= _COMPACT_DEAD_RATIO:
+                self._compact()
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive[: self._n])
+        self._mat[: len(keep)] = self._mat[keep]
+        self._scale[: len(keep)] = self._scale[keep]
+        self._sqnorm[: len(keep)] = self._sqnorm[keep]
+        self._alive[: len(keep)] = True
+        self._alive[len(keep): self._n] = False
+        self._ids = [self._ids[i] for i in keep]
+        self._row = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._n = len(keep)
+        self._dead = 0
+
+    def search(self, query_vec, k: int) -> List[Tuple[str, float]]:
+        """제곱 L2 거리 기준 상위 k개 (doc_id, distance)."""
+        q = np.asarray(query_vec, dtype=np.float32)
+        with self._lock:
+            if not len(self) or k <= 0:
+                return []
+            dots = np.empty(self._n, dtype=np.float32)
+            if self.dtype == "float32":
+                dots[:] = self._mat[: self._n] @ q
+            else:
+                buf = np.empty((_BLOCK_ROWS, self.dim), dtype=np.float32)
+                for start in range(0, self._n, _BLOCK_ROWS):
+                    end = min(start + _BLOCK_ROWS, self._n)
+                    block = buf[: end - start]
+                    np.copyto(block, self._mat[start:end], casting="unsafe")
+                    np.matmul(block, q, out=dots[start:end])
+            dists = float(q @ q) - 2.0 * dots * self._scale[: self._n] + self._sqnorm[: self._n]
+            dists[~self._alive[: self._n]] = np.inf
+
+            k = min(k, len(self))
+            top = np.argpartition(dists, k - 1)[:k]
+            top = top[np.argsort(dists[top])]
+            return [(self._ids[i], float(dists[i])) for i in top]
+
+
+def load_from_collection(collection, dtype: str = "int8", batch_size: int = 5000) -> DenseIndex:
+    """Chroma 컬렉션의 임베딩 전체를 배치로 읽어 색인을 만듦(임베딩 재계산 없음)."""
+    index = DenseIndex(dtype)
+    offset = 0
+    while True:
+        got = collection.get(include=["embeddings"], limit=batch_size, offset=offset)
+        ids = got.get("ids") or []
+        if not ids:
+            return index
+        index.add(ids, got["embeddings"])
+        offset += len(ids)
@@ -0,0 +1,118 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from typing import Dict, List, Sequence
+
+from .config import EMBED_CACHE_PATH, EMBED_CACHE_MAX_MB
+
+
+def text_key(text: str) -> str:
+    """캐시 키: 정규화(NFC + 앞뒤 공백 제거)한 텍스트의 sha256."""
+    norm = unicodedata.normalize("NFC", text or "").strip()
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+
+def _encode(vec: Sequence[float]) -> bytes:
+    return array("f", vec).tobytes()
+
+
+def _decode(blob: bytes) -> List[float]:
+    a = array("f")
+    a.frombytes(blob)
+    return a.tolist()
+
+
+class EmbeddingCache:
+    """
+    (임베딩 모델, 텍스트 sha256) → 벡터 디스크 캐시(SQLite).
+    - UI 프로세스와 뉴스 데몬이 같은 파일을 공유(WAL)
+    - 전체 크기가 max_mb를 넘으면 가장 오래 안 쓴 항목부터 삭제(LRU)
+    - 벡터는 float32로 저장합니다.
+    """
+
+    def __init__(self, path: str = EMBED_CACHE_PATH, max_mb: float = EMBED_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, key TEXT NOT NULL, vec BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, model: str, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        uniq = list(dict.fromkeys(keys))
+        if not uniq:
+            return found
+
+        with self._lock:
+            # SQLite 변수 개수 제한(기본 999)을 피하려고 나눠서 조회
+            for i in range(0, len(uniq), 500):
+                part = uniq[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE model=? AND key IN ({marks})",
+                    [model, *part],
+                ).fetchall()
+                for k, blob in rows:
+                    found[k] = _decode(blob)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used=? WHERE model=? AND key=?",
+                    [(now, model, k) for k in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, keys: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        rows = []
+        for k, v in zip(keys, vectors):
+            blob = _encode(v)
+            rows.append((model, k, blob, len(blob), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(model, key, vec, nbytes, last_used) VALUES (?,?,?,?,?)",
+                rows,
+            )
+            self._conn.commit()
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # 한 번에 상한의 90%까지 줄여서 매 put마다 eviction이 돌지 않게 함
+        target = int(self.max_bytes * 0.9)
+        to_free = total - target
+        freed = 0
+        victims = []
+        for model, key, nbytes in self._conn.execute(
+            "SELECT model, key, nbytes FROM embeddings ORDER BY last_used ASC"
+        ):
+            victims.append((model, key))
+            freed += nbytes
+            if freed >= to_free:
+                break
+
+        self._conn.executemany("DELETE FROM embeddings WHERE model=? AND key=?", victims)
+        self._conn.commit()
@@ -0,0 +1,401 @@
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from .config import (
+    EMBED_BATCH_SIZE,
+    EMBED_BATCH_MAX_CHARS,
+    EMBED_CONCURRENCY,
+    EMBED_MAX_RETRIES,
+    EMBED_RETRY_BACKOFF_SEC,
+    QUERY_EMBED_LRU_SIZE,
+    QUERY_BATCH_ENABLED,
+    QUERY_BATCH_WINDOW_MS,
+    QUERY_BATCH_MAX_SIZE,
+    QUERY_BATCH_MAX_IN_FLIGHT,
+)
+from .embedding_cache import EmbeddingCache, text_key
+
+
+class EmbeddingBatchError(RuntimeError):
+    """재시도 후에도 실패한 배치가 남았을 때. 성공한 벡터는 partial에 보존됩니다."""
+
+    def __init__(self, message: str, failed_ranges: List[Tuple[int, int]], partial: List[Any]):
+        super().__init__(message)
+        self.failed_ranges = failed_ranges
+        self.partial = partial
+
+
+class _PendingQuery:
+    __slots__ = ("text", "key", "started", "done", "claimed", "vector", "error")
+
+    def __init__(self, text: str, key: str):
+        self.text = text
+        self.key = key
+        self.started = time.perf_counter()
+        self.done = False
+        # 다른 리더의 배치에 들어가 전송 중(이 항목의 호출자는 리더가 되지 않고 결과만 기다림)
+        self.claimed = False
+        self.vector = None
+        self.error = None
+
+    def result(self) -> List[float]:
+        if self.error is not None:
+            raise self.error
+        return self.vector
+
+
+class QueryMicroBatcher:
+    """
+    동시에 들어온 질의 임베딩을 모아 embed 요청 한 번으로 보내고, 벡터를 호출자별로 나눠 줌.
+    - 전용 스레드 없이 호출 스레드 중 하나가 리더가 되어 배치를 모아 전송(나머지는 결과 대기)
+    - 동시에 보내는 배치는 max_in_flight개까지. 상한이면 앞 배치가 끝날 때까지 모으고,
+      다른 배치가 처리 중이면 window_ms 동안(또는 max_batch개가 찰 때까지) 더 모음
+    - 처리 중인 배치가 없으면(부하 없음) 기다리지 않고 바로 전송
+    - 같은 배치 안의 같은 질의는 1번만 임베딩, 배치가 실패하면 그 배치의 호출자 모두에게 예외 전달
+    """
+
+    def __init__(
+        self,
+        embed_fn,
+        window_ms: float = QUERY_BATCH_WINDOW_MS,
+        max_batch: int = QUERY_BATCH_MAX_SIZE,
+        max_in_flight: int = QUERY_BATCH_MAX_IN_FLIGHT,
+    ):
+        self.embed_fn = embed_fn
+        self.window_sec = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.max_in_flight = max(1, int(max_in_flight))
+
+        self._cond = threading.Condition()
+        self._pending: List[_PendingQuery] = []
+        self._leader = False
+        self._in_flight = 0
+
+        self._stats = {"queries": 0, "batches": 0, "texts": 0, "max_batch": 0, "errors": 0}
+        self._latencies = deque(maxlen=4096)
+        self._first_at = None
+        self._last_at = None
+
+    def embed(self, text: str, key: str) -> List[float]:
+        item = _PendingQuery(text, key)
+        with self._cond:
+            self._pending.append(item)
+            self._cond.notify_all()
+
+        while True:
+            with self._cond:
+                while not item.done and (self._leader or item.claimed):
+                    self._cond.wait()
+                if item.done:
+                    return item.result()
+
+                # 리더가 없으면 이 스레드가 리더(앞선 대기자가 많으면 자기 항목이 다음 배치로 밀릴 수 있어 반복)
+                self._leader = True
+                # 처리 중인 배치가 상한이면 끝날 때까지 기다림(그동안 뒤 질의가 쌓여 다음 배치가 커짐)
+                while self._in_flight >= self.max_in_flight:
+                    self._cond.wait()
+                if self._in_flight:
+                    deadline = time.monotonic() + self.window_sec
+                    while len(self._pending) < self.max_batch:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+                for it in batch:
+                    it.claimed = True
+                self._leader = False
+                self._in_flight += 1
+                self._cond.notify_all()
+
+            self._run(batch)
+
+    def _run(self, batch: List[_PendingQuery]):
+        texts: List[str] = []
+        index: Dict[str, int] = {}
+        for it in batch:
+            if it.key not in index:
+                index[it.key] = len(texts)
+                texts.append(it.text)
+
+        vectors, error = None, None
+        try:
+            vectors = self.embed_fn(texts)
+        except Exception as e:
+            error = e
+
+        now = time.perf_counter()
+        with self._cond:
+            self._in_flight -= 1
+            for it in batch:
+                if error is not None:
+                    it.error = error
+                else:
+                    it.vector = vectors[index[it.key]]
+                it.done = True
+                self._latencies.append(now - it.started)
+            self._stats["queries"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["texts"] += len(texts)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+            self._stats["errors"] += 1 if error is not None else 0
+            if self._first_at is None:
+                self._first_at = min(it.started for it in batch)
+            self._last_at = now
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """누적 질의 수/배치 크기/대기 포함 지연(p50/p99)/처리량(질의/초)."""
+        with self._cond:
+            s = dict(self._stats)
+            lat = sorted(self._latencies)
+            span = (self._last_at - self._first_at) if self._first_at is not None else 0.0
+
+        def _pct(p):
+            return round(lat[min(len(lat) - 1, int(len(lat) * p))] * 1000.0, 2) if lat else 0.0
+
+        s["avg_batch"] = round(s["queries"] / s["batches"], 2) if s["batches"] else 0.0
+        s["p50_ms"] = _pct(0.50)
+        s["p99_ms"] = _pct(0.99)
+        s["queries_per_sec"] = round(s["queries"] / span, 2) if span > 0 else 0.0
+        return s
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Ollama 임베딩 클라이언트 앞단의 배치/동시성 레이어.
+    - 텍스트 개수(batch_size)와 글자 수(max_batch_chars) 기준으로 배치 분할
+    - 배치를 concurrency개 스레드로 동시에 요청
+    - 실패한 배치만 지수 백오프로 재시도(성공한 배치는 다시 임베딩하지 않음)
+    - 누적 처리량(chunks/sec)을 stats()로 제공
+    - cache가 있으면 (모델, 텍스트 해시)로 먼저 조회하고 미스만 임베딩
+    - 질의 임베딩은 프로세스 내 LRU(query_lru_size)를 디스크 캐시보다 먼저 조회
+    - 두 캐시 모두 미스인 동시 질의는 QueryMicroBatcher로 모아서 한 번에 임베딩
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_batch_chars: int = EMBED_BATCH_MAX_CHARS,
+        concurrency: int = EMBED_CONCURRENCY,
+        max_retries: int = EMBED_MAX_RETRIES,
+        retry_backoff_sec: float = EMBED_RETRY_BACKOFF_SEC,
+        cache: EmbeddingCache = None,
+        query_lru_size: int = QUERY_EMBED_LRU_SIZE,
+        query_batch: bool = QUERY_BATCH_ENABLED,
+        query_batch_window_ms: float = QUERY_BATCH_WINDOW_MS,
+        query_batch_max_size: int = QUERY_BATCH_MAX_SIZE,
+        query_batch_max_in_flight: int = QUERY_BATCH_MAX_IN_FLIGHT,
+    ):
+        self.inner = inner
+        self.cache = cache
+        self.batch_size = max(1, int(batch_size))
+        self.max_batch_chars = max(1, int(max_batch_chars))
+        self.concurrency = max(1, int(concurrency))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff_sec = float(retry_backoff_sec)
+
+        self.query_lru_size = max(0, int(query_lru_size))
+        self._query_lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_batcher = (
+            QueryMicroBatcher(self._embed_with_retry, query_batch_window_ms, query_batch_max_size, query_batch_max_in_flight)
+            if query_batch else None
+        )
+
+        self._lock = threading.Lock()
+        self._stats = {"chunks": 0, "batches": 0, "retries": 0, "failed_batches": 0, "seconds": 0.0, "cache_hits": 0, "query_lru_hits": 0}
+
+    @property
+    def model(self) -> str:
+        return getattr(self.inner, "model", "")
+
+    def _make_batches(self, texts: List[str]) -> List[Tuple[int, int]]:
+        batches = []
+        start = 0
+        chars = 0
+        for i, t in enumerate(texts):
+            n = len(t or "")
+            if i > start and (i - start >= self.batch_size or chars + n > self.max_batch_chars):
+                batches.append((start, i))
+                start, chars = i, 0
+            chars += n
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.inner.embed_documents(texts)
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    self._stats["retries"] += 1
+                time.sleep(self.retry_backoff_sec * (2 ** attempt))
+                attempt += 1
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        model = self.model
+        keys = [text_key(t) for t in texts]
+        found = self.cache.get_many(model, keys)
+
+        # 캐시 미스만(같은 호출 안의 중복 텍스트도 1번만) 임베딩
+        miss_keys: List[str] = []
+        miss_texts: List[str] = []
+        seen = set()
+        for k, t in zip(keys, texts):
+            if k not in found and k not in seen:
+                seen.add(k)
+                miss_keys.append(k)
+                miss_texts.append(t)
+
+        with self._lock:
+            self._stats["cache_hits"] += sum(1 for k in keys if k in found)
+
+        if miss_texts:
+            try:
+                vectors = self._embed_uncached(miss_texts)
+            except EmbeddingBatchError as e:
+                # 성공한 배치는 캐시에 남겨서 재시도 시 다시 임베딩하지 않게 함
+                ok = [(k, v) for k, v in zip(miss_keys, e.partial) if v is not None]
+                self.cache.put_many(model, [k for k, _ in ok], [v for _, v in ok])
+                raise
+            self.cache.put_many(model, miss_keys, vectors)
+            found.update(zip(miss_keys, vectors))
+
+        return [found[k] for k in keys]
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        results: List[Any] = [None] * len(texts)
+        batches = self._make_batches(texts)
+        failed: List[Tuple[int, int]] = []
+
+        def _run(rng: Tuple[int, int]):
+            s, e = rng
+            return rng, self._embed_with_retry(texts[s:e])
+
+        workers = min(self.concurrency, len(batches))
+        if workers <= 1:
+            outcomes = []
+            for rng in batches:
+                try:
+                    outcomes.append(_run(rng))
+                except Exception:
+                    failed.append(rng)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trag-embed") as pool:
+                futures = {pool.submit(_run, rng): rng for rng in batches}
+                outcomes = []
+                for fut, rng in futures.items():
+                    try:
+                        outcomes.append(fut.result())
+                    except Exception:
+                        failed.append(rng)
+
+        for (s, e), vectors in outcomes:
+            results[s:e] = vectors
+
+        # 동시 요청 중 실패한 배치는 부하가 빠진 상태에서 순차로 한 번 더 시도
+        still_failed = []
+        for s, e in failed:
+            try:
+                results[s:e] = self._embed_with_retry(texts[s:e])
+            except Exception:
+                still_failed.append((s, e))
+
+        elapsed = time.perf_counter() - started
+        done = len(texts) - sum(e - s for s, e in still_failed)
+        with self._lock:
+            self._stats["chunks"] += done
+            self._stats["batches"] += len(batches)
+            self._stats["failed_batches"] += len(still_failed)
+            self._stats["seconds"] += elapsed
+
+        print(
+            f"[EMBED] model={self.model} chunks={done}/{len(texts)} batches={len(batches)} "
+            f"workers={workers} {done / elapsed if elapsed > 0 else 0.0:.1f} chunks/s",
+            flush=True,
+        )
+
+        if still_failed:
+            raise EmbeddingBatchError(
+                f"embedding failed for {len(still_failed)}/{len(batches)} batches",
+                failed_ranges=still_failed,
+                partial=results,
+            )
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_key(text)
+        with self._lock:
+            vec = self._query_lru.get(key)
+            if vec is not None:
+                self._query_lru.move_to_end(key)
+                self._stats["query_lru_hits"] += 1
+                return vec
+
+        vec = None
+        if self.cache is not None:
+            vec = self.cache.get_many(self.model, [key]).get(key)
+            if vec is not None:
+                with self._lock:
+                    self._stats["cache_hits"] += 1
+
+        if vec is None and self._query_batcher is not None:
+            vec = self._query_batcher.embed(text, key)
+            if self.cache is not None:
+                self.cache.put_many(self.model, [key], [vec])
+        elif vec is None:
+            attempt = 0
+            while True:
+                try:
+                    vec = self.inner.embed_query(text)
+                    break
+                except Exception:
+                    if attempt >= self.max_retries:
+                        raise
+                    time.sleep(self.retry_backoff_sec * (2 ** attempt))
+                    attempt += 1
+            if self.cache is not None:
+                self.cache.put_many(self.model, [key], [vec])
+
+        if self.query_lru_size:
+            with self._lock:
+                self._query_lru[key] = vec
+                self._query_lru.move_to_end(key)
+                while len(self._query_lru) > self.query_lru_size:
+                    self._query_lru.popitem(last=False)
+        return vec
+
+    def query_batch_stats(self) -> Dict[str, Any]:
+        return self._query_batcher.stats() if self._query_batcher is not None else {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        s["chunks_per_sec"] = round(s["chunks"] / s["seconds"], 2) if s["seconds"] > 0 else 0.0
+        return s
+
+
+def stats_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """두 stats() 스냅샷 사이의 처리량(한 번의 sync/tick 단위 리포트용)."""
+    d = {k: after.get(k, 0) - before.get(k, 0) for k in ("chunks", "batches", "retries", "failed_batches", "seconds", "cache_hits", "query_lru_hits")}
+    d["chunks_per_sec"] = round(d["chunks"] / d["seconds"], 2) if d["seconds"] > 0 else 0.0
+    d["seconds"] = round(d["seconds"], 3)
+    return d
@@ -0,0 +1,216 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_ollama import ChatOllama
+
+from .config import (
+    OLLAMA_BASE_URL,
+    HISTORY_KEEP_TURNS,
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_TOKEN_BUDGET_DEFAULT,
+    HISTORY_SUMMARY_ENABLED,
+    HISTORY_SUMMARY_MAX_TOKENS,
+)
+from .context import estimate_tokens
+from .prompts import build_summary_prompt
+
+# 요약은 답변과 같은 Ollama를 쓰므로 프로세스 전체에서 한 번에 하나씩만 실행(답변 생성 지연 최소화)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trag-history")
+_summarizers: Dict[str, Any] = {}
+_summarizers_lock = threading.Lock()
+
+_SUMMARY_PREFIX = "이전 대화 요약: "
+
+
+def history_token_budget(model: str) -> int:
+    return int(HISTORY_TOKEN_BUDGET.get(model, HISTORY_TOKEN_BUDGET_DEFAULT))
+
+
+def _summarizer(model: str):
+    with _summarizers_lock:
+        chain = _summarizers.get(model)
+        if chain is None:
+            chain = (
+                build_summary_prompt()
+                | ChatOllama(model=model, base_url=OLLAMA_BASE_URL, temperature=0, num_predict=HISTORY_SUMMARY_MAX_TOKENS)
+                | StrOutputParser()
+            )
+            _summarizers[model] = chain
+        return chain
+
+
+def _transcript(messages: Sequence[BaseMessage]) -> str:
+    lines = []
+    for m in messages:
+        role = "사용자" if m.type == "human" else "어시스턴트"
+        lines.append(f"{role}: {m.content}")
+    return "\n".join(lines)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """토큰 추정치가 max_tokens 이하가 되도록 뒷부분을 잘라냄."""
+    if max_tokens <= 0:
+        return ""
+    while text and estimate_tokens(text) > max_tokens:
+        text = text[: max(0, int(len(text) * max_tokens / estimate_tokens(text)) - 1)]
+    return text
+
+
+class SummarizingChatHistory(BaseChatMessageHistory):
+    """
+    세션 하나의 대화 이력(화면 표시와 프롬프트가 같이 쓰는 단일 저장소).
+    - 최근 keep_turns 턴은 원문 그대로, 그 이전 턴은 답변이 저장된 뒤 백그라운드에서 누적 요약으로 접음
+    - messages(프롬프트에 들어가는 이력) = [요약 SystemMessage] + 아직 접지 않은 턴, 모델별 토큰 상한 이내
+    - keep_log=True면 화면 표시용 전체 기록(안내 메시지 포함)을 display_messages로 보관
+    """
+
+    def __init__(
+        self,
+        model: str,
+        keep_turns: int = HISTORY_KEEP_TURNS,
+        summarize: bool = HISTORY_SUMMARY_ENABLED,
+        keep_log: bool = True,
+    ):
+        self.model = model
+        self.keep_turns = max(0, int(keep_turns))
+        self.summarize = summarize
+        self.keep_log = keep_log
+        self.summary = ""
+        self._lock = threading.Lock()
+        self._log: List[BaseMessage] = []
+        self._turns: List[BaseMessage] = []
+        self._pending: Optional[Future] = None
+        # clear() 이후에 끝난 이전 요약 작업의 결과는 버림
+        self._generation = 0
+        self._stats = {"folds": 0, "folded_messages": 0, "failed": 0, "summary_ms": 0.0}
+
+    # --- BaseChatMessageHistory ---
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self._lock:
+            summary, turns = self.summary, list(self._turns)
+        budget = history_token_budget(self.model)
+
+        head: List[BaseMessage] = []
+        if summary:
+            text = _truncate(summary, budget)
+            if text:
+                head.append(SystemMessage(content=_SUMMARY_PREFIX + text))
+                budget -= estimate_tokens(text)
+
+        # 토큰 상한을 넘으면 (요약에 아직 반영되지 않았더라도) 오래된 메시지부터 제외
+        tail: List[BaseMessage] = []
+        for m in reversed(turns):
+            cost = estimate_tokens(str(m.content))
+            if cost > budget:
+                break
+            tail.append(m)
+            budget -= cost
+        tail.reverse()
+        while tail and tail[0].type != "human":
+            tail.pop(0)
+        return head + tail
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with self._lock:
+            for m in messages:
+                if self.keep_log:
+                    self._log.append(m)
+                self._turns.append(m)
+            self._schedule_fold_locked()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._pending = None
+            self.summary = ""
+            self._log = []
+            self._turns = []
+
+    # --- 화면 표시 ---
+
+    def add_notice(self, content: str) -> None:
+        """화면에만 보이는 안내 메시지(업로드/임베딩 결과 등). 프롬프트 이력에는 들어가지 않음."""
+        if self.keep_log:
+            with self._lock:
+                self._log.append(AIMessage(content=content, additional_kwargs={"display_only": True}))
+
+    @property
+    def display_messages(self) -> List[BaseMessage]:
+        with self._lock:
+            return list(self._log)
+
+    # --- 누적 요약 ---
+
+    def _overflow_locked(self) -> int:
+        return max(0, len(self._turns) - self.keep_turns * 2)
+
+    def _schedule_fold_locked(self) -> None:
+        if not self._overflow_locked() or self._pending is not None:
+            return
+        if not self.summarize:
+            # 요약을 끄면 최근 N턴 창만 유지
+            del self._turns[: self._overflow_locked()]
+            return
+        self._pending = _executor.submit(self._fold, self._generation)
+
+    def _fold(self, generation: int) -> None:
+        while True:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                n = self._overflow_locked()
+                if not n:
+                    self._pending = None
+                    return
+                old, previous, model = self._turns[:n], self.summary, self.model
+
+            started = time.perf_counter()
+            summary, status = previous, "ok"
+            try:
+                out = _summarizer(model).invoke({"summary": previous or "(없음)", "conversation": _transcript(old)})
+                summary = (out or "").strip() or previous
+            except Exception as e:
+                # 요약 실패 시 이전 요약을 유지하고 오래된 턴은 버림(이력이 무한히 커지지 않도록)
+                status = f"failed: {e}"
+            ms = (time.perf_counter() - started) * 1000.0
+
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self.summary = summary
+                # 그 사이 추가된 메시지는 뒤에만 붙으므로 앞의 n개가 방금 요약한 메시지
+                del self._turns[:n]
+                self._stats["folds"] += 1
+                self._stats["folded_messages"] += n
+                self._stats["summary_ms"] += ms
+                if status != "ok":
+                    self._stats["failed"] += 1
+            print(
+                f"[HISTORY] model={model} folded={n} status={status} "
+                f"summary_tokens={estimate_tokens(summary)} ms={ms:.0f}",
+                flush=True,
+            )
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """진행 중인 요약 작업이 끝날 때까지 대기(벤치마크/종료 시 사용)."""
+        with self._lock:
+            pending = self._pending
+        if pending is not None:
+            pending.result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s["turn_messages"] = len(self._turns)
+            s["summary_tokens"] = estimate_tokens(self.summary)
+            s["pending"] = self._pending is not None
+        s["summary_ms"] = round(s["summary_ms"], 1)
+        s["prompt_tokens"] = sum(estimate_tokens(str(m.content)) for m in self.messages)
+        return s
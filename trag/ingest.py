@@ -1,5 +1,22 @@
 import os
+import csv
+import time
+import zipfile
+from itertools import islice
+from xml.etree import ElementTree
+
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+# ./data 폴더에서 인제스트 대상으로 보는 확장자
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".csv", ".txt", ".md")
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def file_format(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
 
 def load_pdf_pages(pdf_path: str):
     if not os.path.exists(pdf_path):
@@ -7,4 +24,164 @@ def load_pdf_pages(pdf_path: str):
 
     loader = PyPDFLoader(pdf_path)
     # PyPDFLoader는 문서 페이지 단위로 Document 리스트를 반환
-    return loader.load()
\ No newline at end of file
+    return loader.load()
+
+
+def iter_pdf_page_windows(pdf_path: str, window_pages: int, start_page: int = 0):
+    """
+    페이지를 lazy하게 읽어 window_pages 단위 (시작 페이지, Document 리스트)로 yield.
+    전체 페이지를 메모리에 올리지 않으므로 대용량 PDF에서도 메모리가 window 크기로 제한됩니다.
+    start_page 이전 페이지는 건너뜁니다(재개용).
+    """
+    if not os.path.exists(pdf_path):
+        return
+
+    pages = PyPDFLoader(pdf_path).lazy_load()
+    if start_page:
+        pages = islice(pages, start_page, None)
+
+    page_no = start_page
+    while True:
+        window = list(islice(pages, max(1, window_pages)))
+        if not window:
+            return
+        yield page_no, window
+        page_no += len(window)
+
+
+def _docx_paragraph_text(p) -> str:
+    parts = []
+    for el in p.iter():
+        if el.tag == _W_NS + "t":
+            parts.append(el.text or "")
+        elif el.tag == _W_NS + "tab":
+            parts.append("\t")
+        elif el.tag in (_W_NS + "br", _W_NS + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def load_docx_pages(path: str):
+    """
+    DOCX 네이티브 추출: word/document.xml을 직접 파싱(python-docx 등 추가 의존성 없음).
+    본문 순서대로 문단은 줄 단위, 표는 행마다 셀을 ' | '로 이어 붙입니다.
+    """
+    if not os.path.exists(path):
+        return []
+
+    with zipfile.ZipFile(path) as z:
+        root = ElementTree.fromstring(z.read("word/document.xml"))
+
+    body = root.find(_W_NS + "body")
+    lines = []
+    for el in (body if body is not None else []):
+        if el.tag == _W_NS + "p":
+            text = _docx_paragraph_text(el).strip()
+            if text:
+                lines.append(text)
+        elif el.tag == _W_NS + "tbl":
+            for tr in el.iter(_W_NS + "tr"):
+                cells = [
+                    " ".join(_docx_paragraph_text(p).strip() for p in tc.iter(_W_NS + "p")).strip()
+                    for tc in tr.iter(_W_NS + "tc")
+                ]
+                if any(cells):
+                    lines.append(" | ".join(cells))
+
+    return [Document(page_content="\n".join(lines), metadata={"source": path})]
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        raw = f.read()
+    # 국내 문서는 cp949로 저장된 경우가 많아 utf-8 실패 시 한 번 더 시도
+    for enc in ("utf-8-sig", "cp949"):
+        try:
+            return raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode("utf-8", errors="replace")
+
+
+def load_text_pages(path: str):
+    """TXT/Markdown: 파일 전체를 하나의 Document로(분할은 split_pages에서)."""
+    if not os.path.exists(path):
+        return []
+    return [Document(page_content=_read_text(path), metadata={"source": path})]
+
+
+def load_csv_chunks(path: str, rows_per_chunk: int, max_chars: int):
+    """
+    CSV는 행 단위로 청크화: rows_per_chunk행 또는 max_chars 글자마다 끊고,
+    청크마다 헤더를 붙여서 각 청크만 보고도 열 의미를 알 수 있게 합니다.
+    "page"에는 청크 시작 행 번호를 넣어 청크 ID가 안정적으로 유지되게 합니다.
+    """
+    if not os.path.exists(path):
+        return []
+
+    reader = csv.reader(_read_text(path).splitlines(), skipinitialspace=True)
+    header = next(reader, None)
+    if not header:
+        return []
+    header_line = ", ".join(h.strip() for h in header)
+
+    chunks = []
+    rows, chars, start = [], len(header_line), 1
+
+    def _flush(end_row: int):
+        if rows:
+            chunks.append(Document(
+                page_content=header_line + "\n" + "\n".join(rows),
+                metadata={"source": path, "page": start, "row_start": start, "row_end": end_row},
+            ))
+
+    for row_no, row in enumerate(reader, start=1):
+        if not any(c.strip() for c in row):
+            continue
+        line = "; ".join(f"{h.strip()}: {v.strip()}" for h, v in zip(header, row))
+        if rows and (len(rows) >= rows_per_chunk or chars + len(line) > max_chars):
+            _flush(row_no - 1)
+            rows, chars, start = [], len(header_line), row_no
+        rows.append(line)
+        chars += len(line) + 1
+    _flush(row_no if rows else start)
+
+    return chunks
+
+
+def split_pages(docs, chunk_size: int, chunk_overlap: int):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+    return splitter.split_documents(docs)
+
+
+def load_and_split_pdf(pdf_path: str, chunk_size: int, chunk_overlap: int):
+    """
+    파싱+분할을 한 번에 수행(프로세스 풀 워커용).
+    - 워커 프로세스에서 pickle 가능해야 하므로 모듈 최상위 함수로 둡니다.
+    - 워커가 설정 모듈에 의존하지 않도록 청크 설정은 인자로 받습니다.
+    """
+    return split_pages(load_pdf_pages(pdf_path), chunk_size, chunk_overlap)
+
+
+def load_and_split(path: str, chunk_size: int, chunk_overlap: int, csv_rows_per_chunk: int):
+    """확장자별 추출기로 읽고 청크까지 만들어 반환(CSV는 행 단위 청크 그대로)."""
+    fmt = file_format(path)
+    if fmt == ".pdf":
+        return load_and_split_pdf(path, chunk_size, chunk_overlap)
+    if fmt == ".csv":
+        return load_csv_chunks(path, csv_rows_per_chunk, chunk_size)
+    if fmt == ".docx":
+        return split_pages(load_docx_pages(path), chunk_size, chunk_overlap)
+    if fmt in (".txt", ".md"):
+        return split_pages(load_text_pages(path), chunk_size, chunk_overlap)
+    raise ValueError(f"unsupported format: {fmt}")
+
+
+def load_and_split_timed(path: str, chunk_size: int, chunk_overlap: int, csv_rows_per_chunk: int):
+    """워커 풀용: (청크 리스트, 파싱+분할 소요 초)를 반환해 포맷별 처리량 집계에 사용."""
+    started = time.perf_counter()
+    docs = load_and_split(path, chunk_size, chunk_overlap, csv_rows_per_chunk)
+    return docs, time.perf_counter() - started
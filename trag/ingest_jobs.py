@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Iterable
+
+from .config import MANIFEST_DB_PATH, DATA_DIR, INGEST_JOB_POLL_SEC
+from .vectorstore import sync_pdf_dir
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    data_dir TEXT NOT NULL,
+    status TEXT NOT NULL,            -- queued / running / done / failed
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    progress TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_hash ON ingest_jobs(content_hash, status);
+"""
+
+_ACTIVE = ("queued", "running")
+
+
+def content_hash(blobs: Iterable[bytes]) -> str:
+    """업로드 묶음의 내용 해시(파일 순서와 무관). 같은 내용의 작업 중복 제거에 사용."""
+    digests = sorted(hashlib.sha256(b).hexdigest() for b in blobs)
+    return hashlib.sha256("|".join(digests).encode("utf-8")).hexdigest()
+
+
+class IngestJobQueue:
+    """
+    인제스트 작업 큐(매니페스트와 같은 SQLite 파일의 ingest_jobs 테이블).
+    - enqueue: 같은 content_hash의 대기/실행 중 작업이 있으면 그 job_id를 반환(중복 병합)
+    - claim_next: 가장 오래된 queued 작업을 원자적으로 running으로 전환
+    - 프로세스가 죽어서 running으로 남은 작업은 워커 시작 시 queued로 되돌림
+    """
+
+    def __init__(self, path: str = MANIFEST_DB_PATH):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, content_hash: str, data_dir: str = DATA_DIR) -> str:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM ingest_jobs WHERE content_hash=? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (content_hash, *_ACTIVE),
+                ).fetchone()
+                if row:
+                    job_id = row[0]
+                else:
+                    job_id = uuid.uuid4().hex
+                    self._conn.execute(
+                        "INSERT INTO ingest_jobs(id, content_hash, data_dir, status, created_at) VALUES (?,?,?,?,?)",
+                        (job_id, content_hash, os.path.abspath(data_dir), "queued", time.time()),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM ingest_jobs WHERE status='queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE ingest_jobs SET status='running', started_at=? WHERE id=?",
+                        (time.time(), row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row else None
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingest_jobs SET progress=? WHERE id=?",
+                (json.dumps(progress, ensure_ascii=False), job_id),
+            )
+
+    def finish(self, job_id: str, result: Dict[str, Any] = None, error: str = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingest_jobs SET status=?, finished_at=?, result=?, error=? WHERE id=?",
+                (
+                    "failed" if error else "done",
+                    time.time(),
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error,
+                    job_id,
+                ),
+            )
+
+    def requeue_stale(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("UPDATE ingest_jobs SET status='queued', started_at=NULL WHERE status='running'")
+            return cur.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, content_hash, data_dir, status, created_at, started_at, finished_at, progress, result, error "
+                "FROM ingest_jobs WHERE id=?",
+                (job_id,),
+            ).fetchone()
+        if not row:
+            return None
+        job = dict(zip(
+            ("id", "content_hash", "data_dir", "status", "created_at", "started_at", "finished_at", "progress", "result", "error"),
+            row,
+        ))
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+def _with_eta(progress: Dict[str, Any], started_at: float) -> Dict[str, Any]:
+    done = progress.get("files_done", 0)
+    total = progress.get("files_total", 0)
+    elapsed = time.time() - started_at
+    progress["elapsed_sec"] = round(elapsed, 1)
+    progress["eta_sec"] = round(elapsed / done * (total - done), 1) if done else None
+    return progress
+
+
+_QUEUE: Optional[IngestJobQueue] = None
+_WORKER: Optional[threading.Thread] = None
+_WORKER_LOCK = threading.Lock()
+_WAKE = threading.Event()
+
+
+def get_job_queue() -> IngestJobQueue:
+    global _QUEUE
+    with _WORKER_LOCK:
+        if _QUEUE is None:
+            _QUEUE = IngestJobQueue()
+        return _QUEUE
+
+
+def _run_job(q: IngestJobQueue, job: Dict[str, Any]) -> None:
+    started_at = time.time()
+
+    def _progress(p: Dict[str, Any]) -> None:
+        q.update_progress(job["id"], _with_eta(p, started_at))
+
+    try:
+        result = sync_pdf_dir(job["data_dir"], progress=_progress)
+        q.finish(job["id"], result=result)
+    except Exception as e:
+        q.finish(job["id"], error=str(e))
+
+
+def _worker_loop() -> None:
+    q = get_job_queue()
+    q.requeue_stale()
+    while True:
+        job = q.claim_next()
+        if job is None:
+            _WAKE.wait(INGEST_JOB_POLL_SEC)
+            _WAKE.clear()
+            continue
+        _run_job(q, job)
+
+
+def ensure_ingest_worker_started() -> bool:
+    """프로세스당 백그라운드 인제스트 워커 스레드 1개만 띄움(Streamlit rerun에도 유지)."""
+    global _WORKER
+    with _WORKER_LOCK:
+        if _WORKER is not None and _WORKER.is_alive():
+            return False
+        _WORKER = threading.Thread(target=_worker_loop, name="trag-ingest-worker", daemon=True)
+        _WORKER.start()
+        return True
+
+
+def submit_ingest_job(blobs: Iterable[bytes], data_dir: str = DATA_DIR) -> str:
+    """업로드 내용 해시로 작업을 등록하고 job_id를 바로 반환(인제스트는 워커가 비동기로 수행)."""
+    job_id = get_job_queue().enqueue(content_hash(blobs), data_dir)
+    ensure_ingest_worker_started()
+    _WAKE.set()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return get_job_queue().get(job_id)
+
+
+def get_jobs(job_ids: List[str]) -> List[Dict[str, Any]]:
+    q = get_job_queue()
+    return [j for j in (q.get(i) for i in job_ids) if j]
@@ -0,0 +1,256 @@
+import os
+import re
+import json
+import math
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Tuple, Iterable
+
+from .config import LEXICAL_INDEX_PATH, BM25_K1, BM25_B
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+-- 추가/삭제 로그: 프로세스마다 마지막으로 읽은 seq 이후만 이어서 반영(UI ↔ 뉴스 데몬 공유)
+CREATE TABLE IF NOT EXISTS lex_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT NOT NULL,
+    op TEXT NOT NULL,               -- add / del
+    tf TEXT,                        -- {term: 빈도} json (add만)
+    length INTEGER
+);
+"""
+
+_WORD_RE = re.compile(r"[0-9a-z가-힣]+")
+_HANGUL_RE = re.compile(r"[가-힣]+")
+
+# 로그가 살아있는 문서 수의 이 배수를 넘으면 로드 시 압축
+_COMPACT_RATIO = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    한국어용 토큰화(형태소 분석기 없이):
+    - 영숫자/한글 연속 구간은 통째로 1토큰(제10조, 2024, gpt4 같은 정확 일치용)
+    - 한글 구간은 글자 2-gram을 추가(조사/어미가 붙어도 어간이 매칭되도록)
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = _WORD_RE.findall(text)
+    for run in _HANGUL_RE.findall(text):
+        if len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class LexicalIndex:
+    """
+    문자 n-gram BM25 역색인.
+    - 메모리: term → {doc_id: tf}, doc_id → 길이
+    - 디스크: SQLite 추가/삭제 로그(WAL). search 전에 다른 프로세스가 쓴 로그만 증분 반영
+    - 네트워크/임베딩 호출이 없어 1차 후보 필터로도 사용 가능
+    """
+
+    def __init__(self, path: str = LEXICAL_INDEX_PATH, k1: float = BM25_K1, b: float = BM25_B):
+        self.path = path
+        self.k1 = float(k1)
+        self.b = float(b)
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_tf: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._seq = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+        self.refresh()
+        self._maybe_compact()
+
+    # ---------- 메모리 색인 ----------
+    def _apply_add(self, doc_id: str, tf: Dict[str, int], length: int) -> None:
+        self._apply_del(doc_id)
+        self._doc_tf[doc_id] = tf
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        for term, n in tf.items():
+            self._postings.setdefault(term, {})[doc_id] = n
+
+    def _apply_del(self, doc_id: str) -> None:
+        tf = self._doc_tf.pop(doc_id, None)
+        if tf is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        for term in tf:
+            plist = self._postings.get(term)
+            if plist is not None:
+                plist.pop(doc_id, None)
+                if not plist:
+                    del self._postings[term]
+
+    def refresh(self) -> int:
+        """마지막으로 읽은 seq 이후의 로그만 반영. 반영한 로그 행 수를 반환."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, doc_id, op, tf, length FROM lex_log WHERE seq > ? ORDER BY seq",
+                (self._seq,),
+            ).fetchall()
+            for seq, doc_id, op, tf, length in rows:
+                if op == "add":
+                    self._apply_add(doc_id, json.loads(tf), int(length))
+                else:
+                    self._apply_del(doc_id)
+                self._seq = seq
+            return len(rows)
+
+    def _maybe_compact(self) -> int:
+        """로그가 살아있는 문서 수보다 많이 쌓였으면 압축. 줄어든 로그 행 수를 반환."""
+        with self._lock:
+            (log_rows,) = self._conn.execute("SELECT COUNT(*) FROM lex_log").fetchone()
+            live = len(self._doc_tf)
+            if log_rows <= max(1000, _COMPACT_RATIO * live):
+                return 0
+            with self._conn:
+                self._conn.execute("DELETE FROM lex_log WHERE seq <= ?", (self._seq,))
+                self._conn.executemany(
+                    "INSERT INTO lex_log(doc_id, op, tf, length) VALUES (?, 'add', ?, ?)",
+                    [(d, json.dumps(tf, ensure_ascii=False), self._doc_len[d]) for d, tf in self._doc_tf.items()],
+                )
+            # 압축으로 seq가 새로 매겨졌으므로 처음부터 다시 로드
+            self._postings, self._doc_tf, self._doc_len, self._total_len, self._seq = {}, {}, {}, 0, 0
+            self.refresh()
+            return log_rows - live
+
+    def compact(self) -> int:
+        """대량 삭제 뒤 호출(다른 프로세스가 쓴 로그까지 반영한 다음 압축)."""
+        self.refresh()
+        return self._maybe_compact()
+
+    # ---------- 쓰기 ----------
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        if not ids:
+            return
+        rows = []
+        for doc_id, text in zip(ids, texts):
+            tokens = tokenize(text)
+            rows.append((doc_id, json.dumps(dict(Counter(tokens)), ensure_ascii=False), len(tokens)))
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO lex_log(doc_id, op, tf, length) VALUES (?, 'add', ?, ?)", rows)
+        self.refresh()
+
+    def delete(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO lex_log(doc_id, op) VALUES (?, 'del')", [(i,) for i in ids])
+        self.refresh()
+
+    def get_meta(self, key: str) -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    # ---------- 검색 ----------
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """BM25 상위 k개 (doc_id, score)."""
+        self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs or not terms:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                plist = self._postings.get(term)
+                if not plist:
+                    continue
+                df = len(plist)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in plist.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def idf(self, terms: Iterable[str]) -> Dict[str, float]:
+        """색인에 있는 term의 BM25 idf(없는 term은 빠짐). 질의가 구체적인 용어를 담고 있는지 판단할 때 사용."""
+        self.refresh()
+        with self._lock:
+            n_docs = len(self._doc_len)
+            out = {}
+            for term in set(terms):
+                plist = self._postings.get(term)
+                if plist:
+                    out[term] = math.log(1.0 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            return out
+
+    def changes_since(self, seq: int) -> Tuple[List[Tuple[int, str, str]], bool]:
+        """
+        seq 이후의 (seq, doc_id, op) 로그와, 그 사이 압축으로 로그가 잘렸는지 여부.
+        (잘렸으면 삭제 기록이 사라졌을 수 있으므로 호출 측은 전체 재동기화가 필요)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, doc_id, op FROM lex_log WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+            (min_seq,) = self._conn.execute("SELECT MIN(seq) FROM lex_log").fetchone()
+        truncated = bool(seq) and min_seq is not None and min_seq > seq + 1
+        return rows, truncated
+
+    def version(self) -> int:
+        """컬렉션 변경 버전: 모든 청크 추가/삭제가 로그에 남으므로 마지막 seq가 곧 버전."""
+        self.refresh()
+        return self._seq
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_len
+
+
+_INDEXES: Dict[str, LexicalIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_lexical_index(path: str = LEXICAL_INDEX_PATH) -> LexicalIndex:
+    """프로세스당 색인 파일 하나에 인스턴스 하나만 유지."""
+    key = os.path.abspath(path)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = LexicalIndex(path)
+            _INDEXES[key] = index
+        return index
+
+
+def backfill_from_collection(index: LexicalIndex, vs, batch_size: int = 1000) -> int:
+    """색인 도입 전에 임베딩된 청크를 Chroma에서 읽어 1회 색인(meta에 완료 표시)."""
+    if index.get_meta("backfilled"):
+        return 0
+    total = 0
+    offset = 0
+    while True:
+        got = vs._collection.get(include=["documents"], limit=batch_size, offset=offset)
+        ids = got.get("ids") or []
+        if not ids:
+            break
+        missing = [(i, d) for i, d in zip(ids, got.get("documents") or []) if i not in index]
+        index.add([i for i, _ in missing], [d or "" for _, d in missing])
+        total += len(missing)
+        offset += len(ids)
+    index.set_meta("backfilled", "1")
+    return total
@@ -0,0 +1,420 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional, Set
+
+from .config import MANIFEST_DB_PATH, MANIFEST_PATH, NEWS_MANIFEST_PATH
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+-- 임베딩된 PDF 버전(sha256 단위)과 그 버전에 속한 청크 ID
+CREATE TABLE IF NOT EXISTS pdf_versions (
+    sha256 TEXT PRIMARY KEY,
+    original_name TEXT,
+    stored_path TEXT,
+    ingested_at TEXT,
+    chunk_ids TEXT
+);
+-- 경로 → 현재 버전 sha256
+CREATE TABLE IF NOT EXISTS pdf_files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+-- 경로 → stat 서명 + sha256 (해시 캐시)
+CREATE TABLE IF NOT EXISTS pdf_stat (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    inode INTEGER,
+    sha256 TEXT NOT NULL
+);
+-- 스트리밍 인제스트 진행 상황(중단 시 재개용): 커밋된 페이지 수 + 지금까지 쓴 청크 ID
+CREATE TABLE IF NOT EXISTS pdf_progress (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    pages_done INTEGER NOT NULL,
+    chunk_ids TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS news_items (
+    uid TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    keyword TEXT,
+    title TEXT,
+    link TEXT,
+    published TEXT,
+    seen_at TEXT,
+    ingested_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_news_items_status_keyword ON news_items(status, keyword);
+-- RSS 주소별 조건부 요청 검증값(ETag/Last-Modified): 바뀌지 않은 피드는 304로 끝남
+CREATE TABLE IF NOT EXISTS feed_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at TEXT
+);
+-- 뉴스 키워드별 폴링 스케줄(데몬 재시작 후에도 주기/백오프 유지)
+CREATE TABLE IF NOT EXISTS news_schedule (
+    keyword TEXT PRIMARY KEY,
+    interval_sec REAL NOT NULL,
+    next_due REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_added INTEGER,
+    last_polled REAL
+);
+"""
+
+_NEWS_COLUMNS = ("status", "keyword", "title", "link", "published", "seen_at", "ingested_at")
+
+
+class ManifestStore:
+    """
+    PDF/뉴스 매니페스트 SQLite 저장소(기존 ingested_manifest.json / news_manifest.json 대체).
+    - sha/uid 인덱스 조회, 행 단위 insert(전체 재작성 없음)
+    - WAL 모드: UI 프로세스와 뉴스 데몬이 동시에 읽고 씀
+    - 최초 오픈 시 기존 JSON 매니페스트를 1회 마이그레이션(.migrated로 이름 변경)
+    """
+
+    def __init__(self, path: str = MANIFEST_DB_PATH, pdf_json_path: str = MANIFEST_PATH, news_json_path: str = NEWS_MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+        self._migrate_pdf_json(pdf_json_path)
+        self._migrate_news_json(news_json_path)
+
+    @contextmanager
+    def transaction(self):
+        """여러 쓰기를 한 트랜잭션으로 묶음(중간에 죽으면 전부 롤백)."""
+        with self._lock:
+            with self._conn:
+                yield self._conn
+
+    # -------------------------
+    # migration
+    # -------------------------
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._meta(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    def _load_json(self, path: str) -> Optional[Dict[str, Any]]:
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else None
+        except Exception:
+            return None
+
+    def _mark_migrated(self, conn, key: str) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, datetime.now().isoformat(timespec="seconds")))
+
+    def _rename_migrated(self, json_path: str) -> None:
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except Exception:
+            pass
+
+    def _migrate_pdf_json(self, json_path: str) -> None:
+        with self._lock:
+            if self._meta("migrated_pdf_json"):
+                return
+            data = self._load_json(json_path)
+            with self._conn as conn:
+                for sha, info in (data or {}).get("items", {}).items():
+                    conn.execute(
+                        "INSERT OR IGNORE INTO pdf_versions(sha256, original_name, stored_path, ingested_at, chunk_ids) VALUES (?,?,?,?,?)",
+                        (
+                            sha,
+                            info.get("original_name"),
+                            info.get("stored_path"),
+                            info.get("ingested_at"),
+                            json.dumps(info["chunk_ids"]) if "chunk_ids" in info else None,
+                        ),
+                    )
+                    if info.get("stored_path"):
+                        conn.execute("INSERT OR IGNORE INTO pdf_files(path, sha256) VALUES (?,?)", (info["stored_path"], sha))
+                for path, rec in (data or {}).get("files", {}).items():
+                    conn.execute("INSERT OR REPLACE INTO pdf_files(path, sha256) VALUES (?,?)", (path, rec.get("sha256")))
+                for path, rec in (data or {}).get("stat", {}).items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO pdf_stat(path, size, mtime_ns, inode, sha256) VALUES (?,?,?,?,?)",
+                        (path, rec.get("size"), rec.get("mtime_ns"), rec.get("inode"), rec.get("sha256")),
+                    )
+                self._mark_migrated(conn, "migrated_pdf_json")
+            if data is not None:
+                self._rename_migrated(json_path)
+
+    def _migrate_news_json(self, json_path: str) -> None:
+        with self._lock:
+            if self._meta("migrated_news_json"):
+                return
+            data = self._load_json(json_path)
+            with self._conn as conn:
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO news_items(uid, {', '.join(_NEWS_COLUMNS)}) VALUES (?{',?' * len(_NEWS_COLUMNS)})",
+                    [
+                        (uid, *(rec.get(c) for c in _NEWS_COLUMNS))
+                        for uid, rec in (data or {}).get("items", {}).items()
+                        if rec.get("status")
+                    ],
+                )
+                self._mark_migrated(conn, "migrated_news_json")
+            if data is not None:
+                self._rename_migrated(json_path)
+
+    # -------------------------
+    # PDF
+    # -------------------------
+    def has_version(self, sha: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM pdf_versions WHERE sha256=?", (sha,)).fetchone() is not None
+
+    def get_version(self, sha: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, original_name, stored_path, ingested_at, chunk_ids FROM pdf_versions WHERE sha256=?",
+                (sha,),
+            ).fetchone()
+        return _version_row(row) if row else None
+
+    def current_sha(self, path: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM pdf_files WHERE path=?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def record_version(self, sha: str, path: str, chunk_ids: List[str], replaces: str = None) -> None:
+        """새 버전 기록 + 경로 포인터 갱신 + (있으면) 이전 버전/진행 상황 삭제를 한 트랜잭션으로."""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM pdf_progress WHERE path=?", (path,))
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_versions(sha256, original_name, stored_path, ingested_at, chunk_ids) VALUES (?,?,?,?,?)",
+                (sha, os.path.basename(path), path, datetime.now().isoformat(timespec="seconds"), json.dumps(chunk_ids)),
+            )
+            conn.execute("INSERT OR REPLACE INTO pdf_files(path, sha256) VALUES (?,?)", (path, sha))
+            if replaces and replaces != sha:
+                conn.execute("DELETE FROM pdf_versions WHERE sha256=?", (replaces,))
+
+    def get_progress(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, pages_done, chunk_ids FROM pdf_progress WHERE path=?", (path,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"sha256": row[0], "pages_done": row[1], "chunk_ids": json.loads(row[2])}
+
+    def save_progress(self, path: str, sha: str, pages_done: int, chunk_ids: List[str]) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_progress(path, sha256, pages_done, chunk_ids, updated_at) VALUES (?,?,?,?,?)",
+                (path, sha, pages_done, json.dumps(chunk_ids), datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sha256, original_name, stored_path, ingested_at, chunk_ids FROM pdf_versions ORDER BY ingested_at DESC"
+            ).fetchall()
+        return [_version_row(r) for r in rows]
+
+    def get_stat(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, sha256 FROM pdf_stat WHERE path=?", (path,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"size": row[0], "mtime_ns": row[1], "inode": row[2], "sha256": row[3]}
+
+    def put_stat(self, path: str, sig: Dict[str, int], sha: str) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_stat(path, size, mtime_ns, inode, sha256) VALUES (?,?,?,?,?)",
+                (path, sig["size"], sig["mtime_ns"], sig["inode"], sha),
+            )
+
+    def prune_stat(self, dir_path: str, present: Set[str]) -> int:
+        """dir_path 바로 아래에서 사라진 파일의 stat 캐시 삭제."""
+        with self._lock:
+            paths = [r[0] for r in self._conn.execute("SELECT path FROM pdf_stat")]
+        gone = [p for p in paths if os.path.dirname(p) == dir_path and p not in present]
+        if gone:
+            with self.transaction() as conn:
+                conn.executemany("DELETE FROM pdf_stat WHERE path=?", [(p,) for p in gone])
+        return len(gone)
+
+    # -------------------------
+    # News
+    # -------------------------
+    def has_news(self, uid: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM news_items WHERE uid=?", (uid,)).fetchone() is not None
+
+    def existing_news_uids(self, uids: Iterable[str]) -> Set[str]:
+        uids = list(dict.fromkeys(uids))
+        found: Set[str] = set()
+        with self._lock:
+            for i in range(0, len(uids), 500):
+                part = uids[i:i + 500]
+                marks = ",".join("?" * len(part))
+                found.update(r[0] for r in self._conn.execute(f"SELECT uid FROM news_items WHERE uid IN ({marks})", part))
+        return found
+
+    def count_news(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM news_items").fetchone()[0]
+
+    def put_news_many(self, items: Dict[str, Dict[str, Any]]) -> None:
+        if not items:
+            return
+        with self.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO news_items(uid, {', '.join(_NEWS_COLUMNS)}) VALUES (?{',?' * len(_NEWS_COLUMNS)})",
+                [(uid, *(rec.get(c) for c in _NEWS_COLUMNS)) for uid, rec in items.items()],
+            )
+
+    def expire_news(self, uids: Iterable[str]) -> int:
+        """벡터를 지운 기사를 expired(묘비)로 표시. 묘비가 남아 있는 동안 같은 기사는 다시 넣지 않음."""
+        uids = list(dict.fromkeys(uids))
+        now = datetime.now().isoformat(timespec="seconds")
+        n = 0
+        with self.transaction() as conn:
+            for i in range(0, len(uids), 500):
+                part = uids[i:i + 500]
+                marks = ",".join("?" * len(part))
+                n += conn.execute(
+                    f"UPDATE news_items SET status='expired', seen_at=? WHERE uid IN ({marks})", [now, *part]
+                ).rowcount
+        return n
+
+    def compact_news(self, skipped_before: str, expired_before: str) -> int:
+        """기준 시각(ISO)보다 오래된 건너뜀 기록과 묘비를 삭제. 삭제한 행 수를 반환."""
+        with self.transaction() as conn:
+            skipped = conn.execute(
+                "DELETE FROM news_items WHERE status LIKE 'skipped%' AND COALESCE(seen_at, ingested_at, '') < ?",
+                (skipped_before,),
+            ).rowcount
+            expired = conn.execute(
+                "DELETE FROM news_items WHERE status='expired' AND COALESCE(seen_at, '') < ?",
+                (expired_before,),
+            ).rowcount
+        return skipped + expired
+
+    def optimize(self, vacuum: bool = False) -> Dict[str, int]:
+        """PRAGMA optimize, 필요하면 WAL 체크포인트 + VACUUM으로 파일 크기 회수. {"bytes_before", "bytes_after"}."""
+        before = _db_bytes(self.path)
+        with self._lock:
+            self._conn.execute("PRAGMA optimize")
+            if vacuum:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.execute("VACUUM")
+        return {"bytes_before": before, "bytes_after": _db_bytes(self.path)}
+
+    # -------------------------
+    # RSS feed cache
+    # -------------------------
+    def get_feed_validators(self, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """url → {"etag", "last_modified"} (저장된 것만)."""
+        urls = list(dict.fromkeys(urls))
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                part = urls[i:i + 500]
+                marks = ",".join("?" * len(part))
+                for url, etag, last_modified in self._conn.execute(
+                    f"SELECT url, etag, last_modified FROM feed_cache WHERE url IN ({marks})", part
+                ):
+                    found[url] = {"etag": etag, "last_modified": last_modified}
+        return found
+
+    def put_feed_validators(self, items: Dict[str, Dict[str, Any]]) -> None:
+        if not items:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO feed_cache(url, etag, last_modified, fetched_at) VALUES (?,?,?,?)",
+                [(url, v.get("etag"), v.get("last_modified"), now) for url, v in items.items()],
+            )
+
+    # -------------------------
+    # News polling schedule
+    # -------------------------
+    def get_news_schedule(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT keyword, interval_sec, next_due, failures, last_added, last_polled FROM news_schedule"
+            ).fetchall()
+        return {
+            r[0]: {"interval_sec": r[1], "next_due": r[2], "failures": r[3], "last_added": r[4], "last_polled": r[5]}
+            for r in rows
+        }
+
+    def put_news_schedule(self, items: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        removed = list(removed)
+        if not items and not removed:
+            return
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO news_schedule(keyword, interval_sec, next_due, failures, last_added, last_polled) VALUES (?,?,?,?,?,?)",
+                [
+                    (kw, v["interval_sec"], v["next_due"], v.get("failures", 0), v.get("last_added"), v.get("last_polled"))
+                    for kw, v in items.items()
+                ],
+            )
+            conn.executemany("DELETE FROM news_schedule WHERE keyword=?", [(kw,) for kw in removed])
+
+
+def _db_bytes(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def _version_row(row) -> Dict[str, Any]:
+    sha, name, path, ingested_at, chunk_ids = row
+    return {
+        "sha256": sha,
+        "original_name": name,
+        "stored_path": path,
+        "ingested_at": ingested_at,
+        # None = v1 JSON에서 마이그레이션된 버전(청크 ID가 랜덤)
+        "chunk_ids": json.loads(chunk_ids) if chunk_ids is not None else None,
+    }
+
+
+_STORES: Dict[str, ManifestStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_manifest_store(path: str = MANIFEST_DB_PATH) -> ManifestStore:
+    """프로세스당 DB 파일 하나에 연결 하나만 유지."""
+    key = os.path.abspath(path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = ManifestStore(path)
+            _STORES[key] = store
+        return store
@@ -0,0 +1,166 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    NEWS_NEAR_DUP_PATH,
+    NEWS_NEAR_DUP_SHINGLE,
+    NEWS_NEAR_DUP_MAX_HAMMING,
+    NEWS_NEAR_DUP_TTL_DAYS,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS near_dup (
+    uid TEXT PRIMARY KEY,
+    sig INTEGER NOT NULL,           -- 64비트 SimHash(부호 있는 정수로 저장)
+    ts REAL NOT NULL                -- 색인에 넣은 시각(epoch 초), TTL 정리 기준
+);
+CREATE INDEX IF NOT EXISTS idx_near_dup_ts ON near_dup(ts);
+"""
+
+_BITS = 64
+_NON_WORD_RE = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def shingles(text: str, n: int = NEWS_NEAR_DUP_SHINGLE) -> List[str]:
+    """NFKC 정규화 + 공백/기호 제거 후 글자 n-gram(띄어쓰기/따옴표만 다른 복제본도 같게 봄)."""
+    t = _NON_WORD_RE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+    if len(t) <= n:
+        return [t] if t else []
+    return [t[i:i + n] for i in range(len(t) - n + 1)]
+
+
+def simhash(text: str, n: int = NEWS_NEAR_DUP_SHINGLE) -> int:
+    """shingle별 64비트 해시의 비트 다수결(numpy로 한 번에 계산)."""
+    grams = set(shingles(text, n))
+    if not grams:
+        return 0
+    digests = b"".join(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest() for g in grams)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int32) * 2 > len(grams)
+    return int.from_bytes(np.packbits(votes, bitorder="little").tobytes(), "little")
+
+
+def _to_db(sig: int) -> int:
+    return sig - (1 << _BITS) if sig >= 1 << (_BITS - 1) else sig
+
+
+def _from_db(v: int) -> int:
+    return v + (1 << _BITS) if v < 0 else v
+
+
+class NearDupIndex:
+    """
+    최근 뉴스 대표문장의 SimHash LSH 색인.
+    - 64비트 서명을 (max_hamming + 1)개 밴드로 나눠 밴드 값이 같은 것만 후보로 비교
+      (해밍 거리가 max_hamming 이하면 비둘기집 원리로 최소 한 밴드는 정확히 같음)
+    - 메모리: (밴드 번호, 밴드 값) → [(uid, 서명)], 디스크: SQLite(WAL)에 uid/서명/시각
+    - path=None이면 메모리 전용(한 tick 안의 후보끼리 비교용)
+    """
+
+    def __init__(self, path: Optional[str] = NEWS_NEAR_DUP_PATH, max_hamming: int = NEWS_NEAR_DUP_MAX_HAMMING):
+        self.path = path
+        self.max_hamming = max(0, int(max_hamming))
+        k = self.max_hamming + 1
+        edges = [round(i * _BITS / k) for i in range(k + 1)]
+        self._bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self._lock = threading.RLock()
+        self._buckets: Dict[Tuple[int, int], List[Tuple[str, int]]] = {}
+        self._sigs: Dict[str, int] = {}
+        self._conn = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+            self.prune()
+            for uid, sig in self._conn.execute("SELECT uid, sig FROM near_dup"):
+                self._insert(uid, _from_db(sig))
+
+    def _keys(self, sig: int) -> List[Tuple[int, int]]:
+        return [(i, (sig >> lo) & mask) for i, (lo, mask) in enumerate(self._bands)]
+
+    def _insert(self, uid: str, sig: int) -> None:
+        if uid in self._sigs:
+            return
+        self._sigs[uid] = sig
+        for key in self._keys(sig):
+            self._buckets.setdefault(key, []).append((uid, sig))
+
+    def find(self, sig: int) -> Optional[str]:
+        """해밍 거리 max_hamming 이하인 문장의 uid(없으면 None)."""
+        with self._lock:
+            for key in self._keys(sig):
+                for uid, other in self._buckets.get(key, ()):
+                    if bin(sig ^ other).count("1") <= self.max_hamming:
+                        return uid
+        return None
+
+    def add_many(self, items: Iterable[Tuple[str, int]], ts: Optional[float] = None) -> int:
+        """[(uid, 서명)]을 색인에 추가(디스크에는 한 트랜잭션으로)."""
+        ts = time.time() if ts is None else ts
+        rows = []
+        with self._lock:
+            for uid, sig in items:
+                if uid not in self._sigs:
+                    self._insert(uid, sig)
+                    rows.append((uid, _to_db(sig), ts))
+            if rows and self._conn is not None:
+                with self._conn:
+                    self._conn.executemany("INSERT OR IGNORE INTO near_dup(uid, sig, ts) VALUES (?,?,?)", rows)
+        return len(rows)
+
+    def items(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            return list(self._sigs.items())
+
+    def prune(self, ttl_days: float = NEWS_NEAR_DUP_TTL_DAYS) -> int:
+        """TTL보다 오래된 문장을 디스크/메모리에서 제거."""
+        if self._conn is None or ttl_days <= 0:
+            return 0
+        cutoff = time.time() - ttl_days * 86400
+        with self._lock:
+            old = [r[0] for r in self._conn.execute("SELECT uid FROM near_dup WHERE ts < ?", (cutoff,))]
+            if not old:
+                return 0
+            with self._conn:
+                self._conn.execute("DELETE FROM near_dup WHERE ts < ?", (cutoff,))
+            gone = set(old)
+            for uid in gone:
+                self._sigs.pop(uid, None)
+            for key in list(self._buckets):
+                kept = [e for e in self._buckets[key] if e[0] not in gone]
+                if kept:
+                    self._buckets[key] = kept
+                else:
+                    del self._buckets[key]
+            return len(old)
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+
+_INDEXES: Dict[str, NearDupIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_near_dup_index(path: str = NEWS_NEAR_DUP_PATH) -> NearDupIndex:
+    """프로세스당 파일 하나에 색인 하나만 유지."""
+    key = os.path.abspath(path)
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            idx = NearDupIndex(path)
+            _INDEXES[key] = idx
+        return idx
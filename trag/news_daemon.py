@@ -1,9 +1,11 @@
 import os
-import json
 import time
 import sys
 import subprocess
 from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 # 프로젝트 루트(= TRAG 폴더) 기준으로 모든 상대경로를 고정하기 위한 설정
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -31,6 +33,7 @@ from .config import (
     NEWS_ENABLED,
     NEWS_KEYWORDS,
     NEWS_POLL_INTERVAL_SEC,
+    NEWS_SCHEDULE_MIN_SLEEP_SEC,
     NEWS_TEXT_DIR,
     NEWS_SENTENCE_PATH,
     NEWS_RSS_HL,
@@ -38,149 +41,312 @@ from .config import (
     NEWS_RSS_CEID,
     NEWS_MAX_ITEMS_PER_KEYWORD,
     NEWS_DUP_DISTANCE_THRESHOLD,
-    NEWS_MANIFEST_PATH,
+    NEWS_NEAR_DUP_ENABLED,
+    NEWS_NEAR_DUP_PATH,
+    NEWS_NEAR_DUP_TTL_DAYS,
+    NEWS_RETENTION_MAX_AGE_DAYS,
+    NEWS_MAINTENANCE_INTERVAL_SEC,
+    MANIFEST_DB_PATH,
     NEWS_LOG_PATH,
     NEWS_PID_PATH,
 )
 
-from .news_fetcher import fetch_google_news, 대표문장_추출, stable_id
-from .vectorstore import get_vectorstore, add_news_documents_to_vectorstore
+from .news_fetcher import fetch_feeds, google_news_rss_url, 대표문장_추출, stable_id
+from .vectorstore import get_news_vectorstore, add_news_documents_to_vectorstore, _embed_stats, published_ts
+from .embeddings import stats_delta
+from .manifest_store import get_manifest_store
+from .near_dup import NearDupIndex, get_near_dup_index, simhash
+from .news_scheduler import KeywordScheduler, KeywordSource
+from .news_retention import run_news_maintenance
+
+_NEAR_DUP_SEEDED = False
 
 
 def _ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 
-def _load_manifest():
-    manifest_path = _abs_path(NEWS_MANIFEST_PATH)
-    if not os.path.exists(manifest_path):
-        return {"version": 1, "items": {}}
-    try:
-        with open(manifest_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "items" not in data:
-            data["items"] = {}
-        return data
-    except Exception:
-        return {"version": 1, "items": {}}
-
-
-def _save_manifest(data):
-    manifest_path = _abs_path(NEWS_MANIFEST_PATH)
-    _ensure_dir(os.path.dirname(manifest_path))
-    with open(manifest_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
-
-def _is_similar_already(vectorstore, sentence: str) -> bool:
+def _manifest_store():
+    return get_manifest_store(_abs_path(MANIFEST_DB_PATH))
+
+
+def _near_dup_index(vectorstore) -> NearDupIndex:
+    """어휘 근사 중복 색인. 프로세스에서 처음 열 때 비어 있으면 뉴스 컬렉션의 최근 문장으로 채움."""
+    global _NEAR_DUP_SEEDED
+    idx = get_near_dup_index(_abs_path(NEWS_NEAR_DUP_PATH))
+    if not _NEAR_DUP_SEEDED:
+        _NEAR_DUP_SEEDED = True
+        if not len(idx):
+            try:
+                # TTL 이내 문장만, 컬렉션 전체를 한 번에 올리지 않도록 페이지 단위로 읽음
+                cutoff = int(time.time() - NEWS_NEAR_DUP_TTL_DAYS * 86400)
+                n = 0
+                offset = 0
+                while True:
+                    got = vectorstore._collection.get(
+                        where={"published_ts": {"$gte": cutoff}},
+                        include=["documents", "metadatas"],
+                        limit=1000,
+                        offset=offset,
+                    )
+                    ids = got.get("ids") or []
+                    if not ids:
+                        break
+                    n += idx.add_many(
+                        ((meta or {}).get("uid") or cid, simhash(doc))
+                        for cid, doc, meta in zip(ids, got["documents"], got["metadatas"])
+                        if doc
+                    )
+                    offset += len(ids)
+                if n:
+                    _log(f"INFO near_dup seeded={n} from collection")
+            except Exception as e:
+                _log(f"WARN near_dup_seed_failed: {e}")
+    return idx
+
+
+def _pairwise_distances(x: np.ndarray, space: str) -> np.ndarray:
+    """Chroma와 같은 거리(l2=제곱 L2, cosine=1-cos, ip=1-내적) 행렬."""
+    if space == "cosine":
+        xn = x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+        return 1.0 - xn @ xn.T
+    if space == "ip":
+        return 1.0 - x @ x.T
+    sq = np.einsum("ij,ij->i", x, x)
+    return np.maximum(sq[:, None] + sq[None, :] - 2.0 * (x @ x.T), 0.0)
+
+
+def _dedup_batch(vectorstore, sentences: List[str]) -> Tuple[List[Optional[str]], List[List[float]]]:
     """
-    유사 뉴스 제외:
-    - Chroma에 similarity_search_with_score로 nearest 1개를 찾아
-    - distance가 임계값보다 작으면(더 유사) => 중복/유사로 간주하여 스킵
+    이번 tick의 후보 대표문장을 한 번에 유사 뉴스 판정.
+    - 임베딩 1회(embed_documents) → 저장소 최근접 1개를 벡터로 일괄 조회(_collection.query)
+    - 같은 tick 안의 후보끼리도 거리 행렬로 비교(앞에서 채택된 후보와 가까우면 제외)
+    반환: (후보별 제외 사유 None/"similar_store"/"similar_batch", 후보별 임베딩 — 그대로 저장에 재사용)
     """
+    if not sentences:
+        return [], []
+    started = time.perf_counter()
+    vectors = vectorstore.embeddings.embed_documents(sentences)
+    embed_ms = (time.perf_counter() - started) * 1000.0
+
+    col = vectorstore._collection
+    space = (col.metadata or {}).get("hnsw:space", "l2")
+    store_dist: List[Optional[float]] = [None] * len(sentences)
+    started = time.perf_counter()
     try:
-        results = vectorstore.similarity_search_with_score(sentence, k=1)
-        if not results:
-            return False
-        _, dist = results[0]
-        return dist is not None and dist < NEWS_DUP_DISTANCE_THRESHOLD
+        if col.count():
+            res = col.query(query_embeddings=vectors, n_results=1, include=["distances"])
+            store_dist = [ds[0] if ds else None for ds in res["distances"]]
     except Exception as e:
+        # 검색 자체가 실패하면 저장소 기준 중복 판단은 하지 않고 넣도록(보수적으로) 처리
         _log(f"WARN similarity_check_failed: {e}")
-        # 검색 자체가 실패하면 중복 판단을 하지 않고 넣도록(보수적으로) 처리
-        return False
-
-
-def run_once():
+    query_ms = (time.perf_counter() - started) * 1000.0
+
+    dist = _pairwise_distances(np.asarray(vectors, dtype=np.float32), space)
+    reasons: List[Optional[str]] = []
+    kept: List[int] = []
+    for i, d in enumerate(store_dist):
+        if d is not None and d < NEWS_DUP_DISTANCE_THRESHOLD:
+            reasons.append("similar_store")
+        elif kept and float(dist[i, kept].min()) < NEWS_DUP_DISTANCE_THRESHOLD:
+            reasons.append("similar_batch")
+        else:
+            reasons.append(None)
+            kept.append(i)
+
+    _log(
+        f"INFO dedup candidates={len(sentences)} similar_store={reasons.count('similar_store')} "
+        f"similar_batch={reasons.count('similar_batch')} kept={len(kept)} embed_ms={embed_ms:.0f} query_ms={query_ms:.0f}"
+    )
+    return reasons, vectors
+
+
+def run_once(keywords: Optional[List[str]] = None):
+    """
+    keywords(기본: NEWS_KEYWORDS)의 RSS를 한 번 가져와 새 뉴스만 임베딩.
+    반환의 "keywords"는 키워드별 {"added", "error", "status"}(스케줄러가 다음 폴링 주기를 정하는 데 사용)
+    """
     if not NEWS_ENABLED:
-        return {"added": 0, "skipped": 0, "errors": 0}
+        return {"added": 0, "skipped": 0, "errors": 0, "not_modified": 0, "near_dup": 0, "keywords": {}}
 
-    vs = get_vectorstore()
-    manifest = _load_manifest()
+    vs = get_news_vectorstore()
+    store = _manifest_store()
+    # 이번 tick에서 기록할 매니페스트 행(임베딩 추가가 끝난 뒤 한 트랜잭션으로 저장)
+    pending = {}
+    stats_before = _embed_stats(vs)
 
     added_docs = []
     added = 0
     skipped = 0
     errors = 0
-
-    for kw in (NEWS_KEYWORDS or []):
-        try:
-            entries = fetch_google_news(
-                keyword=kw,
-                hl=NEWS_RSS_HL,
-                gl=NEWS_RSS_GL,
-                ceid=NEWS_RSS_CEID,
-                max_items=NEWS_MAX_ITEMS_PER_KEYWORD,
-            )
-            _log(f"INFO fetched keyword='{kw}' items={len(entries)}")
-        except Exception as e:
-            _log(f"ERROR fetch keyword='{kw}': {e}")
-            
+    not_modified = 0
+
+    # 키워드별 RSS를 동시에 가져옴. 이전 폴링의 ETag/Last-Modified로 조건부 요청(변경 없으면 304)
+    keywords = list(NEWS_KEYWORDS or []) if keywords is None else list(keywords)
+    per_keyword = {kw: {"added": 0, "error": False, "status": None} for kw in keywords}
+    fetch_started = time.perf_counter()
+    results = fetch_feeds(
+        keywords,
+        hl=NEWS_RSS_HL,
+        gl=NEWS_RSS_GL,
+        ceid=NEWS_RSS_CEID,
+        max_items=NEWS_MAX_ITEMS_PER_KEYWORD,
+        validators=store.get_feed_validators(google_news_rss_url(kw, NEWS_RSS_HL, NEWS_RSS_GL, NEWS_RSS_CEID) for kw in keywords),
+    )
+    fetch_ms = (time.perf_counter() - fetch_started) * 1000.0
+    # 검증값은 이번 tick의 기사 처리가 끝난 뒤에 저장(중간에 죽으면 다음 tick에 다시 받음)
+    validators = {}
+    # (uid, keyword, entry, 대표문장) — 유사 뉴스 판정은 모든 키워드를 모은 뒤 한 번에
+    candidates = []
+    seen = set()
+    # 보존 기간보다 오래된 기사는 넣자마자 정리 대상이므로 임베딩하지 않음
+    max_age_cutoff = time.time() - NEWS_RETENTION_MAX_AGE_DAYS * 86400 if NEWS_RETENTION_MAX_AGE_DAYS > 0 else None
+
+    for res in results:
+        kw = res["keyword"]
+        if res.get("error"):
+            _log(f"ERROR fetch keyword='{kw}' ms={res['ms']:.0f}: {res['error']}")
             errors += 1
+            per_keyword[kw]["error"] = True
             continue
+        per_keyword[kw]["status"] = res["status"]
+        entries = res["items"]
+        _log(f"INFO fetched keyword='{kw}' status={res['status']} items={len(entries)} bytes={res['bytes']} ms={res['ms']:.0f}")
+        if res["status"] == 304:
+            not_modified += 1
+        if res.get("etag") or res.get("last_modified"):
+            validators[res["url"]] = res
 
         for e in entries:
-            title = e.get("title", "")
-            link = e.get("link", "")
-            published = e.get("published", "")
-            uid = stable_id(title, link )
-            if uid in manifest["items"]:
+            uid = stable_id(e.get("title", ""), e.get("link", ""))
+            if uid in seen:
+                skipped += 1
+                continue
+            seen.add(uid)
+            if max_age_cutoff is not None and published_ts(e.get("published", "")) < max_age_cutoff:
                 skipped += 1
                 continue
-
             sentence = 대표문장_추출(e.get("title",""), e.get("summary",""))
             if not sentence:
                 skipped += 1
                 continue
-
-            # semantic dedup (유사 기사 제외)
-            if _is_similar_already(vs, sentence):
-                manifest["items"][uid] = {
-                    "status": "skipped_similar",
-                    "keyword": kw,
-                    "title": e.get("title",""),
-                    "link": e.get("link",""),
-                    "published": e.get("published",""),
-                    "seen_at": datetime.now().isoformat(timespec="seconds"),
-                }
-                skipped += 1
+            candidates.append((uid, kw, e, sentence))
+
+    # 매니페스트에 이미 있는 기사는 한 번의 조회로 제외
+    known = store.existing_news_uids(c[0] for c in candidates)
+    skipped += sum(1 for c in candidates if c[0] in known)
+    candidates = [c for c in candidates if c[0] not in known]
+
+    # 어휘 근사 중복(SimHash): 최근 뉴스/같은 tick 후보의 복제본은 임베딩 전에 제외
+    near_dup = 0
+    signatures = {}
+    if NEWS_NEAR_DUP_ENABLED and candidates:
+        near_idx = _near_dup_index(vs)
+        near_idx.prune()
+        tick_idx = NearDupIndex(None, max_hamming=near_idx.max_hamming)
+        hits = {"index": 0, "tick": 0}
+        kept = []
+        started = time.perf_counter()
+        for uid, kw, e, sentence in candidates:
+            sig = simhash(sentence)
+            where = "index" if near_idx.find(sig) else ("tick" if tick_idx.find(sig) else None)
+            if where is None:
+                tick_idx.add_many([(uid, sig)])
+                signatures[uid] = sig
+                kept.append((uid, kw, e, sentence))
                 continue
-
-            # 대표문장.txt 기록
-            line = f"[{datetime.now().isoformat(timespec='seconds')}] ({kw}) {sentence} | {e.get('link','')}"
-
-
-            doc = Document(
-                page_content=sentence,
-                metadata={
-                    "type": "news",
-                    "source": "google_news_rss",
-                    "keyword": kw,
-                    "title": title,
-                    "url": link,
-                    "published": published,
-                    "uid": uid,
-                },
-            )
-            added_docs.append(doc)  
-            
-            manifest["items"][uid] = {
-                "status": "added",
+            hits[where] += 1
+            pending[uid] = {
+                "status": "skipped_near_dup",
+                "keyword": kw,
+                "title": e.get("title", ""),
+                "link": e.get("link", ""),
+                "published": e.get("published", ""),
+                "seen_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        near_dup = hits["index"] + hits["tick"]
+        skipped += near_dup
+        _log(
+            f"INFO near_dup candidates={len(candidates)} hits={near_dup} (index={hits['index']} tick={hits['tick']}) "
+            f"hit_rate={near_dup / len(candidates):.0%} embeds_saved={near_dup} "
+            f"us_per_item={(time.perf_counter() - started) * 1e6 / len(candidates):.0f} index_size={len(near_idx)}"
+        )
+        candidates = kept
+
+    # semantic dedup (유사 기사 제외): 저장소 + 같은 tick 후보끼리, 임베딩은 저장에 재사용
+    reasons, vectors = _dedup_batch(vs, [c[3] for c in candidates])
+    added_vectors = []
+    for (uid, kw, e, sentence), reason, vec in zip(candidates, reasons, vectors):
+        title = e.get("title", "")
+        link = e.get("link", "")
+        published = e.get("published", "")
+        if reason:
+            pending[uid] = {
+                "status": "skipped_similar",
                 "keyword": kw,
-                "title": e.get("title",""),
-                "link": e.get("link",""),
-                "published": e.get("published",""),
-                "ingested_at": datetime.now().isoformat(timespec="seconds"),
+                "title": title,
+                "link": link,
+                "published": published,
+                "seen_at": datetime.now().isoformat(timespec="seconds"),
             }
+            skipped += 1
+            continue
+
+        doc = Document(
+            page_content=sentence,
+            metadata={
+                "type": "news",
+                "source": "google_news_rss",
+                "keyword": kw,
+                "title": title,
+                "url": link,
+                "published": published,
+                "uid": uid,
+            },
+        )
+        added_docs.append(doc)
+        added_vectors.append(vec)
+        per_keyword[kw]["added"] += 1
+
+        pending[uid] = {
+            "status": "added",
+            "keyword": kw,
+            "title": title,
+            "link": link,
+            "published": published,
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+        }
 
     # ✅ 신규 뉴스가 있을 때만 임베딩 추가
     if added_docs:
-        n = add_news_documents_to_vectorstore(added_docs, vs=vs)
+        n = add_news_documents_to_vectorstore(added_docs, vs=vs, embeddings=added_vectors)
         added += n
 
-    _save_manifest(manifest)
-
-    return {"added": added, "skipped": skipped, "errors": errors}
+    store.put_news_many(pending)
+    store.put_feed_validators(validators)
+    # 근사 중복 색인에는 tick이 끝까지 처리된 뒤에만 넣음(중간에 죽으면 다음 tick에 같은 기사를 다시 판단)
+    if signatures:
+        _near_dup_index(vs).add_many(signatures.items())
+
+    slowest = max((r for r in results if "ms" in r), key=lambda r: r["ms"], default=None)
+    _log(
+        f"INFO fetch keywords={len(keywords)} not_modified={not_modified} errors={errors} wall_ms={fetch_ms:.0f} "
+        f"sum_ms={sum(r.get('ms', 0.0) for r in results):.0f}"
+        + (f" slowest='{slowest['keyword']}' ({slowest['ms']:.0f}ms)" if slowest else "")
+    )
+
+    embed = stats_delta(stats_before, _embed_stats(vs))
+    if embed.get("chunks"):
+        _log(f"INFO embed chunks={embed['chunks']} batches={embed['batches']} retries={embed['retries']} chunks_per_sec={embed['chunks_per_sec']}")
+
+    return {
+        "added": added,
+        "skipped": skipped,
+        "errors": errors,
+        "not_modified": not_modified,
+        "near_dup": near_dup,
+        "keywords": per_keyword,
+    }
 
 
 def _pid_alive(pid: int) -> bool:
@@ -242,6 +408,19 @@ def ensure_daemon_started():
     return True
 
 
+def maybe_run_maintenance(force: bool = False):
+    """NEWS_MAINTENANCE_INTERVAL_SEC마다 보존 정책/압축 실행(마지막 실행 시각은 매니페스트에 저장, 재시작 후에도 유지)."""
+    store = _manifest_store()
+    last = float(store.get_meta("news_maintenance_at") or 0)
+    if not force and time.time() - last < NEWS_MAINTENANCE_INTERVAL_SEC:
+        return None
+    try:
+        return run_news_maintenance(get_news_vectorstore(), store, log=_log)
+    finally:
+        # 실패해도 다음 주기까지 재시도하지 않음(매 tick마다 같은 오류를 반복하지 않도록)
+        store.set_meta("news_maintenance_at", str(time.time()))
+
+
 def run_loop():
     text_dir = _abs_path(NEWS_TEXT_DIR)
     log_path = _abs_path(NEWS_LOG_PATH)
@@ -251,7 +430,13 @@ def run_loop():
     _ensure_dir(os.path.dirname(log_path))
     _ensure_dir(os.path.dirname(pid_path))
 
-    _log(f"INFO daemon loop started pid={os.getpid()} interval={NEWS_POLL_INTERVAL_SEC}s keywords={len(NEWS_KEYWORDS or [])}")
+    # 키워드별 적응형 스케줄: 예정 시각이 된 키워드만 폴링, NEWS_KEYWORDS 변경은 재시작 없이 반영
+    source = KeywordSource(log=_log)
+    scheduler = KeywordScheduler(_manifest_store(), log=_log)
+    _log(
+        f"INFO daemon loop started pid={os.getpid()} interval={NEWS_POLL_INTERVAL_SEC}s "
+        f"keywords={len(source.keywords())} max_per_tick={scheduler.max_per_tick}"
+    )
 
     # pid 기록(직접 실행 시)
     try:
@@ -262,33 +447,53 @@ def run_loop():
 
     tick = 0
     while True:
+        try:
+            maybe_run_maintenance()
+        except Exception as e:
+            _log(f"[NEWS_DAEMON] maintenance ERROR: {e}")
+
+        try:
+            scheduler.sync(source.keywords())
+            due = scheduler.due()
+        except Exception as e:
+            _log(f"[NEWS_DAEMON] schedule ERROR: {e}")
+            due = []
+
+        if not due:
+            time.sleep(scheduler.sleep_for())
+            continue
+
         tick += 1
         started_at = datetime.now()
         try:
-            res = run_once()
+            res = run_once(due)
+            scheduler.record(res.get("keywords") or {})
 
             # 로그 파일 기록(기존 유지)
             with open(log_path, "a", encoding="utf-8") as f:
                 f.write(f"[{datetime.now().isoformat(timespec='seconds')}] run_once: {res}\n")
 
             # ✅ 주기적으로 동작하고 있음을 stdout에도 출력(백그라운드 실행 시 로그로 리다이렉트됨)
-            next_in = max(30, int(NEWS_POLL_INTERVAL_SEC))
             msg = (
-                f"[NEWS_DAEMON] tick={tick} at={started_at.isoformat(timespec='seconds')} "
+                f"[NEWS_DAEMON] tick={tick} at={started_at.isoformat(timespec='seconds')} polled={len(due)} "
                 f"added={res.get('added')} skipped={res.get('skipped')} errors={res.get('errors')} "
-                f"next_in={next_in}s"
+                f"not_modified={res.get('not_modified')} near_dup={res.get('near_dup')} "
+                f"next_due_in={scheduler.next_due_in():.0f}s"
             )
             print(msg, flush=True)
             _log(msg)
 
         except Exception as e:
+            # tick 전체가 실패하면 이번에 폴링한 키워드 모두 백오프(고장 난 상태로 계속 두드리지 않도록)
+            scheduler.record({kw: {"error": True} for kw in due})
             err_msg = f"[NEWS_DAEMON] tick={tick} ERROR: {e}"
             with open(log_path, "a", encoding="utf-8") as f:
                 f.write(f"[{datetime.now().isoformat(timespec='seconds')}] ERROR: {e}\n")
             print(err_msg, flush=True)
             _log(err_msg)
 
-        time.sleep(max(30, int(NEWS_POLL_INTERVAL_SEC)))
+        # 일한 tick 뒤에는 최소 간격을 둠(밀린 키워드는 다음 tick에서 이어서)
+        time.sleep(NEWS_SCHEDULE_MIN_SLEEP_SEC)
 
 
 if __name__ == "__main__":
@@ -1,26 +1,58 @@
 import re
 import time
 import hashlib
+import threading
 import requests
 import feedparser
-from urllib.parse import quote_plus
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import quote_plus, urlsplit
+from typing import List, Dict, Any, Optional, Sequence
 
+from .config import (
+    NEWS_RSS_BASE_URL,
+    NEWS_FETCH_CONCURRENCY,
+    NEWS_FETCH_PER_HOST,
+    NEWS_FETCH_CONNECT_TIMEOUT_SEC,
+    NEWS_FETCH_READ_TIMEOUT_SEC,
+)
 
-def google_news_rss_url(query: str, hl: str, gl: str, ceid: str) -> str:
-    q = quote_plus(query)
-    return f"https://news.google.com/rss/search?q={q}&hl={hl}&gl={gl}&ceid={ceid}"
-
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_host_sems: Dict[str, threading.BoundedSemaphore] = {}
 
-def fetch_google_news(keyword: str, hl: str, gl: str, ceid: str, max_items: int = 20) -> List[Dict[str, Any]]:
-    url = google_news_rss_url(keyword, hl, gl, ceid)
-    # Google RSS는 가끔 느릴 수 있어 timeout 지정
-    r = requests.get(url, timeout=20)
-    r.raise_for_status()
-    
-    print(f"Fetched RSS for keyword='{keyword}' with status {r.status_code}")
 
-    feed = feedparser.parse(r.text)
+def google_news_rss_url(query: str, hl: str, gl: str, ceid: str, base_url: str = NEWS_RSS_BASE_URL) -> str:
+    q = quote_plus(query)
+    return f"{base_url}?q={q}&hl={hl}&gl={gl}&ceid={ceid}"
+
+
+def get_http_session() -> requests.Session:
+    """프로세스 전체에서 공유하는 keep-alive 세션(tick마다 새 연결/TLS 핸드셰이크를 하지 않음)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(NEWS_FETCH_CONCURRENCY, NEWS_FETCH_PER_HOST))
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["User-Agent"] = "trag-news/1.0"
+            _session = s
+        return _session
+
+
+def _host_sem(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _session_lock:
+        sem = _host_sems.get(host)
+        if sem is None:
+            sem = _host_sems[host] = threading.BoundedSemaphore(max(1, NEWS_FETCH_PER_HOST))
+        return sem
+
+
+def parse_feed(data: Any, keyword: str, max_items: int = 20) -> List[Dict[str, Any]]:
+    # bytes를 그대로 넘겨야 feedparser가 XML 선언의 인코딩을 따름
+    feed = feedparser.parse(data)
     items = []
     for e in feed.entries[:max_items]:
         title = getattr(e, "title", "").strip()
@@ -38,6 +70,86 @@ def fetch_google_news(keyword: str, hl: str, gl: str, ceid: str, max_items: int
     return items
 
 
+def fetch_feed(url: str, keyword: str, max_items: int = 20, validators: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    RSS 1개를 조건부 GET으로 가져옴.
+    반환: {"keyword", "url", "status"(200/304), "items", "etag", "last_modified", "ms", "bytes"}
+    304(변경 없음)면 items는 빈 리스트이고 검증값은 이전 값을 유지합니다. 실패 시 예외.
+    """
+    validators = validators or {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    started = time.perf_counter()
+    with _host_sem(url):
+        # Google RSS는 가끔 느릴 수 있어 timeout 지정
+        r = get_http_session().get(
+            url,
+            headers=headers,
+            timeout=(NEWS_FETCH_CONNECT_TIMEOUT_SEC, NEWS_FETCH_READ_TIMEOUT_SEC),
+        )
+        # 304도 본문을 끝까지 읽어야 연결이 풀로 돌아감(keep-alive 재사용)
+        body = r.content
+    r.raise_for_status()
+
+    result = {
+        "keyword": keyword,
+        "url": url,
+        "status": r.status_code,
+        "items": [],
+        "etag": r.headers.get("ETag") or validators.get("etag"),
+        "last_modified": r.headers.get("Last-Modified") or validators.get("last_modified"),
+        "bytes": len(body),
+    }
+    if r.status_code != 304:
+        result["items"] = parse_feed(body, keyword, max_items)
+    result["ms"] = (time.perf_counter() - started) * 1000.0
+    return result
+
+
+def fetch_feeds(
+    keywords: Sequence[str],
+    hl: str,
+    gl: str,
+    ceid: str,
+    max_items: int = 20,
+    validators: Optional[Dict[str, Dict[str, Any]]] = None,
+    concurrency: int = NEWS_FETCH_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    키워드별 RSS를 스레드 풀로 동시에 가져옴(느린 피드 하나가 tick 전체를 막지 않음).
+    validators: url → {"etag", "last_modified"} (이전 폴링 결과, 있으면 조건부 요청)
+    반환은 keywords 순서의 fetch_feed 결과이며, 실패한 키워드는 {"keyword", "url", "error", "ms"}.
+    """
+    validators = validators or {}
+
+    def _one(kw: str) -> Dict[str, Any]:
+        url = urls[kw]
+        started = time.perf_counter()
+        try:
+            return fetch_feed(url, kw, max_items, validators.get(url))
+        except Exception as e:
+            return {"keyword": kw, "url": url, "error": str(e), "ms": (time.perf_counter() - started) * 1000.0}
+
+    keywords = list(keywords or [])
+    if not keywords:
+        return []
+    urls = {kw: google_news_rss_url(kw, hl, gl, ceid) for kw in keywords}
+    # 워커가 호스트 제한보다 많으면 세마포어를 먼저 잡는 스레드가 계속 이겨 일부 키워드가 굶으므로
+    # 워커 수를 (호스트 수 × 호스트당 제한) 이하로 맞춰 키워드 순서대로 처리
+    hosts = len({urlsplit(u).netloc for u in urls.values()})
+    workers = max(1, min(concurrency, len(keywords), hosts * max(1, NEWS_FETCH_PER_HOST)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trag-rss") as pool:
+        return list(pool.map(_one, keywords))
+
+
+def fetch_google_news(keyword: str, hl: str, gl: str, ceid: str, max_items: int = 20) -> List[Dict[str, Any]]:
+    return fetch_feed(google_news_rss_url(keyword, hl, gl, ceid), keyword, max_items)["items"]
+
+
 def _strip_html(text: str) -> str:
     text = re.sub(r"<[^>]+>", " ", text or "")
     text = re.sub(r"\s+", " ", text).strip()
@@ -0,0 +1,108 @@
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import (
+    NEWS_RETENTION_MAX_AGE_DAYS,
+    NEWS_RETENTION_MAX_PER_KEYWORD,
+    NEWS_RETENTION_KEYWORD_CAPS,
+    NEWS_RETENTION_DELETE_BATCH,
+    NEWS_MANIFEST_SKIPPED_TTL_DAYS,
+    NEWS_MANIFEST_TOMBSTONE_DAYS,
+)
+from .manifest_store import ManifestStore
+from .vectorstore import _delete_chunks, _lexical_index_for, _persist
+
+# 매니페스트에서 이 비율 이상 행을 지웠을 때만 VACUUM(평소엔 PRAGMA optimize만)
+_VACUUM_MIN_RATIO = 0.2
+
+
+def keyword_cap(keyword: str) -> int:
+    return int(NEWS_RETENTION_KEYWORD_CAPS.get(keyword, NEWS_RETENTION_MAX_PER_KEYWORD) or 0)
+
+
+def select_expired(metas: Dict[str, Dict[str, Any]], now: Optional[float] = None) -> Dict[str, str]:
+    """
+    보존 정책에 걸리는 청크 id → 사유("age"/"cap").
+    - published_ts가 NEWS_RETENTION_MAX_AGE_DAYS보다 오래됨
+    - 키워드별 최신순으로 상한(keyword_cap)을 넘는 나머지
+    """
+    now = time.time() if now is None else now
+    expired: Dict[str, str] = {}
+    if NEWS_RETENTION_MAX_AGE_DAYS > 0:
+        cutoff = now - NEWS_RETENTION_MAX_AGE_DAYS * 86400
+        for cid, meta in metas.items():
+            if (meta.get("published_ts") or now) < cutoff:
+                expired[cid] = "age"
+
+    by_keyword: Dict[str, List[str]] = {}
+    for cid, meta in metas.items():
+        if cid not in expired:
+            by_keyword.setdefault(meta.get("keyword") or "", []).append(cid)
+    for kw, ids in by_keyword.items():
+        cap = keyword_cap(kw)
+        if cap <= 0 or len(ids) <= cap:
+            continue
+        ids.sort(key=lambda c: metas[c].get("published_ts") or 0, reverse=True)
+        for cid in ids[cap:]:
+            expired[cid] = "cap"
+    return expired
+
+
+def _scan_metadatas(vs, page_size: int = 5000) -> Dict[str, Dict[str, Any]]:
+    metas: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    while True:
+        got = vs._collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        ids = got.get("ids") or []
+        if not ids:
+            return metas
+        for cid, meta in zip(ids, got["metadatas"]):
+            metas[cid] = meta or {}
+        offset += len(ids)
+
+
+def run_news_maintenance(vs, store: ManifestStore, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    뉴스 보존 정책 적용 + 압축.
+    1) 나이/키워드 상한을 넘는 뉴스 벡터를 배치로 삭제(어휘/dense 색인도 _delete_chunks가 같이 정리)
+    2) 지운 기사는 매니페스트에 묘비(expired)로 남기고, 오래된 건너뜀 기록/묘비는 삭제
+    3) 어휘 색인 로그 압축, 매니페스트 PRAGMA optimize(많이 지웠으면 VACUUM)
+    반환: 회수한 양(삭제 청크 수, 매니페스트 행 수, 바이트 등)
+    """
+    started = time.perf_counter()
+    metas = _scan_metadatas(vs)
+    expired = select_expired(metas)
+    ids = list(expired)
+
+    batches = 0
+    for i in range(0, len(ids), NEWS_RETENTION_DELETE_BATCH):
+        _delete_chunks(vs, ids=ids[i:i + NEWS_RETENTION_DELETE_BATCH])
+        batches += 1
+    if ids:
+        _persist(vs)
+
+    tombstoned = store.expire_news(metas[c].get("uid") for c in ids if metas[c].get("uid"))
+    now = datetime.now()
+    rows_before = store.count_news()
+    removed = store.compact_news(
+        skipped_before=(now - timedelta(days=NEWS_MANIFEST_SKIPPED_TTL_DAYS)).isoformat(timespec="seconds"),
+        expired_before=(now - timedelta(days=NEWS_MANIFEST_TOMBSTONE_DAYS)).isoformat(timespec="seconds"),
+    )
+    lexical_rows = _lexical_index_for(vs).compact() if ids else 0
+    db = store.optimize(vacuum=bool(rows_before) and removed / rows_before >= _VACUUM_MIN_RATIO)
+
+    report = {
+        "scanned": len(metas),
+        "deleted": len(ids),
+        "deleted_age": sum(1 for r in expired.values() if r == "age"),
+        "deleted_cap": sum(1 for r in expired.values() if r == "cap"),
+        "delete_batches": batches,
+        "tombstoned": tombstoned,
+        "manifest_rows_removed": removed,
+        "lexical_log_rows_removed": lexical_rows,
+        "manifest_bytes_reclaimed": max(0, db["bytes_before"] - db["bytes_after"]),
+        "ms": round((time.perf_counter() - started) * 1000.0),
+    }
+    log("INFO maintenance " + " ".join(f"{k}={v}" for k, v in report.items()))
+    return report
@@ -0,0 +1,149 @@
+import os
+import time
+import random
+import importlib
+from typing import Any, Callable, Dict, List, Optional
+
+from . import config
+from .config import (
+    NEWS_POLL_INTERVAL_SEC,
+    NEWS_SCHEDULE_MIN_INTERVAL_SEC,
+    NEWS_SCHEDULE_MAX_INTERVAL_SEC,
+    NEWS_SCHEDULE_HIGH_YIELD,
+    NEWS_SCHEDULE_SPEEDUP,
+    NEWS_SCHEDULE_SLOWDOWN,
+    NEWS_SCHEDULE_JITTER,
+    NEWS_SCHEDULE_BACKOFF_BASE_SEC,
+    NEWS_SCHEDULE_BACKOFF_MAX_SEC,
+    NEWS_SCHEDULE_MAX_PER_TICK,
+    NEWS_SCHEDULE_MIN_SLEEP_SEC,
+)
+from .manifest_store import ManifestStore
+
+
+class KeywordSource:
+    """
+    NEWS_KEYWORDS를 재시작 없이 다시 읽음.
+    config.py의 수정 시각이 바뀌면 모듈을 다시 로드하고, 로드에 실패하면(편집 중 문법 오류 등) 이전 목록을 유지합니다.
+    """
+
+    def __init__(self, log: Callable[[str], None] = print):
+        self._log = log
+        self._path = config.__file__
+        self._mtime = self._stat()
+        self._keywords = list(config.NEWS_KEYWORDS or [])
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._path)
+        except OSError:
+            return None
+
+    def keywords(self) -> List[str]:
+        mtime = self._stat()
+        if mtime is not None and mtime != self._mtime:
+            self._mtime = mtime
+            try:
+                fresh = list(importlib.reload(config).NEWS_KEYWORDS or [])
+            except Exception as e:
+                self._log(f"WARN keyword reload failed (keeping {len(self._keywords)} keywords): {e}")
+            else:
+                if fresh != self._keywords:
+                    added = [k for k in fresh if k not in self._keywords]
+                    removed = [k for k in self._keywords if k not in fresh]
+                    self._log(f"INFO keywords reloaded total={len(fresh)} added={added} removed={removed}")
+                self._keywords = fresh
+        return list(self._keywords)
+
+
+class KeywordScheduler:
+    """
+    뉴스 키워드별 적응형 폴링 스케줄.
+    - 키워드마다 주기/다음 예정 시각을 유지(매니페스트 SQLite에 저장, 재시작 후에도 이어짐)
+    - 새 기사가 NEWS_SCHEDULE_HIGH_YIELD 이상이면 주기 단축, 0건(304 포함)이면 연장, 그 사이는 유지
+    - 실패하면 주기는 그대로 두고 지수 백오프(+지터) 후 재시도
+    - due()는 예정 시각이 지난 키워드를 오래 밀린 순으로 tick당 최대 max_per_tick개만 반환
+    """
+
+    def __init__(self, store: ManifestStore, log: Callable[[str], None] = print, max_per_tick: int = NEWS_SCHEDULE_MAX_PER_TICK):
+        self.store = store
+        self.max_per_tick = max(1, int(max_per_tick))
+        self._log = log
+        self._state: Dict[str, Dict[str, Any]] = store.get_news_schedule()
+
+    @staticmethod
+    def _jitter(sec: float) -> float:
+        return sec * random.uniform(1.0 - NEWS_SCHEDULE_JITTER, 1.0 + NEWS_SCHEDULE_JITTER)
+
+    def sync(self, keywords: List[str], now: Optional[float] = None) -> None:
+        """설정의 키워드 목록에 맞춤(새 키워드는 바로 폴링, 빠진 키워드는 스케줄 삭제)."""
+        now = time.time() if now is None else now
+        new = {}
+        for kw in keywords:
+            if kw not in self._state:
+                new[kw] = self._state[kw] = {
+                    "interval_sec": float(NEWS_POLL_INTERVAL_SEC),
+                    "next_due": now,
+                    "failures": 0,
+                    "last_added": None,
+                    "last_polled": None,
+                }
+        wanted = set(keywords)
+        removed = [kw for kw in self._state if kw not in wanted]
+        for kw in removed:
+            del self._state[kw]
+        self.store.put_news_schedule(new, removed=removed)
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        ready = sorted((s["next_due"], kw) for kw, s in self._state.items() if s["next_due"] <= now)
+        return [kw for _, kw in ready[: self.max_per_tick]]
+
+    def record(self, results: Dict[str, Dict[str, Any]], now: Optional[float] = None) -> None:
+        """results: keyword → {"added": 새로 추가된 기사 수, "error": 실패 여부}."""
+        now = time.time() if now is None else now
+        changed = {}
+        for kw, r in results.items():
+            s = self._state.get(kw)
+            if s is None:
+                continue
+            s["last_polled"] = now
+            if r.get("error"):
+                s["failures"] += 1
+                backoff = min(NEWS_SCHEDULE_BACKOFF_MAX_SEC, NEWS_SCHEDULE_BACKOFF_BASE_SEC * 2 ** (s["failures"] - 1))
+                # equal jitter: 같은 시각에 실패한 키워드들이 동시에 재시도하지 않도록
+                wait = backoff / 2 + random.uniform(0, backoff / 2)
+                s["next_due"] = now + wait
+                self._log(f"WARN schedule keyword='{kw}' failures={s['failures']} retry_in={wait:.0f}s")
+            else:
+                added = int(r.get("added") or 0)
+                before = s["interval_sec"]
+                if added >= NEWS_SCHEDULE_HIGH_YIELD:
+                    s["interval_sec"] = max(NEWS_SCHEDULE_MIN_INTERVAL_SEC, before * NEWS_SCHEDULE_SPEEDUP)
+                elif added == 0:
+                    s["interval_sec"] = min(NEWS_SCHEDULE_MAX_INTERVAL_SEC, before * NEWS_SCHEDULE_SLOWDOWN)
+                s["failures"] = 0
+                s["last_added"] = added
+                s["next_due"] = now + self._jitter(s["interval_sec"])
+                if s["interval_sec"] != before:
+                    self._log(f"INFO schedule keyword='{kw}' added={added} interval={before:.0f}->{s['interval_sec']:.0f}s")
+            changed[kw] = s
+        self.store.put_news_schedule(changed)
+
+    def sleep_for(self, now: Optional[float] = None) -> float:
+        """
+        다음 확인까지 대기 시간: 가장 가까운 예정 시각까지, 단 NEWS_SCHEDULE_MIN_SLEEP_SEC 이하
+        (키워드 설정 변경을 늦어도 이 간격 안에 반영).
+        """
+        now = time.time() if now is None else now
+        if not self._state:
+            return float(NEWS_SCHEDULE_MIN_SLEEP_SEC)
+        nearest = min(s["next_due"] for s in self._state.values())
+        return min(float(NEWS_SCHEDULE_MIN_SLEEP_SEC), max(1.0, nearest - now))
+
+    def next_due_in(self, now: Optional[float] = None) -> float:
+        """가장 가까운 키워드 예정 시각까지 남은 초(로그용)."""
+        now = time.time() if now is None else now
+        if not self._state:
+            return 0.0
+        return max(0.0, min(s["next_due"] for s in self._state.values()) - now)
@@ -33,4 +33,20 @@ def build_qa_prompt():
             MessagesPlaceholder("history"),
             ("human", "{input}"),
         ]
-    )
\ No newline at end of file
+    )
+
+def build_summary_prompt():
+    summary_system_prompt = (
+        "Progressively summarize the conversation between a user and an assistant. "
+        "Merge the previous summary and the new lines into one concise summary "
+        "that keeps the topics, facts, names, numbers and user requests "
+        "needed to continue the conversation. Return only the summary.\n"
+        "요약은 한국어로 작성해줘."
+    )
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", summary_system_prompt),
+            ("human", "이전 요약:\n{summary}\n\n새 대화:\n{conversation}"),
+        ]
+    )
@@ -0,0 +1,167 @@
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_ollama import ChatOllama
+
+from .config import (
+    OLLAMA_BASE_URL,
+    REWRITE_HISTORY_MESSAGES,
+    REWRITE_MAX_TOKENS,
+    REWRITE_CACHE_SIZE,
+    REWRITE_SHORT_QUESTION_CHARS,
+    REWRITE_ANCHOR_MIN_IDF,
+)
+from .lexical_index import LexicalIndex, tokenize
+from .prompts import build_contextualize_prompt
+
+# 앞 대화를 가리키는 말(지시어/접속어). 단독 단어로 쓰일 때만 인정
+_REF_WORDS = (
+    "그럼", "그러면", "그렇다면", "그리고", "그런데", "그래서", "또", "또한",
+    "그", "이", "해당", "상기", "방금", "아까", "그중", "나머지",
+)
+# 조사가 바로 붙어도 인정하는 지시 대명사(그것은, 거기서, 위의, 앞에서 ...)
+_REF_STEMS = (
+    "그것", "이것", "저것", "그거", "이거", "저거", "그건", "이건", "저건", "그게", "이게", "저게",
+    "거기", "여기", "그곳", "그때", "위", "앞",
+)
+_REF_RE = re.compile(
+    r"(?:^|[\s,(])(?:"
+    + "|".join(_REF_WORDS)
+    + r")(?=[\s,?.!]|$)"
+    + r"|(?:^|[\s,(])(?:"
+    + "|".join(_REF_STEMS)
+    + r")(?=[\s,?.!]|$|[은는이가을를도의에서로와과만])"
+    + r"|\b(?:it|its|that|this|these|those|they|them|their|above|previous|former|latter|same)\b"
+    + r"|^(?:and|also|what about|how about)\b"
+)
+
+
+def needs_rewrite(question: str, history: List[Any], lexical: Optional[LexicalIndex] = None) -> Tuple[bool, str]:
+    """
+    LLM 재작성이 필요한지 (필요 여부, 이유).
+    - 이력이 없으면 재작성 불필요
+    - 지시어/접속어(그럼, 그 조항, 이것은, it ...)가 있으면 재작성
+    - 어휘 색인에서 idf가 높은(구체적인) 용어가 없거나, 짧은 질문에 구체 용어가 1개뿐이면 재작성
+    - 그 외에는 질문만으로 검색 가능하다고 보고 원문 사용
+    """
+    if not history:
+        return False, "no_history"
+    q = unicodedata.normalize("NFKC", question or "").strip().lower()
+    if _REF_RE.search(q):
+        return True, "reference"
+    short = len(re.sub(r"\s+", "", q)) < REWRITE_SHORT_QUESTION_CHARS
+    if lexical is None:
+        return (True, "short") if short else (False, "self_contained")
+    anchors = [t for t, v in lexical.idf(tokenize(q)).items() if v >= REWRITE_ANCHOR_MIN_IDF]
+    if not anchors:
+        return True, "no_anchor"
+    if short and len(anchors) < 2:
+        return True, "short"
+    return False, "self_contained"
+
+
+def _history_key(history: List[Any]) -> str:
+    h = hashlib.sha256()
+    for m in history:
+        h.update(getattr(m, "type", "").encode("utf-8"))
+        h.update(b"\x00")
+        h.update(str(getattr(m, "content", m)).encode("utf-8"))
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+def _clean(output: str, question: str) -> str:
+    """모델이 덧붙인 머리말/따옴표를 걷어내고 첫 줄만 사용(이상하면 원문 유지)."""
+    lines = [ln.strip() for ln in (output or "").splitlines() if ln.strip()]
+    if not lines:
+        return question
+    line = re.sub(r"^(standalone question|question|질문)\s*[:：]\s*", "", lines[0], flags=re.IGNORECASE)
+    line = line.strip().strip("\"'“”‘’`").strip()
+    if not line or len(line) > max(200, len(question) * 4):
+        return question
+    return line
+
+
+class QueryRewriter:
+    """
+    후속 질문을 검색용 독립 질문으로 재작성(history-aware retrieval).
+    - needs_rewrite()로 대부분의 턴은 LLM 호출 없이 원문 사용
+    - 재작성 결과는 (이력 해시, 질문) 기준 LRU에 캐시
+    - 턴마다 추가 지연(ms)과 경로(skip/cache/llm)를 [REWRITE] 로그와 반환값으로 보고
+    """
+
+    def __init__(self, model: str, lexical: Optional[LexicalIndex] = None, cache_size: int = REWRITE_CACHE_SIZE):
+        self.model = model
+        self.lexical = lexical
+        self.cache_size = max(0, int(cache_size))
+        self._chain = (
+            build_contextualize_prompt()
+            | ChatOllama(model=model, base_url=OLLAMA_BASE_URL, temperature=0, num_predict=REWRITE_MAX_TOKENS)
+            | StrOutputParser()
+        )
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._stats = {"turns": 0, "skipped": 0, "cache_hits": 0, "rewritten": 0, "failed": 0, "llm_ms": 0.0}
+
+    def rewrite(self, question: str, history: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """{"query": 검색에 쓸 질문, "rewritten": bool, "reason": str, "cached": bool, "ms": 추가 지연}."""
+        started = time.perf_counter()
+        history = list(history or [])[-REWRITE_HISTORY_MESSAGES:] if REWRITE_HISTORY_MESSAGES > 0 else []
+        rewrite, reason = needs_rewrite(question, history, self.lexical)
+        result = {"query": question, "rewritten": False, "reason": reason, "cached": False}
+
+        if rewrite:
+            key = (_history_key(history), question)
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is not None:
+                result.update(query=cached, rewritten=cached != question, cached=True)
+            else:
+                llm_started = time.perf_counter()
+                try:
+                    out = _clean(self._chain.invoke({"input": question, "history": history}), question)
+                    result.update(query=out, rewritten=out != question)
+                    if self.cache_size:
+                        with self._lock:
+                            self._cache[key] = out
+                            while len(self._cache) > self.cache_size:
+                                self._cache.popitem(last=False)
+                except Exception as e:
+                    # 재작성 실패 시 원문으로 검색(답변 생성은 계속)
+                    result["reason"] = f"failed: {e}"
+                with self._lock:
+                    self._stats["llm_ms"] += (time.perf_counter() - llm_started) * 1000.0
+
+        result["ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+        with self._lock:
+            self._stats["turns"] += 1
+            if not rewrite:
+                self._stats["skipped"] += 1
+            elif result["cached"]:
+                self._stats["cache_hits"] += 1
+            elif result["reason"].startswith("failed"):
+                self._stats["failed"] += 1
+            else:
+                self._stats["rewritten"] += 1
+
+        path = "skip" if not rewrite else ("cache" if result["cached"] else "llm")
+        print(
+            f"[REWRITE] model={self.model} path={path} reason={result['reason']} ms={result['ms']} "
+            f"query={question!r}" + (f" -> {result['query']!r}" if result["rewritten"] else ""),
+            flush=True,
+        )
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        s["llm_ms"] = round(s["llm_ms"], 1)
+        return s
@@ -0,0 +1,124 @@
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough, RunnableGenerator
+from langchain_core.runnables.utils import AddableDict
+from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_ollama import ChatOllama
+
+from .config import (
+    RETRIEVE_DOC_K,
+    RETRIEVE_NEWS_K,
+    ANSWER_CACHE_ENABLED,
+    OLLAMA_BASE_URL,
+    REWRITE_ENABLED,
+    HYBRID_RETRIEVAL_ENABLED,
+)
+from .vectorstore import get_vectorstore, get_news_vectorstore, collection_version
+from .retrievers import build_retriever
+from .answer_cache import get_answer_cache
+from .context import pack_context
+from .lexical_index import get_lexical_index
+from .query_rewrite import QueryRewriter
+
+
+def build_rag_chain(selected_model: str):
+    """
+    이력 없는 RAG 체인(입력: input/history/filters → 출력: answer/context/rewrite).
+    Streamlit 앱과 비동기 서비스(trag.service)가 같이 사용하며, invoke/stream/astream 모두 지원합니다.
+    """
+    # ✅ 여기서는 절대 sync/임베딩/폴더스캔을 하지 않습니다.
+    vectorstore = get_vectorstore()
+    retriever = build_retriever(vectorstore, get_news_vectorstore(), k=RETRIEVE_DOC_K, news_k=RETRIEVE_NEWS_K)
+
+    qa_system_prompt = (
+        "You are an assistant for question-answering tasks. "
+        "Use the following retrieved context to answer the question. "
+        "If you don't know, say you don't know. "
+        "대답은 한국어로 존댓말로 해주세요. 이모지를 적절히 사용해 주세요.\n\n"
+        "{context}"
+    )
+
+    qa_prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", qa_system_prompt),
+            MessagesPlaceholder("history"),
+            ("human", "{input}"),
+        ]
+    )
+
+    llm = ChatOllama(model=selected_model, base_url=OLLAMA_BASE_URL)
+
+    # 후속 질문은 이력을 반영한 독립 질문으로 검색(필요할 때만 LLM 재작성, rewrite["query"]가 검색 질의)
+    if REWRITE_ENABLED:
+        rewriter = QueryRewriter(selected_model, lexical=get_lexical_index() if HYBRID_RETRIEVAL_ENABLED else None)
+        rewrite_step = RunnablePassthrough.assign(rewrite=RunnableLambda(lambda x: rewriter.rewrite(x["input"], x.get("history"))))
+    else:
+        rewrite_step = RunnablePassthrough.assign(rewrite=RunnableLambda(lambda x: {"query": x["input"], "rewritten": False}))
+
+    # 입력에 filters(source/keyword/date_from/date_to)가 있으면 저장소 where 절로 적용
+    retriever_runnable = RunnableLambda(lambda x: retriever.invoke(x["rewrite"]["query"], filters=x.get("filters")))
+
+    # .stream() 지원: context(근거 문서)가 먼저 한 번 나오고, 이어서 answer 토큰이 조각으로 나옴
+    answer_chain = (
+        RunnablePassthrough
+        .assign(context=retriever_runnable)
+        .assign(answer=(
+            RunnablePassthrough.assign(context=RunnableLambda(lambda x: pack_context(x["context"], selected_model)[0]))
+            | qa_prompt
+            | llm
+            | StrOutputParser()
+        ))
+        .pick(["answer", "context", "rewrite"])
+    )
+    if not ANSWER_CACHE_ENABLED:
+        return rewrite_step | answer_chain
+
+    # 의미 기반 답변 캐시: 검색 질의(재작성 결과) 기준, 임베딩은 retriever와 같은 LRU를 타므로 추가 왕복 없음
+    embeddings = vectorstore.embeddings
+    answer_cache = get_answer_cache()
+
+    def _lookup(x):
+        query_vec = embeddings.embed_query(x["rewrite"]["query"])
+        # 검색하는 파티션의 버전만 비교(뉴스 top-k는 모든 답변의 근거에 들어가므로 뉴스를 검색하면 뉴스 쓰기도 무효화 대상)
+        version = collection_version(news=RETRIEVE_NEWS_K > 0)
+        return {"query_vec": query_vec, "version": version, "hit": answer_cache.lookup(selected_model, query_vec, version)}
+
+    def _route(x):
+        if x.get("filters"):
+            # 필터가 걸린 질의는 캐시된 답변과 근거 범위가 다를 수 있어 캐시를 쓰지 않음
+            return answer_chain
+        hit = x["cache"]["hit"]
+        if hit is not None:
+            return AddableDict(answer=hit["answer"], context=hit["context"], rewrite=x["rewrite"])
+
+        def _store(chunks):
+            # 스트리밍 조각은 그대로 흘려보내고, 끝까지 생성된 경우에만 캐시에 저장
+            answer, context = "", []
+            for chunk in chunks:
+                answer += chunk.get("answer", "")
+                context = chunk.get("context", context)
+                yield chunk
+            answer_cache.put(selected_model, x["cache"]["query_vec"], answer, context, x["cache"]["version"])
+
+        async def _astore(chunks):
+            answer, context = "", []
+            async for chunk in chunks:
+                answer += chunk.get("answer", "")
+                context = chunk.get("context", context)
+                yield chunk
+            answer_cache.put(selected_model, x["cache"]["query_vec"], answer, context, x["cache"]["version"])
+
+        return answer_chain | RunnableGenerator(_store, _astore)
+
+    return rewrite_step | RunnablePassthrough.assign(cache=RunnableLambda(_lookup)) | RunnableLambda(_route)
+
+
+def with_message_history(rag_chain, get_session_history):
+    """get_session_history(session_id) → BaseChatMessageHistory 로 대화 이력을 붙임."""
+    return RunnableWithMessageHistory(
+        rag_chain,
+        get_session_history,
+        input_messages_key="input",
+        history_messages_key="history",
+        output_messages_key="answer",
+    )
@@ -0,0 +1,180 @@
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .config import (
+    TOP_K,
+    HYBRID_RETRIEVAL_ENABLED,
+    HYBRID_FETCH_K,
+    HYBRID_RRF_K,
+    RETRIEVE_DOC_K,
+    RETRIEVE_NEWS_K,
+    NEWS_FETCH_K,
+    NEWS_DECAY_HALF_LIFE_DAYS,
+    DENSE_INDEX_ENABLED,
+)
+from .lexical_index import LexicalIndex, get_lexical_index, backfill_from_collection
+from .vectorstore import get_dense_index, dense_similarity_search_with_score
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], rrf_k: int = HYBRID_RRF_K) -> List[str]:
+    """여러 순위 목록을 RRF(1 / (rrf_k + rank))로 합쳐 doc_id 순위 하나로."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=lambda d: scores[d], reverse=True)
+
+
+def _to_ts(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return int(datetime(value.year, value.month, value.day).timestamp())
+    return int(value)
+
+
+def build_where(filters: Optional[Dict[str, Any]], partition: str) -> Optional[Dict[str, Any]]:
+    """
+    검색 필터 → Chroma where 절(저장소 안에서 필터링).
+    filters: {"source": str|list, "keyword": str|list, "date_from": ts|date, "date_to": ts|date}
+    - source는 두 파티션 모두, keyword/기간은 뉴스 파티션에만 적용(문서에는 해당 필드가 없음)
+    """
+    if not filters:
+        return None
+
+    clauses = []
+
+    def _eq_or_in(field: str, value):
+        if value in (None, "", [], ()):
+            return
+        if isinstance(value, (list, tuple, set)):
+            clauses.append({field: {"$in": list(value)}})
+        else:
+            clauses.append({field: value})
+
+    _eq_or_in("source", filters.get("source"))
+    if partition == "news":
+        _eq_or_in("keyword", filters.get("keyword"))
+        if filters.get("date_from") is not None:
+            clauses.append({"published_ts": {"$gte": _to_ts(filters["date_from"])}})
+        if filters.get("date_to") is not None:
+            clauses.append({"published_ts": {"$lte": _to_ts(filters["date_to"])}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _vector_search_with_score(vectorstore, query: str, k: int, where: Optional[Dict[str, Any]]) -> List[Tuple[Document, float]]:
+    """필터가 없고 dense 색인이 켜져 있으면 인메모리 브루트포스, 아니면 Chroma where 검색."""
+    if DENSE_INDEX_ENABLED and where is None:
+        return dense_similarity_search_with_score(vectorstore, query, k)
+    return vectorstore.similarity_search_with_score(query, k=k, filter=where)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25(문자 n-gram) + 벡터 검색 결과를 RRF로 합치는 retriever.
+    - 조문 번호/법률 용어/제품 코드처럼 정확한 용어 질의는 BM25 쪽이 보완
+    - 어휘 검색에서만 나온 청크는 Chroma에서 ID로 본문을 가져옴(임베딩 호출 없음)
+    - lexical이 None이면 벡터 검색만(필터 처리는 동일)
+    """
+
+    vectorstore: Any
+    lexical: Optional[LexicalIndex] = None
+    k: int = TOP_K
+    fetch_k: int = HYBRID_FETCH_K
+    rrf_k: int = HYBRID_RRF_K
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, filters: Dict[str, Any] = None
+    ) -> List[Document]:
+        where = build_where(filters, "docs")
+        vec_docs = [doc for doc, _ in _vector_search_with_score(self.vectorstore, query, self.fetch_k, where)]
+        lex_hits = self.lexical.search(query, self.fetch_k) if self.lexical is not None else []
+
+        by_id = {d.id: d for d in vec_docs if d.id}
+        fused = reciprocal_rank_fusion(
+            [[d.id for d in vec_docs if d.id], [doc_id for doc_id, _ in lex_hits]],
+            self.rrf_k,
+        )
+
+        # 어휘 검색에서만 나온 후보: 필터도 같은 where로 저장소에서 적용
+        missing = [doc_id for doc_id in fused if doc_id not in by_id]
+        if missing:
+            got = self.vectorstore._collection.get(ids=missing, where=where, include=["documents", "metadatas"])
+            for doc_id, text, meta in zip(got["ids"], got["documents"], got["metadatas"]):
+                by_id[doc_id] = Document(page_content=text or "", metadata=meta or {}, id=doc_id)
+
+        # 어휘 색인에는 있지만 컬렉션에서 지워졌거나 필터에 걸린 청크는 건너뜀
+        return [by_id[doc_id] for doc_id in fused if doc_id in by_id][: self.k]
+
+
+class NewsRetriever(BaseRetriever):
+    """
+    뉴스 컬렉션 검색: 유사도 × 시간 감쇠(반감기 half_life_days)로 재정렬.
+    필터(키워드/기간/출처)는 Chroma where로 저장소 안에서 적용합니다.
+    """
+
+    vectorstore: Any
+    k: int = RETRIEVE_NEWS_K
+    fetch_k: int = NEWS_FETCH_K
+    half_life_days: float = NEWS_DECAY_HALF_LIFE_DAYS
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, filters: Dict[str, Any] = None
+    ) -> List[Document]:
+        if self.k <= 0:
+            return []
+        hits = _vector_search_with_score(self.vectorstore, query, self.fetch_k, build_where(filters, "news"))
+        now = time.time()
+        scored = []
+        for doc, dist in hits:
+            age_days = max(0.0, (now - float(doc.metadata.get("published_ts") or now)) / 86400.0)
+            decay = 0.5 ** (age_days / self.half_life_days) if self.half_life_days > 0 else 1.0
+            scored.append((decay / (1.0 + float(dist)), doc))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [doc for _, doc in scored[: self.k]]
+
+
+class PartitionedRetriever(BaseRetriever):
+    """문서/뉴스 파티션을 각자의 k로 검색해 이어 붙임(문서 먼저). 필터는 각 파티션에 전달."""
+
+    docs: BaseRetriever
+    news: Optional[BaseRetriever] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, filters: Dict[str, Any] = None
+    ) -> List[Document]:
+        callbacks = run_manager.get_child()
+        results = list(self.docs.invoke(query, {"callbacks": callbacks}, filters=filters))
+        if self.news is not None:
+            results.extend(self.news.invoke(query, {"callbacks": callbacks}, filters=filters))
+        return results
+
+
+def build_retriever(vectorstore, news_vectorstore=None, k: int = RETRIEVE_DOC_K, news_k: int = RETRIEVE_NEWS_K) -> BaseRetriever:
+    """설정에 따라 문서 retriever(하이브리드 또는 벡터 전용)와 뉴스 retriever를 묶어 반환."""
+    lexical = None
+    if HYBRID_RETRIEVAL_ENABLED:
+        lexical = get_lexical_index()
+        backfill_from_collection(lexical, vectorstore)
+    docs = HybridRetriever(vectorstore=vectorstore, lexical=lexical, k=k)
+
+    if DENSE_INDEX_ENABLED:
+        # 첫 질문이 로드 비용을 내지 않도록 체인 빌드 시점에 미리 로드
+        for vs in (vectorstore, news_vectorstore):
+            if vs is not None:
+                get_dense_index(vs)
+
+    news = NewsRetriever(vectorstore=news_vectorstore, k=news_k) if news_vectorstore is not None else None
+    return PartitionedRetriever(docs=docs, news=news)
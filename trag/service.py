@@ -0,0 +1,440 @@
+"""
+헤드리스 비동기 RAG 질의 서비스(aiohttp). Streamlit 앱과 같은 체인(trag.rag_chain.build_rag_chain)을 사용합니다.
+
+실행:
+    python -m trag.service [--host 127.0.0.1] [--port 8765]
+
+엔드포인트:
+    POST /query          {"question": str, "session_id"?: str, "model"?: str, "filters"?: {...}} → JSON 답변
+    POST /query/stream   같은 입력 → NDJSON 스트림
+                         {"type": "rewrite", ...} → {"type": "context", ...} → {"type": "token", "text": ...} 여러 줄
+                         → {"type": "done", ...}
+    GET  /health         모델별 실행/대기/거절 통계, 세션 수, 질의 임베딩 마이크로 배칭 통계
+
+동시성:
+    - 모델별 동시 생성 수는 SERVICE_MODEL_CONCURRENCY로 제한, 초과 요청은 대기열(최대 SERVICE_MAX_QUEUE)에서 대기
+    - 대기열이 가득 차면 429, SERVICE_QUEUE_TIMEOUT_SEC 안에 차례가 안 오면 503
+    - 같은 session_id의 요청은 순서대로 처리(대화 이력이 섞이지 않도록)
+    - 세션 이력은 최근 HISTORY_KEEP_TURNS턴 + 누적 요약(trag.history)이라 긴 세션도 프롬프트 크기가 일정
+
+부하 테스트(로컬):
+    python tools/fake_ollama.py --port 11500 &
+    OLLAMA_HOST=http://127.0.0.1:11500 TRAG_CHROMA_PATH=./chroma_db_loadtest python -m trag.service
+    python bench/load_test_service.py --concurrency 16 --requests 200 --stream
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, aclosing
+from functools import partial
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from .config import (
+    AVAILABLE_LLM_MODELS,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_DEFAULT_MODEL,
+    SERVICE_MODEL_CONCURRENCY,
+    SERVICE_MODEL_CONCURRENCY_DEFAULT,
+    SERVICE_MAX_QUEUE,
+    SERVICE_QUEUE_TIMEOUT_SEC,
+    SERVICE_REQUEST_TIMEOUT_SEC,
+    SERVICE_SESSION_MAX,
+    SERVICE_SESSION_TTL_SEC,
+)
+from .history import SummarizingChatHistory
+from .rag_chain import build_rag_chain, with_message_history
+from .vectorstore import get_vectorstore
+
+
+def _log(msg: str):
+    print(f"[SERVICE] {msg}", flush=True)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueueTimeoutError(Exception):
+    pass
+
+
+class SessionHistories:
+    """
+    session_id → 대화 이력(메모리). 오래 안 쓴 세션은 TTL/최대 개수 기준으로 제거.
+    세션별 asyncio.Lock으로 같은 세션의 요청을 직렬화합니다.
+    """
+
+    def __init__(self, max_sessions: int = SERVICE_SESSION_MAX, ttl_sec: float = SERVICE_SESSION_TTL_SEC):
+        self.max_sessions = max_sessions
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _entry(self, session_id: str, model: Optional[str] = None) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is None:
+                # 서비스는 화면 표시가 없으므로 요약에 접힌 메시지는 보관하지 않음(세션당 메모리도 상한)
+                history = SummarizingChatHistory(model or SERVICE_DEFAULT_MODEL, keep_log=False)
+                entry = {"history": history, "lock": asyncio.Lock(), "last_used": now}
+                self._items[session_id] = entry
+            elif model:
+                entry["history"].model = model
+            entry["last_used"] = now
+            self._items.move_to_end(session_id)
+            self._evict(now, keep=session_id)
+            return entry
+
+    def _evict(self, now: float, keep: str):
+        # 실행 중인 세션(lock 보유)과 지금 요청한 세션은 제거하지 않음
+        for sid in list(self._items):
+            entry = self._items[sid]
+            if sid == keep:
+                continue
+            expired = now - entry["last_used"] > self.ttl_sec
+            over = len(self._items) > self.max_sessions
+            if not (expired or over):
+                break
+            if not entry["lock"].locked():
+                del self._items[sid]
+
+    def get(self, session_id: str, model: Optional[str] = None) -> SummarizingChatHistory:
+        """model을 주면 그 모델 기준으로 이력 요약/토큰 상한을 적용."""
+        return self._entry(session_id, model)["history"]
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        return self._entry(session_id)["lock"]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class ModelLimiter:
+    """모델별 동시 실행 수 제한 + 대기열(최대 길이/대기 시간 제한) + 통계."""
+
+    def __init__(self, model: str, concurrency: int, max_queue: int = SERVICE_MAX_QUEUE):
+        self.model = model
+        self.concurrency = max(1, int(concurrency))
+        self.max_queue = max_queue
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waits = deque(maxlen=1000)
+
+    @asynccontextmanager
+    async def slot(self, timeout: float):
+        """차례를 받으면 대기 시간(ms)을 넘겨줌. 대기열 초과/시간 초과 시 예외."""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"queue full for model={self.model} (waiting={self.waiting})")
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise QueueTimeoutError(f"queue timeout for model={self.model} after {timeout:.1f}s")
+        finally:
+            self.waiting -= 1
+        waited_ms = (time.perf_counter() - started) * 1000.0
+        self._waits.append(waited_ms)
+        self.in_flight += 1
+        try:
+            yield waited_ms
+        finally:
+            self.in_flight -= 1
+            self.served += 1
+            self._sem.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+
+        def _pct(p):
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 1) if waits else 0.0
+
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "served": self.served,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_wait_ms_p50": _pct(0.50),
+            "queue_wait_ms_p95": _pct(0.95),
+        }
+
+
+SESSIONS = web.AppKey("sessions", SessionHistories)
+LIMITERS = web.AppKey("limiters", dict)
+CHAINS = web.AppKey("chains", dict)
+EMBEDDINGS = web.AppKey("embeddings", object)
+CHAIN_LOCK = web.AppKey("chain_lock", asyncio.Lock)
+
+
+def _json_error(exc_cls, message: str):
+    return exc_cls(text=json.dumps({"error": message}, ensure_ascii=False), content_type="application/json")
+
+
+async def _chain_for(app: web.Application, model: str):
+    """모델별 체인은 처음 요청 때 한 번만 만듦(벡터스토어/임베딩 준비는 블로킹이라 스레드에서)."""
+    chains = app[CHAINS]
+    if model not in chains:
+        async with app[CHAIN_LOCK]:
+            if model not in chains:
+                loop = asyncio.get_running_loop()
+                rag_chain = await loop.run_in_executor(None, build_rag_chain, model)
+                chains[model] = with_message_history(rag_chain, partial(app[SESSIONS].get, model=model))
+                app[EMBEDDINGS] = await loop.run_in_executor(None, lambda: get_vectorstore().embeddings)
+                _log(f"chain ready model={model}")
+    return chains[model]
+
+
+async def _read_query(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except Exception:
+        raise _json_error(web.HTTPBadRequest, "request body must be JSON")
+    question = (body.get("question") or body.get("input") or "").strip() if isinstance(body, dict) else ""
+    if not question:
+        raise _json_error(web.HTTPBadRequest, "'question' is required")
+    model = body.get("model") or SERVICE_DEFAULT_MODEL
+    if model not in AVAILABLE_LLM_MODELS:
+        raise _json_error(web.HTTPBadRequest, f"unknown model: {model} (available: {', '.join(AVAILABLE_LLM_MODELS)})")
+    filters = body.get("filters") or None
+    if filters is not None and not isinstance(filters, dict):
+        raise _json_error(web.HTTPBadRequest, "'filters' must be an object")
+    return {
+        "question": question,
+        "model": model,
+        "session_id": str(body.get("session_id") or "default"),
+        "filters": filters,
+    }
+
+
+async def _prefetch_query_embedding(app: web.Application, q: Dict[str, Any]):
+    """
+    질의 임베딩을 모델 슬롯을 받기 전에 계산해 LRU에 넣어 둠.
+    대기 중인 요청들의 임베딩이 마이크로 배칭으로 한 번에 처리되고, 체인 안의 검색/답변 캐시 조회는 LRU 적중.
+    """
+    await _chain_for(app, q["model"])
+    emb = app.get(EMBEDDINGS)
+    if emb is None:
+        return
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, emb.embed_query, q["question"])
+    except Exception as e:
+        # 실패해도 체인 안에서 다시 시도하므로 여기서는 기록만
+        _log(f"WARN query embedding prefetch failed: {e}")
+
+
+@asynccontextmanager
+async def _admit(app: web.Application, q: Dict[str, Any]):
+    """세션 순서 → 모델 슬롯 순으로 차례를 받음(둘의 대기 시간 합이 SERVICE_QUEUE_TIMEOUT_SEC 이내)."""
+    deadline = time.monotonic() + SERVICE_QUEUE_TIMEOUT_SEC
+    limiter = app[LIMITERS][q["model"]]
+    session_lock = app[SESSIONS].lock(q["session_id"])
+    try:
+        await asyncio.wait_for(session_lock.acquire(), timeout=SERVICE_QUEUE_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        limiter.timed_out += 1
+        raise _json_error(web.HTTPServiceUnavailable, f"session {q['session_id']} is busy")
+    try:
+        try:
+            async with limiter.slot(deadline - time.monotonic()) as waited_ms:
+                yield waited_ms
+        except QueueFullError as e:
+            raise _json_error(web.HTTPTooManyRequests, str(e))
+        except QueueTimeoutError as e:
+            raise _json_error(web.HTTPServiceUnavailable, str(e))
+    finally:
+        session_lock.release()
+
+
+def _source_payload(doc) -> Dict[str, Any]:
+    meta = getattr(doc, "metadata", None) or {}
+    item = {"source": meta.get("source", "Unknown"), "snippet": (getattr(doc, "page_content", "") or "")[:300]}
+    for key in ("page", "title", "url", "published"):
+        if meta.get(key) not in (None, ""):
+            item[key] = meta[key]
+    return item
+
+
+async def _answer_events(app: web.Application, q: Dict[str, Any]):
+    """체인 astream을 rewrite / context / token 이벤트로 변환."""
+    chain = await _chain_for(app, q["model"])
+    config = {"configurable": {"session_id": q["session_id"]}}
+    stream = chain.astream({"input": q["question"], "filters": q["filters"]}, config)
+    async with aclosing(stream):
+        async for chunk in stream:
+            if chunk.get("rewrite") is not None:
+                rw = chunk["rewrite"]
+                yield {"type": "rewrite", "query": rw.get("query"), "rewritten": bool(rw.get("rewritten")),
+                       "reason": rw.get("reason"), "ms": rw.get("ms", 0.0)}
+            if chunk.get("context") is not None:
+                yield {"type": "context", "sources": [_source_payload(d) for d in chunk["context"] or []]}
+            if chunk.get("answer"):
+                yield {"type": "token", "text": chunk["answer"]}
+
+
+def _log_request(kind: str, q: Dict[str, Any], timings: Dict[str, float], status: str):
+    _log(
+        f"{kind} model={q['model']} session={q['session_id']} status={status} "
+        f"queue_ms={timings.get('queue_ms', 0):.0f} rewrite_ms={timings.get('rewrite_ms', 0):.0f} ttft_ms={timings.get('ttft_ms', 0):.0f} "
+        f"total_ms={timings.get('total_ms', 0):.0f}"
+    )
+
+
+async def handle_query(request: web.Request) -> web.Response:
+    app = request.app
+    q = await _read_query(request)
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    await _prefetch_query_embedding(app, q)
+    async with _admit(app, q) as waited_ms:
+        timings["queue_ms"] = waited_ms
+        answer, sources, search_query = "", [], q["question"]
+        try:
+            async with asyncio.timeout(SERVICE_REQUEST_TIMEOUT_SEC):
+                async for ev in _answer_events(app, q):
+                    if ev["type"] == "rewrite":
+                        search_query = ev["query"]
+                        timings["rewrite_ms"] = ev["ms"]
+                    elif ev["type"] == "context":
+                        sources = ev["sources"]
+                    else:
+                        if "ttft_ms" not in timings:
+                            timings["ttft_ms"] = (time.perf_counter() - started) * 1000.0
+                        answer += ev["text"]
+        except TimeoutError:
+            timings["total_ms"] = (time.perf_counter() - started) * 1000.0
+            _log_request("query", q, timings, "timeout")
+            raise _json_error(web.HTTPGatewayTimeout, f"generation exceeded {SERVICE_REQUEST_TIMEOUT_SEC:.0f}s")
+    timings["total_ms"] = (time.perf_counter() - started) * 1000.0
+    _log_request("query", q, timings, "ok")
+    return web.json_response(
+        {
+            "answer": answer,
+            "sources": sources,
+            "search_query": search_query,
+            "session_id": q["session_id"],
+            "model": q["model"],
+            "timings": {k: round(v, 1) for k, v in timings.items()},
+        },
+        dumps=lambda o: json.dumps(o, ensure_ascii=False),
+    )
+
+
+async def handle_query_stream(request: web.Request) -> web.StreamResponse:
+    app = request.app
+    q = await _read_query(request)
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    await _prefetch_query_embedding(app, q)
+    # 차례를 받은 뒤에 헤더를 보냄(대기열 초과/시간 초과는 일반 HTTP 상태 코드로 응답)
+    async with _admit(app, q) as waited_ms:
+        timings["queue_ms"] = waited_ms
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson; charset=utf-8"})
+        await resp.prepare(request)
+
+        async def _send(obj):
+            await resp.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        status = "ok"
+        try:
+            async with asyncio.timeout(SERVICE_REQUEST_TIMEOUT_SEC):
+                async for ev in _answer_events(app, q):
+                    if ev["type"] == "rewrite":
+                        timings["rewrite_ms"] = ev["ms"]
+                    if ev["type"] == "token" and "ttft_ms" not in timings:
+                        timings["ttft_ms"] = (time.perf_counter() - started) * 1000.0
+                    await _send(ev)
+            timings["total_ms"] = (time.perf_counter() - started) * 1000.0
+            await _send({"type": "done", "session_id": q["session_id"], "model": q["model"],
+                         "timings": {k: round(v, 1) for k, v in timings.items()}})
+        except TimeoutError:
+            status = "timeout"
+            await _send({"type": "error", "error": f"generation exceeded {SERVICE_REQUEST_TIMEOUT_SEC:.0f}s"})
+        except ConnectionResetError:
+            # 클라이언트가 끊으면 생성도 중단(aclosing으로 Ollama 스트림을 닫고 슬롯 반환)
+            status = "disconnected"
+            return resp
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = "error"
+            await _send({"type": "error", "error": str(e)})
+        finally:
+            timings.setdefault("total_ms", (time.perf_counter() - started) * 1000.0)
+            _log_request("stream", q, timings, status)
+        await resp.write_eof()
+        return resp
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    app = request.app
+    emb = app.get(EMBEDDINGS)
+    return web.json_response(
+        {
+            "status": "ok",
+            "sessions": len(app[SESSIONS]),
+            "chains": sorted(app[CHAINS]),
+            "models": {m: lim.stats() for m, lim in app[LIMITERS].items()},
+            "query_embed": emb.query_batch_stats() if hasattr(emb, "query_batch_stats") else {},
+        }
+    )
+
+
+async def _on_startup(app: web.Application):
+    # 검색/임베딩(동기 코드)은 기본 스레드 풀에서 실행되므로 동시 생성 수에 맞춰 풀 크기를 잡음
+    workers = max(8, sum(lim.concurrency for lim in app[LIMITERS].values()) * 2 + 4)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trag-service"))
+    try:
+        await _chain_for(app, SERVICE_DEFAULT_MODEL)
+    except Exception as e:
+        # Ollama가 아직 안 떠 있어도 서비스는 시작하고, 첫 요청 때 다시 시도
+        _log(f"WARN warmup failed model={SERVICE_DEFAULT_MODEL}: {e}")
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app[SESSIONS] = SessionHistories()
+    app[LIMITERS] = {
+        m: ModelLimiter(m, SERVICE_MODEL_CONCURRENCY.get(m, SERVICE_MODEL_CONCURRENCY_DEFAULT))
+        for m in AVAILABLE_LLM_MODELS
+    }
+    app[CHAINS] = {}
+    app[CHAIN_LOCK] = asyncio.Lock()
+    app.on_startup.append(_on_startup)
+    app.router.add_post("/query", handle_query)
+    app.router.add_post("/query/stream", handle_query_stream)
+    app.router.add_get("/health", handle_health)
+    return app
+
+
+def main(argv: Optional[list] = None):
+    ap = argparse.ArgumentParser(description="TRAG async query service")
+    ap.add_argument("--host", default=SERVICE_HOST)
+    ap.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = ap.parse_args(argv)
+    _log(
+        f"listening on http://{args.host}:{args.port} "
+        f"concurrency={ {m: SERVICE_MODEL_CONCURRENCY.get(m, SERVICE_MODEL_CONCURRENCY_DEFAULT) for m in AVAILABLE_LLM_MODELS} }"
+    )
+    web.run_app(create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
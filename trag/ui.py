@@ -1,109 +1,206 @@
+import time
+
 import streamlit as st
 
-from .config import DATA_DIR
+from .config import DATA_DIR, INGEST_JOB_UI_REFRESH_SEC, NEWS_KEYWORDS
+from .ingest import SUPPORTED_EXTENSIONS
+from .ingest_jobs import content_hash, submit_ingest_job, get_jobs
 from .vectorstore import (
-    sync_pdf_dir,
     save_uploaded_pdf_to_dir,
     list_ingested_pdfs,
 )
+from .rag import get_streamlit_chat_history
+
+# Streamlit 버전에 따라 fragment API 이름이 다름(없으면 일반 렌더링으로 대체)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def _close_answer_stream():
+    stream = st.session_state.pop("answer_stream", None)
+    if stream is not None:
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+
+def _summary_lines(result):
+    summary_lines = [
+        f"✅ 동기화 완료!",
+        f"- 총 파일: {result.get('total_files', 0)}개 (PDF {result.get('total_pdf', 0)}개)",
+        f"- 신규 임베딩: {len(result.get('added', []))}개",
+        f"- 기존 스킵: {len(result.get('skipped', []))}개",
+    ]
+    embed = result.get("embed") or {}
+    if embed.get("chunks"):
+        summary_lines.append(f"- 임베딩: {embed['chunks']}청크 ({embed['chunks_per_sec']} chunks/s)")
+    for fmt, fst in (result.get("by_format") or {}).items():
+        summary_lines.append(f"  - {fmt}: {fst.get('files', 0)}개 / {fst.get('chunks', 0)}청크 / {fst.get('mb_per_sec', 0)} MB/s")
+    if result.get("failed"):
+        summary_lines.append(f"- 실패: {len(result['failed'])}개")
+        for fn, err in result["failed"][:20]:
+            summary_lines.append(f"  - {fn}: {err}")
+    return summary_lines
+
+
+def _progress_line(job):
+    p = job.get("progress") or {}
+    if job["status"] == "queued":
+        return "⏳ 대기 중..."
+    line = (
+        f"🔄 처리 중: 파일 {p.get('files_done', 0)}/{p.get('files_total', '?')}개 "
+        f"(신규 {p.get('files_added', 0)}개), 임베딩 {p.get('chunks_embedded', 0)}청크"
+    )
+    if p.get("eta_sec") is not None:
+        line += f", 남은 시간 약 {int(p['eta_sec'])}초"
+    return line
+
+
+def _ingest_jobs_body():
+    jobs = get_jobs(st.session_state.get("ingest_jobs", []))
+    finished = [j for j in jobs if j["status"] in ("done", "failed")]
+
+    for job in jobs:
+        if job["status"] in ("queued", "running"):
+            st.info(_progress_line(job))
+
+    if finished:
+        for job in finished:
+            if job["status"] == "failed":
+                content = f"❌ 임베딩 작업 실패: {job.get('error')}"
+            else:
+                content = "\n".join(_summary_lines(job.get("result") or {}))
+            # 대화 이력에 안내 메시지로 남기고 전체 rerun으로 채팅 흐름에 표시
+            get_streamlit_chat_history().add_notice(content)
+        done_ids = {j["id"] for j in finished}
+        st.session_state["ingest_jobs"] = [i for i in st.session_state["ingest_jobs"] if i not in done_ids]
+        st.rerun()
+
+
+_render_ingest_jobs = _fragment(run_every=INGEST_JOB_UI_REFRESH_SEC)(_ingest_jobs_body) if _fragment else _ingest_jobs_body
 
 
 def render_chat(conversational_chain):
     # ====== (선택) 상단 상태 ======
-    st.caption(f"📁 데이터 폴더: {DATA_DIR}  (이 폴더의 PDF 전체를 대상으로 신규만 임베딩합니다)")
+    st.caption(f"📁 데이터 폴더: {DATA_DIR}  (이 폴더의 PDF/DOCX/CSV/TXT/MD 전체를 대상으로 신규만 임베딩합니다)")
 
-    # ====== 채팅 세션 상태 ======
-    if "messages" not in st.session_state:
-        st.session_state["messages"] = [
-            {"role": "assistant", "content": "📎 PDF를 첨부하려면 아래에 드래그앤드롭 해주세요. 그리고 질문을 입력해 주세요 🙂"}
-        ]
+    # ====== 채팅 세션 상태(체인의 대화 이력이 유일한 저장소) ======
+    chat_history = get_streamlit_chat_history()
+    if not chat_history.display_messages:
+        chat_history.add_notice("📎 PDF를 첨부하려면 아래에 드래그앤드롭 해주세요. 그리고 질문을 입력해 주세요 🙂")
 
     # ====== 기존 채팅 메시지 렌더링 ======
-    for msg in st.session_state["messages"]:
-        st.chat_message(msg["role"]).write(msg["content"])
+    for msg in chat_history.display_messages:
+        st.chat_message("human" if msg.type == "human" else "assistant").write(msg.content)
 
     # ====== (2번 방식) 업로더를 채팅 흐름 안에 삽입 ======
     with st.chat_message("assistant"):
-        st.write("여기에 PDF를 드래그앤드롭 하시면 `./data`에 저장되고, **새로 추가된 PDF만** 임베딩됩니다. 📚")
+        st.write("여기에 PDF/DOCX/CSV/TXT/MD 파일을 드래그앤드롭 하시면 `./data`에 저장되고, **새로 추가된 파일만** 임베딩됩니다. 📚")
 
         uploaded_files = st.file_uploader(
-            "PDF 업로드",
-            type=["pdf"],
+            "파일 업로드",
+            type=[ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS],
             accept_multiple_files=True,
             label_visibility="collapsed",
         )
 
-    # 업로드 처리 (업로드되면 바로 저장 + 동기화)
+    # 업로드 처리: 저장 + 백그라운드 작업 등록만 하고 바로 반환(임베딩은 워커 스레드가 수행)
+    # file_uploader는 rerun마다 같은 파일을 다시 돌려주므로 내용 해시로 이미 처리한 업로드는 건너뜀
     if uploaded_files:
-        # 사용자가 업로드한 파일들을 '채팅 메시지'처럼 표시
+        seen = st.session_state.setdefault("ingest_seen_uploads", set())
+        new_files = []
         for uf in uploaded_files:
-            st.chat_message("human").write(f"📎 업로드됨: {uf.name}")
+            key = content_hash([uf.getvalue()])
+            if key not in seen:
+                seen.add(key)
+                new_files.append(uf)
+
+        if new_files:
+            # 사용자가 업로드한 파일들을 '채팅 메시지'처럼 표시
+            for uf in new_files:
+                st.chat_message("human").write(f"📎 업로드됨: {uf.name}")
 
-        # 실제 저장/임베딩
-        with st.spinner("업로드 파일 저장 및 신규 PDF 임베딩 중..."):
             # 1) ./data에 저장
-            for uf in uploaded_files:
+            for uf in new_files:
                 save_uploaded_pdf_to_dir(uf, DATA_DIR)
 
-            # 2) ./data 전체 스캔 → 신규 PDF만 임베딩
-            result = sync_pdf_dir(DATA_DIR)
-
-        # 결과를 assistant 메시지처럼 표시
-        summary_lines = [
-            f"✅ 동기화 완료!",
-            f"- 총 PDF: {result.get('total_pdf', 0)}개",
-            f"- 신규 임베딩: {len(result.get('added', []))}개",
-            f"- 기존 스킵: {len(result.get('skipped', []))}개",
-        ]
-        if result.get("failed"):
-            summary_lines.append(f"- 실패: {len(result['failed'])}개 (아래 참고)")
+            # 2) 인제스트 작업 등록(같은 내용의 대기/실행 중 작업이 있으면 그 작업에 합류)
+            job_id = submit_ingest_job([uf.getvalue() for uf in new_files], DATA_DIR)
+            jobs = st.session_state.setdefault("ingest_jobs", [])
+            if job_id not in jobs:
+                jobs.append(job_id)
 
-        st.chat_message("assistant").write("\n".join(summary_lines))
+            msg = f"⏳ {len(new_files)}개 파일 임베딩을 백그라운드에서 시작했습니다. 그동안 질문하셔도 됩니다."
+            st.chat_message("assistant").write(msg)
+            chat_history.add_notice(msg)
 
-        # 실패가 있으면 상세 출력
-        if result.get("failed"):
-            with st.expander("실패 상세 보기", expanded=False):
-                for fn, err in result["failed"][:20]:
-                    st.code(f"{fn}\n{err}")
-
-        # 세션 메시지에도 남기기(새로고침/리렌더 대비)
-        st.session_state["messages"].append({"role": "assistant", "content": "\n".join(summary_lines)})
+    # 진행 중인 작업이 있으면 진행률만 주기적으로 부분 갱신(채팅 입력은 막지 않음)
+    if st.session_state.get("ingest_jobs"):
+        _render_ingest_jobs()
 
     # ====== 참고용: 임베딩된 PDF 목록 ======
-    with st.expander("📚 임베딩된 PDF 목록(매니페스트 기준)", expanded=False):
+    with st.expander("📚 임베딩된 파일 목록(매니페스트 기준)", expanded=False):
         items = list_ingested_pdfs()
         if not items:
-            st.write("아직 임베딩된 PDF가 없습니다.")
+            st.write("아직 임베딩된 파일이 없습니다.")
         else:
             for it in items[:100]:
                 st.write(f"- {it.get('original_name')} | {it.get('ingested_at')} | {it.get('sha256','')[:12]}")
 
+    # ====== 검색 필터(뉴스 키워드/기간, Chroma where 절로 저장소 안에서 적용) ======
+    with st.expander("🔎 검색 필터", expanded=False):
+        news_keywords = st.multiselect("뉴스 키워드", list(NEWS_KEYWORDS or []))
+        news_days = st.number_input("최근 N일 뉴스만 (0이면 전체)", min_value=0, value=0, step=1)
+    filters = {}
+    if news_keywords:
+        filters["keyword"] = news_keywords
+    if news_days:
+        filters["date_from"] = int(time.time() - news_days * 86400)
+
     # ====== 채팅 입력/응답 ======
     if prompt_message := st.chat_input("질문을 입력하세요"):
-        st.session_state["messages"].append({"role": "human", "content": prompt_message})
+        # 질문/답변은 체인(RunnableWithMessageHistory)이 답변 완료 시 대화 이력에 저장
         st.chat_message("human").write(prompt_message)
 
+        # 이전 질문의 생성이 아직 진행 중이면 먼저 닫음(새 질문이 들어오면 이전 생성은 취소)
+        _close_answer_stream()
+
         with st.chat_message("ai"):
-            with st.spinner("Thinking..."):
-                config = {"configurable": {"session_id": "any"}}
-                try:
-                    response = conversational_chain.invoke({"input": prompt_message}, config)
-                except Exception as e:
-                    st.error("질문 처리 중 오류가 발생했습니다.")
-                    st.code(str(e))
-                    st.info(
-                        "Ollama/임베딩 모델 문제일 수 있습니다.\n\n"
-                        "1) `ollama list`\n"
-                        "2) `ollama pull qwen3-embedding` 또는 `ollama pull nomic-embed-text`\n"
-                        "3) `streamlit cache clear` 후 재실행"
-                    )
-                    return
-
-                answer = response.get("answer", "")
-                st.write(answer)
-                st.session_state["messages"].append({"role": "assistant", "content": answer})
-
-                with st.expander("참고 문서 확인"):
-                    for doc in response.get("context", []) or []:
-                        src = (doc.metadata or {}).get("source", "Unknown")
-                        st.markdown(src, help=getattr(doc, "page_content", ""))
\ No newline at end of file
+            sources_box = st.container()
+            answer_box = st.empty()
+            answer_box.markdown("Thinking...")
+
+            config = {"configurable": {"session_id": "any"}}
+            stream = conversational_chain.stream({"input": prompt_message, "filters": filters}, config)
+            st.session_state["answer_stream"] = stream
+            answer = ""
+            try:
+                for chunk in stream:
+                    rewrite = chunk.get("rewrite")
+                    if rewrite and rewrite.get("rewritten"):
+                        # 후속 질문을 재작성해 검색한 경우 실제 검색 질의와 추가 지연을 표시
+                        sources_box.caption(f"🔁 검색 질의: {rewrite['query']} (+{rewrite.get('ms', 0):.0f}ms)")
+                    if chunk.get("context") is not None:
+                        # 근거 문서는 생성 시작 전에 먼저 표시
+                        with sources_box.expander("참고 문서 확인"):
+                            for doc in chunk["context"] or []:
+                                src = (doc.metadata or {}).get("source", "Unknown")
+                                st.markdown(src, help=getattr(doc, "page_content", ""))
+                    if chunk.get("answer"):
+                        answer += chunk["answer"]
+                        answer_box.markdown(answer + "▌")
+            except Exception as e:
+                st.error("질문 처리 중 오류가 발생했습니다.")
+                st.code(str(e))
+                st.info(
+                    "Ollama/임베딩 모델 문제일 수 있습니다.\n\n"
+                    "1) `ollama list`\n"
+                    "2) `ollama pull qwen3-embedding` 또는 `ollama pull nomic-embed-text`\n"
+                    "3) `streamlit cache clear` 후 재실행"
+                )
+                return
+            finally:
+                # rerun(새 질문 제출)으로 중단돼도 Ollama 스트리밍 연결을 닫음
+                _close_answer_stream()
+
+            answer_box.markdown(answer)
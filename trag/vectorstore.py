@@ -1,12 +1,17 @@
 import os
-import json
 import glob
+import uuid
+import queue
 import hashlib
-from datetime import datetime
-from typing import Dict, Any, Tuple, List
-
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import threading
+import multiprocessing
+import time
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Tuple, List, Callable
+
+import chromadb
+import httpx
 from langchain_chroma import Chroma
 from langchain_ollama import OllamaEmbeddings
 
@@ -15,12 +20,39 @@ from langchain_core.documents import Document
 from .config import (
     CHROMA_PATH,
     COLLECTION_NAME,
-    MANIFEST_PATH,
+    NEWS_COLLECTION_NAME,
+    LEXICAL_INDEX_PATH,
+    DENSE_INDEX_DTYPE,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
     EMBEDDING_MODEL,
     FALLBACK_EMBEDDING_MODEL,
+    EMBED_CACHE_ENABLED,
+    EMBED_CONCURRENCY,
+    EMBED_HEALTH_TTL_SEC,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_HTTP_KEEPALIVE_SEC,
+    OLLAMA_BASE_URL,
+    INGEST_PIPELINE_ENABLED,
+    INGEST_QUEUE_MAXSIZE,
+    INGEST_FORMAT_WORKERS,
+    INGEST_PROCESS_FORMATS,
+    CSV_ROWS_PER_CHUNK,
+    INGEST_STREAM_MIN_BYTES,
+    INGEST_STREAM_WINDOW_PAGES,
+)
+from .ingest import (
+    SUPPORTED_EXTENSIONS,
+    file_format,
+    load_and_split_timed,
+    split_pages,
+    iter_pdf_page_windows,
 )
+from .embeddings import BatchedEmbeddings, stats_delta
+from .embedding_cache import EmbeddingCache
+from .manifest_store import ManifestStore, get_manifest_store
+from .lexical_index import get_lexical_index
+from .dense_index import DenseIndex, load_from_collection
 
 
 def _ensure_dir(path: str) -> None:
@@ -35,128 +67,763 @@ def _sha256_file(path: str) -> str:
     return h.hexdigest()
 
 
-def _load_manifest() -> Dict[str, Any]:
-    if not os.path.exists(MANIFEST_PATH):
-        return {"version": 1, "items": {}}
-    try:
-        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "items" not in data:
-            data["items"] = {}
-        return data
-    except Exception:
-        return {"version": 1, "items": {}}
+def _stat_signature(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
 
 
-def _save_manifest(data: Dict[str, Any]) -> None:
-    _ensure_dir(CHROMA_PATH)
-    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def _file_sha(store: ManifestStore, path: str, verify: bool = False, report: Dict[str, Any] = None) -> str:
+    """
+    stat(size, mtime_ns, inode)이 매니페스트 기록과 같으면 해시 없이 기록된 sha256을 반환.
+    새 파일/변경된 파일이거나 verify=True(감사 모드)일 때만 전체 해시를 계산합니다.
+    """
+    abs_path = os.path.abspath(path)
+    sig = _stat_signature(abs_path)
+    rec = store.get_stat(abs_path)
+    if not verify and rec and rec.get("sha256") and all(rec.get(k) == v for k, v in sig.items()):
+        _add_counts(report and report["scan"], {"stat_hit": 1})
+        return rec["sha256"]
+
+    sha = _sha256_file(abs_path)
+    store.put_stat(abs_path, sig, sha)
+    _add_counts(report and report["scan"], {"hashed": 1})
+    return sha
+
+
+# 프로세스 공용 레지스트리: 임베딩 클라이언트/Chroma 클라이언트를 한 번만 만들고 재사용
+# (sync/데몬 tick/뉴스 추가/체인 빌드가 각각 새 클라이언트와 ping을 만들던 비용 제거)
+_REGISTRY_LOCK = threading.RLock()
+_EMBEDDINGS: BatchedEmbeddings = None
+_EMBEDDINGS_CHECKED_AT = 0.0
+_VECTORSTORES: Dict[str, Chroma] = {}
+_CHROMA_CACHE_CLEARED = False
+_NEWS_MIGRATION_CHECKED = False
+_DENSE_INDEXES: Dict[str, DenseIndex] = {}
+
+
+def _ollama_embeddings(model: str) -> OllamaEmbeddings:
+    # 한 프로세스에서 하나의 httpx 연결 풀을 공유(keep-alive로 요청마다 TCP 연결을 새로 열지 않음)
+    limits = httpx.Limits(
+        max_connections=EMBED_CONCURRENCY * 2,
+        max_keepalive_connections=EMBED_CONCURRENCY * 2,
+        keepalive_expiry=OLLAMA_HTTP_KEEPALIVE_SEC,
+    )
+    return OllamaEmbeddings(
+        model=model,
+        base_url=OLLAMA_BASE_URL,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        sync_client_kwargs={"limits": limits},
+    )
 
 
-def get_embedding_function() -> OllamaEmbeddings:
-    """Ollama 임베딩 모델을 반환하되, 없으면 fallback으로 자동 전환."""
+def _build_embedding_function() -> BatchedEmbeddings:
+    """Ollama 임베딩 모델을 반환하되, 없으면 fallback으로 자동 전환(배치/동시성 + 디스크 캐시 레이어 포함)."""
+    cache = EmbeddingCache() if EMBED_CACHE_ENABLED else None
     try:
-        emb = OllamaEmbeddings(model=EMBEDDING_MODEL)
+        emb = _ollama_embeddings(EMBEDDING_MODEL)
         emb.embed_query("ping")  # 모델 없으면 여기서 실패
-        return emb
+        return BatchedEmbeddings(emb, cache=cache)
     except Exception:
-        emb_fb = OllamaEmbeddings(model=FALLBACK_EMBEDDING_MODEL)
+        emb_fb = _ollama_embeddings(FALLBACK_EMBEDDING_MODEL)
         emb_fb.embed_query("ping")
-        return emb_fb
+        return BatchedEmbeddings(emb_fb, cache=cache)
 
 
-def get_vectorstore() -> Chroma:
-    _ensure_dir(CHROMA_PATH)
-    return Chroma(
-        persist_directory=CHROMA_PATH,
-        embedding_function=get_embedding_function(),
-        collection_name=COLLECTION_NAME,
-    )
+def get_embedding_function() -> BatchedEmbeddings:
+    """
+    프로세스 공용 임베딩 함수. ping 결과는 EMBED_HEALTH_TTL_SEC 동안 재사용하고,
+    만료 후 첫 호출에서만 현재 모델을 다시 확인합니다(실패하면 기본 → fallback 순서로 재구성).
+    """
+    global _EMBEDDINGS, _EMBEDDINGS_CHECKED_AT
+    with _REGISTRY_LOCK:
+        now = time.monotonic()
+        if _EMBEDDINGS is not None and now - _EMBEDDINGS_CHECKED_AT < EMBED_HEALTH_TTL_SEC:
+            return _EMBEDDINGS
+
+        if _EMBEDDINGS is not None:
+            try:
+                _EMBEDDINGS.inner.embed_query("ping")
+                _EMBEDDINGS_CHECKED_AT = now
+                return _EMBEDDINGS
+            except Exception:
+                pass
+
+        _EMBEDDINGS = _build_embedding_function()
+        _EMBEDDINGS_CHECKED_AT = time.monotonic()
+        return _EMBEDDINGS
+
+
+def _embed_stats(vs: Chroma) -> Dict[str, Any]:
+    emb = getattr(vs, "embeddings", None)
+    return emb.stats() if hasattr(emb, "stats") else {}
+
+
+def get_vectorstore(collection_name: str = COLLECTION_NAME) -> Chroma:
+    """프로세스 공용 Chroma 클라이언트(컬렉션별). 임베딩 함수가 바뀐 경우(fallback 전환 등)에만 다시 만듭니다."""
+    global _CHROMA_CACHE_CLEARED
+    with _REGISTRY_LOCK:
+        emb = get_embedding_function()
+        vs = _VECTORSTORES.get(collection_name)
+        if vs is not None and vs.embeddings is emb:
+            return vs
+
+        if not _CHROMA_CACHE_CLEARED:
+            # Streamlit hot-reload에서 Chroma 공유 클라이언트 꼬임 방지(프로세스/모듈 로드당 1회)
+            chromadb.api.client.SharedSystemClient.clear_system_cache()
+            _CHROMA_CACHE_CLEARED = True
+
+        _ensure_dir(CHROMA_PATH)
+        vs = Chroma(
+            persist_directory=CHROMA_PATH,
+            embedding_function=emb,
+            collection_name=collection_name,
+        )
+        _VECTORSTORES[collection_name] = vs
+        return vs
+
+
+def get_news_vectorstore() -> Chroma:
+    """뉴스 전용 컬렉션. 프로세스에서 처음 열 때 문서 컬렉션에 남은 (구) 뉴스 청크를 옮깁니다."""
+    global _NEWS_MIGRATION_CHECKED
+    with _REGISTRY_LOCK:
+        news_vs = get_vectorstore(NEWS_COLLECTION_NAME)
+        if not _NEWS_MIGRATION_CHECKED:
+            moved = _migrate_news_collection(get_vectorstore(COLLECTION_NAME), news_vs)
+            if moved:
+                print(f"[NEWS] moved {moved} news chunks to collection '{NEWS_COLLECTION_NAME}'", flush=True)
+            _NEWS_MIGRATION_CHECKED = True
+        return news_vs
+
+
+def reset_registry() -> None:
+    """공용 임베딩/Chroma 클라이언트를 버림(설정 변경 후 재구성용)."""
+    global _EMBEDDINGS, _EMBEDDINGS_CHECKED_AT, _NEWS_MIGRATION_CHECKED
+    with _REGISTRY_LOCK:
+        _EMBEDDINGS, _EMBEDDINGS_CHECKED_AT, _NEWS_MIGRATION_CHECKED = None, 0.0, False
+        _VECTORSTORES.clear()
+        _DENSE_INDEXES.clear()
+
+
+def lexical_index_path(collection_name: str) -> str:
+    """컬렉션마다 별도 어휘 색인(문서 컬렉션은 기존 LEXICAL_INDEX_PATH 그대로)."""
+    if collection_name == COLLECTION_NAME:
+        return LEXICAL_INDEX_PATH
+    return os.path.join(CHROMA_PATH, f"lexical_index_{collection_name}.sqlite3")
+
+
+def _lexical_index_for(vs: Chroma):
+    return get_lexical_index(lexical_index_path(vs._collection.name))
+
+
+def collection_version(news: bool = True) -> Tuple[int, ...]:
+    """
+    컬렉션별 청크 추가/삭제 시마다 증가하는 값의 튜플(다른 프로세스의 쓰기 포함). 답변 캐시 무효화 기준.
+    news=False면 문서 컬렉션만(뉴스를 검색하지 않을 때 뉴스 데몬의 쓰기로 캐시가 비워지지 않도록).
+    """
+    versions = (get_lexical_index(lexical_index_path(COLLECTION_NAME)).version(),)
+    if news:
+        versions += (get_lexical_index(lexical_index_path(NEWS_COLLECTION_NAME)).version(),)
+    return versions
+
+
+def get_dense_index(vs: Chroma) -> DenseIndex:
+    """
+    컬렉션별 인메모리 dense 색인(프로세스당 1개, 처음 호출 시 Chroma에서 로드).
+    다른 프로세스(뉴스 데몬/인제스트 워커)의 쓰기는 어휘 색인의 추가/삭제 로그를 따라가며 반영합니다.
+    """
+    name = vs._collection.name
+    lexical = _lexical_index_for(vs)
+    with _REGISTRY_LOCK:
+        dense = _DENSE_INDEXES.get(name)
+        if dense is None:
+            seq = lexical.version()
+            started = time.perf_counter()
+            dense = load_from_collection(vs._collection, DENSE_INDEX_DTYPE)
+            dense.synced_seq = seq
+            _DENSE_INDEXES[name] = dense
+            print(
+                f"[DENSE] collection={name} rows={len(dense)} dtype={dense.dtype} "
+                f"mb={dense.nbytes() / 1024 / 1024:.1f} load={time.perf_counter() - started:.2f}s",
+                flush=True,
+            )
+            return dense
+
+    changes, truncated = lexical.changes_since(dense.synced_seq)
+    if truncated:
+        # 로그가 압축돼 중간 삭제 기록이 없으면 전체 재로드
+        with _REGISTRY_LOCK:
+            _DENSE_INDEXES.pop(name, None)
+        return get_dense_index(vs)
+    if changes:
+        added = [doc_id for _, doc_id, op in changes if op == "add" and doc_id not in dense]
+        removed = [doc_id for _, doc_id, op in changes if op == "del"]
+        if added:
+            try:
+                got = vs._collection.get(ids=added, include=["embeddings"])
+                if got["ids"]:
+                    dense.add(got["ids"], got["embeddings"])
+            except Exception as e:
+                # 이 프로세스의 Chroma 클라이언트가 아직 못 보는 쓰기면 Chroma 검색에서도 안 보이므로 건너뜀
+                print(f"[DENSE] WARN sync_failed collection={name}: {e}", flush=True)
+        # 삭제 후 다시 추가된 ID는 컬렉션에 남아 있는 경우만 유지
+        if removed:
+            present = set(vs._collection.get(ids=removed, include=[])["ids"])
+            dense.delete([doc_id for doc_id in removed if doc_id not in present])
+        dense.synced_seq = changes[-1][0]
+    return dense
+
+
+def dense_similarity_search_with_score(vs: Chroma, query: str, k: int) -> List[Tuple[Document, float]]:
+    """Chroma HNSW 대신 인메모리 dense 색인으로 top-k를 찾고 본문/메타데이터만 Chroma에서 ID로 조회."""
+    dense = get_dense_index(vs)
+    hits = dense.search(vs.embeddings.embed_query(query), k)
+    if not hits:
+        return []
+    got = vs._collection.get(ids=[doc_id for doc_id, _ in hits], include=["documents", "metadatas"])
+    by_id = {
+        doc_id: Document(page_content=text or "", metadata=meta or {}, id=doc_id)
+        for doc_id, text, meta in zip(got["ids"], got["documents"], got["metadatas"])
+    }
+    return [(by_id[doc_id], dist) for doc_id, dist in hits if doc_id in by_id]
+
+
+def published_ts(published: str, default: float = None) -> int:
+    """RSS published(RFC 822) → epoch 초. 파싱 실패 시 default(기본: 현재 시각)."""
+    try:
+        return int(parsedate_to_datetime(published).timestamp())
+    except Exception:
+        return int(default if default is not None else time.time())
+
+
+def _migrate_news_collection(main_vs: Chroma, news_vs: Chroma, batch_size: int = 500) -> int:
+    """문서 컬렉션의 type=news 청크를 임베딩째로 뉴스 컬렉션에 옮김(재임베딩 없음)."""
+    moved = 0
+    while True:
+        got = main_vs._collection.get(
+            where={"type": "news"},
+            include=["documents", "metadatas", "embeddings"],
+            limit=batch_size,
+        )
+        ids = got.get("ids") or []
+        if not ids:
+            return moved
+        metas = []
+        for meta in got["metadatas"]:
+            meta = dict(meta or {})
+            meta.setdefault("published_ts", published_ts(meta.get("published", "")))
+            metas.append(meta)
+        docs = [Document(page_content=t or "", metadata=m) for t, m in zip(got["documents"], metas)]
+        _add_documents(news_vs, docs, ids=ids, embeddings=[list(e) for e in got["embeddings"]])
+        _delete_chunks(main_vs, ids=ids)
+        moved += len(ids)
 
 
 def _split_docs(docs):
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-    )
-    return splitter.split_documents(docs)
+    return split_pages(docs, CHUNK_SIZE, CHUNK_OVERLAP)
 
 
-def ingest_pdf_path_if_new(pdf_path: str, vs: Chroma = None, manifest: Dict[str, Any] = None) -> Tuple[bool, str]:
-    """단일 PDF를 새 파일일 때만 임베딩."""
-    if not pdf_path or not os.path.exists(pdf_path):
-        return False, ""
+def _persist(vs: Chroma) -> None:
+    # persist (가능한 경우)
+    try:
+        client = getattr(vs, "_client", None)
+        if client is not None and hasattr(client, "persist"):
+            client.persist()
+    except Exception:
+        pass
 
-    sha = _sha256_file(pdf_path)
 
-    if manifest is None:
-        manifest = _load_manifest()
-    if sha in manifest["items"]:
-        return False, sha
+def _add_documents(vs: Chroma, docs, ids: List[str] = None, embeddings: List[List[float]] = None) -> List[str]:
+    """
+    Chroma 쓰기 단일 진입점.
+    - embeddings가 주어지면(파이프라인에서 미리 임베딩한 경우) 재임베딩 없이 그대로 upsert
+    - 쓴 청크는 BM25 어휘 색인에도 같은 ID로 반영
+    - 이 프로세스에 인메모리 dense 색인이 올라와 있으면 같은 벡터로 바로 갱신
+    """
+    if not docs:
+        return []
+    texts = [d.page_content for d in docs]
+    if embeddings is None:
+        embeddings = vs.embeddings.embed_documents(texts)
+    ids = ids or [str(uuid.uuid4()) for _ in docs]
+    vs._collection.upsert(
+        ids=ids,
+        embeddings=embeddings,
+        metadatas=[d.metadata or None for d in docs],  # Chroma는 빈 dict 메타데이터를 거부
+        documents=texts,
+    )
+
+    _lexical_index_for(vs).add(ids, texts)
+    dense = _DENSE_INDEXES.get(vs._collection.name)
+    if dense is not None:
+        dense.add(ids, embeddings)
+    return ids
 
-    if vs is None:
-        vs = get_vectorstore()
 
-    loader = PyPDFLoader(pdf_path)
-    docs = loader.load()
-    split_docs = _split_docs(docs)
+def _delete_chunks(vs: Chroma, ids: List[str] = None, where: Dict[str, Any] = None) -> None:
+    """Chroma 삭제 단일 진입점(ID 또는 where). 어휘 색인에서도 같은 청크를 지움."""
+    if where is not None:
+        ids = vs._collection.get(where=where, include=[])["ids"]
+    if not ids:
+        return
+    vs.delete(ids=ids)
+    _lexical_index_for(vs).delete(ids)
+    dense = _DENSE_INDEXES.get(vs._collection.name)
+    if dense is not None:
+        dense.delete(ids)
 
+
+def _tag_chunks(split_docs, pdf_path: str, sha: str):
     base = os.path.basename(pdf_path)
     abs_path = os.path.abspath(pdf_path)
+    fmt = file_format(pdf_path).lstrip(".")
 
     for d in split_docs:
         d.metadata = dict(d.metadata or {})
-        d.metadata.update({"source": base, "path": abs_path, "sha256": sha})
+        d.metadata.update({"source": base, "path": abs_path, "sha256": sha, "format": fmt})
+    return split_docs
 
-    vs.add_documents(split_docs)
 
-    manifest["items"][sha] = {
-        "original_name": base,
-        "stored_path": abs_path,
-        "ingested_at": datetime.now().isoformat(timespec="seconds"),
+def _chunk_ids(docs, abs_path: str) -> List[str]:
+    """
+    결정적 청크 ID = sha256(경로 | 페이지 | 청크 텍스트 해시 | 중복 순번).
+    같은 페이지에 동일 텍스트가 반복되면(머리글 등) 순번으로 구분합니다.
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for d in docs:
+        page = (d.metadata or {}).get("page", "")
+        text_hash = hashlib.sha256(d.page_content.encode("utf-8")).hexdigest()
+        base = f"{abs_path}|{page}|{text_hash}"
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        ids.append(hashlib.sha256(f"{base}|{n}".encode("utf-8")).hexdigest())
+    return ids
+
+
+def _plan_chunk_diff(store: ManifestStore, pdf_path: str, docs) -> Dict[str, Any]:
+    """이전 버전(같은 경로)의 chunk_ids와 비교해 추가/유지/삭제 대상을 계산."""
+    abs_path = os.path.abspath(pdf_path)
+    ids = _chunk_ids(docs, abs_path)
+
+    prev_sha = store.current_sha(abs_path)
+    prev = (store.get_version(prev_sha) or {}) if prev_sha else {}
+    old_ids = set(prev.get("chunk_ids") or [])
+    new_ids = set(ids)
+
+    return {
+        "ids": ids,
+        "add": [i for i, cid in enumerate(ids) if cid not in old_ids],
+        "keep": [i for i, cid in enumerate(ids) if cid in old_ids],
+        "stale": sorted(old_ids - new_ids),
+        "prev_sha": prev_sha if prev else None,
+        # v1 매니페스트로 들어간 버전은 청크 ID가 랜덤이라 sha256 메타데이터로 지워야 함
+        "legacy": bool(prev) and prev.get("chunk_ids") is None,
     }
 
+
+def _write_chunks(vs: Chroma, docs, ids: List[str], add: List[int], keep: List[int], embeddings: List[List[float]] = None) -> None:
+    """add 인덱스의 청크는 추가(임베딩), keep 인덱스의 청크는 메타데이터만 갱신."""
+    _add_documents(vs, [docs[i] for i in add], ids=[ids[i] for i in add], embeddings=embeddings)
+    if keep:
+        vs._collection.update(ids=[ids[i] for i in keep], metadatas=[docs[i].metadata for i in keep])
+
+
+def _apply_chunk_diff(
+    vs: Chroma,
+    store: ManifestStore,
+    pdf_path: str,
+    sha: str,
+    docs,
+    plan: Dict[str, Any],
+    embeddings: List[List[float]] = None,
+) -> Dict[str, int]:
+    """
+    diff 적용: 신규 청크만 임베딩/추가, 유지 청크는 메타데이터만 갱신, 사라진 청크는 삭제.
+    embeddings가 주어지면 plan["add"] 순서의 벡터로 간주합니다.
+    """
+    ids = plan["ids"]
+    add, keep, stale = plan["add"], plan["keep"], plan["stale"]
+
+    _write_chunks(vs, docs, ids, add, keep, embeddings=embeddings)
+    if stale:
+        _delete_chunks(vs, ids=stale)
+
+    prev_sha = plan["prev_sha"]
+    if prev_sha and prev_sha != sha and plan["legacy"]:
+        _delete_chunks(vs, where={"sha256": prev_sha})
+
+    # 버전 기록 + 이전 버전 삭제는 한 트랜잭션(청크 쓰기가 끝난 뒤에만 커밋)
+    store.record_version(sha, os.path.abspath(pdf_path), ids, replaces=prev_sha)
+    return {"added": len(add), "kept": len(keep), "deleted": len(stale)}
+
+
+def _ingest_pdf_streaming(vs: Chroma, store: ManifestStore, pdf_path: str, sha: str) -> Dict[str, int]:
+    """
+    대용량 PDF 스트리밍 인제스트: 페이지 window 단위로 읽기 → 분할 → 임베딩 → 커밋.
+    - window마다 (커밋된 페이지 수, 지금까지 쓴 청크 ID)를 pdf_progress에 기록
+      → 중단되면 같은 버전(sha)에 한해 다음 window부터 재개
+    - 이전 버전과의 diff는 청크 ID 집합으로 처리하고, 사라진 청크는 마지막에 삭제
+    """
+    abs_path = os.path.abspath(pdf_path)
+    prev_sha = store.current_sha(abs_path)
+    prev = (store.get_version(prev_sha) or {}) if prev_sha else {}
+    old_ids = set(prev.get("chunk_ids") or [])
+
+    start_page, ids = 0, []
+    progress = store.get_progress(abs_path)
+    if progress and progress["sha256"] == sha:
+        start_page, ids = progress["pages_done"], list(progress["chunk_ids"])
+    elif progress:
+        # 다른 버전을 쓰다가 중단된 흔적: 그때 쓴 청크도 삭제 후보
+        old_ids.update(progress["chunk_ids"])
+
+    counts = {"added": 0, "kept": 0, "deleted": 0}
+    for first_page, pages in iter_pdf_page_windows(abs_path, INGEST_STREAM_WINDOW_PAGES, start_page):
+        docs = _tag_chunks(_split_docs(pages), pdf_path, sha)
+        win_ids = _chunk_ids(docs, abs_path)
+        add = [i for i, cid in enumerate(win_ids) if cid not in old_ids]
+        keep = [i for i, cid in enumerate(win_ids) if cid in old_ids]
+
+        _write_chunks(vs, docs, win_ids, add, keep)
+        ids.extend(win_ids)
+        store.save_progress(abs_path, sha, first_page + len(pages), ids)
+
+        counts["added"] += len(add)
+        counts["kept"] += len(keep)
+
+    stale = sorted(old_ids - set(ids))
+    if stale:
+        _delete_chunks(vs, ids=stale)
+    counts["deleted"] = len(stale)
+
+    if prev and prev_sha != sha and prev.get("chunk_ids") is None:
+        _delete_chunks(vs, where={"sha256": prev_sha})
+
+    store.record_version(sha, abs_path, ids, replaces=prev_sha if prev else None)
+    return counts
+
+
+def _is_large_pdf(pdf_path: str) -> bool:
+    if file_format(pdf_path) != ".pdf":
+        return False
+    try:
+        return os.path.getsize(pdf_path) >= INGEST_STREAM_MIN_BYTES
+    except OSError:
+        return False
+
+
+def _add_counts(total: Dict[str, int], counts: Dict[str, int]) -> None:
+    if total is None:
+        return
+    for k, v in counts.items():
+        total[k] = total.get(k, 0) + v
+
+
+def _add_format_stats(report: Dict[str, Any], path: str, **counts) -> None:
+    if report is None:
+        return
+    fmt = file_format(path)
+    _add_counts(report["by_format"].setdefault(fmt, {}), counts)
+
+
+def _finish_format_stats(by_format: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    for st in by_format.values():
+        parse_sec = st.get("parse_sec", 0.0)
+        write_sec = st.get("embed_write_sec", 0.0)
+        st["parse_chunks_per_sec"] = round(st.get("chunks", 0) / parse_sec, 2) if parse_sec > 0 else 0.0
+        st["mb_per_sec"] = round(st.get("bytes", 0) / 1e6 / (parse_sec + write_sec), 2) if parse_sec + write_sec > 0 else 0.0
+        st["parse_sec"] = round(parse_sec, 3)
+        st["embed_write_sec"] = round(write_sec, 3)
+    return by_format
+
+
+def _load_and_split(path: str):
+    return load_and_split_timed(path, CHUNK_SIZE, CHUNK_OVERLAP, CSV_ROWS_PER_CHUNK)
+
+
+def ingest_file_if_new(
+    path: str,
+    vs: Chroma = None,
+    store: ManifestStore = None,
+    verify: bool = False,
+    report: Dict[str, Any] = None,
+) -> Tuple[bool, str]:
+    """
+    단일 파일(PDF/DOCX/CSV/TXT/MD)을 새 파일일 때만 임베딩.
+    같은 경로의 이전 버전이 있으면 청크 단위 diff로 바뀐 청크만 반영합니다.
+    INGEST_STREAM_MIN_BYTES 이상인 PDF는 window 단위 스트리밍으로 처리합니다.
+    report(sync 결과 dict)가 주어지면 청크/스캔/포맷별 통계를 누적합니다.
+    """
+    if not path or not os.path.exists(path):
+        return False, ""
+
+    if store is None:
+        store = get_manifest_store()
+
+    sha = _file_sha(store, path, verify=verify, report=report)
+    if store.has_version(sha):
+        return False, sha
+
+    if vs is None:
+        vs = get_vectorstore()
+
+    chunk_counts = report and report["chunks"]
+    started = time.perf_counter()
+    if _is_large_pdf(path):
+        counts = _ingest_pdf_streaming(vs, store, path, sha)
+        _add_counts(chunk_counts, counts)
+        _add_format_stats(
+            report, path, files=1, bytes=os.path.getsize(path),
+            chunks=counts["added"] + counts["kept"], embed_write_sec=time.perf_counter() - started,
+        )
+        return True, sha
+
+    docs, parse_sec = _load_and_split(path)
+    docs = _tag_chunks(docs, path, sha)
+    plan = _plan_chunk_diff(store, path, docs)
+    write_started = time.perf_counter()
+    _add_counts(chunk_counts, _apply_chunk_diff(vs, store, path, sha, docs, plan))
+    _add_format_stats(
+        report, path, files=1, bytes=os.path.getsize(path), chunks=len(docs),
+        parse_sec=parse_sec, embed_write_sec=time.perf_counter() - write_started,
+    )
+
     return True, sha
 
 
-def sync_pdf_dir(data_dir: str) -> Dict[str, Any]:
-    """✅ 폴더 내 PDF 전체를 스캔하여 '신규 PDF만' 추가 임베딩."""
-    _ensure_dir(data_dir)
-    vs = get_vectorstore()
-    manifest = _load_manifest()
+# 이전 이름 호환
+ingest_pdf_path_if_new = ingest_file_if_new
 
-    pdf_paths = sorted(glob.glob(os.path.join(data_dir, "*.pdf")))
-    added: List[str] = []
-    skipped: List[str] = []
-    failed: List[Tuple[str, str]] = []
 
+def _sync_serial(pdf_paths: List[str], vs: Chroma, store: ManifestStore, report: Dict[str, Any], verify: bool, on_file_done: Callable[[], None]) -> None:
     for p in pdf_paths:
         try:
-            ingested, sha = ingest_pdf_path_if_new(p, vs=vs, manifest=manifest)
+            ingested, sha = ingest_file_if_new(p, vs=vs, store=store, verify=verify, report=report)
             if ingested:
-                added.append(os.path.basename(p))
+                report["added"].append(os.path.basename(p))
             else:
-                skipped.append(os.path.basename(p))
+                report["skipped"].append(os.path.basename(p))
+        except Exception as e:
+            report["failed"].append((os.path.basename(p), str(e)))
+        on_file_done()
+
+
+def _sync_pipelined(pdf_paths: List[str], vs: Chroma, store: ManifestStore, report: Dict[str, Any], verify: bool, on_file_done: Callable[[], None]) -> None:
+    """
+    파이프라인 모드:
+    - 메인 스레드: stat/sha256으로 신규 판별 → 프로세스 풀에 파싱+분할 제출
+    - 임베딩 스레드: embed_q에서 청크를 꺼내 임베딩 → write_q
+    - writer 스레드: Chroma 쓰기 + 매니페스트 기록(단일 writer)
+    큐가 bounded라 임베딩이 밀리면 파싱 결과 수집도 멈추고(backpressure),
+    풀에 동시에 제출하는 파일 수도 제한해서 메모리가 무한정 늘지 않게 합니다.
+    대용량 PDF는 풀에 넣지 않고 파이프라인이 끝난 뒤 스트리밍 경로로 처리합니다.
+    프로세스 풀은 spawn으로 띄우므로 스크립트에서 호출할 때는 if __name__ == "__main__": 가드가 필요합니다.
+    """
+    added, skipped, failed = report["added"], report["skipped"], report["failed"]
+    chunk_counts = report["chunks"]
+
+    todo: List[Tuple[str, str]] = []
+    large: List[Tuple[str, str]] = []
+    seen = set()
+    for p in pdf_paths:
+        try:
+            sha = _file_sha(store, p, verify=verify, report=report)
+        except Exception as e:
+            failed.append((os.path.basename(p), str(e)))
+            on_file_done()
+            continue
+        if sha in seen or store.has_version(sha):
+            skipped.append(os.path.basename(p))
+            on_file_done()
+            continue
+        seen.add(sha)
+        (large if _is_large_pdf(p) else todo).append((p, sha))
+
+    if todo:
+        _run_pipeline(todo, vs, store, report, on_file_done)
+
+    for p, sha in large:
+        try:
+            started = time.perf_counter()
+            counts = _ingest_pdf_streaming(vs, store, p, sha)
+            _add_counts(chunk_counts, counts)
+            _add_format_stats(
+                report, p, files=1, bytes=os.path.getsize(p),
+                chunks=counts["added"] + counts["kept"], embed_write_sec=time.perf_counter() - started,
+            )
+            added.append(os.path.basename(p))
         except Exception as e:
             failed.append((os.path.basename(p), str(e)))
+        on_file_done()
+
+
+def _run_pipeline(todo: List[Tuple[str, str]], vs: Chroma, store: ManifestStore, report: Dict[str, Any], on_file_done: Callable[[], None]) -> None:
+    """포맷별 워커 풀 → embed_q → 임베딩 스레드 → write_q → writer 스레드."""
+    added, failed = report["added"], report["failed"]
+    chunk_counts = report["chunks"]
+
+    embeddings = vs.embeddings
+    embed_q: "queue.Queue" = queue.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+    write_q: "queue.Queue" = queue.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+
+    def _embed_stage():
+        while True:
+            item = embed_q.get()
+            if item is None:
+                write_q.put(None)
+                return
+            p, sha, docs, parse_sec = item
+            started = time.perf_counter()
+            try:
+                # 같은 경로는 한 번의 sync에서 한 번만 처리되므로 writer와 같은 키를 건드리지 않음
+                plan = _plan_chunk_diff(store, p, docs)
+                texts = [docs[i].page_content for i in plan["add"]]
+                vectors = embeddings.embed_documents(texts) if texts else []
+            except Exception as e:
+                failed.append((os.path.basename(p), str(e)))
+                on_file_done()
+                continue
+            write_q.put((p, sha, docs, plan, vectors, parse_sec, time.perf_counter() - started))
+
+    def _write_stage():
+        while True:
+            item = write_q.get()
+            if item is None:
+                return
+            p, sha, docs, plan, vectors, parse_sec, embed_sec = item
+            started = time.perf_counter()
+            try:
+                # report 통계는 writer 스레드에서만 갱신(제출 스레드와 동시에 고치지 않도록)
+                _add_counts(chunk_counts, _apply_chunk_diff(vs, store, p, sha, docs, plan, embeddings=vectors))
+                _add_format_stats(
+                    report, p, files=1, bytes=os.path.getsize(p), chunks=len(docs), parse_sec=parse_sec,
+                    embed_write_sec=embed_sec + time.perf_counter() - started,
+                )
+                added.append(os.path.basename(p))
+            except Exception as e:
+                failed.append((os.path.basename(p), str(e)))
+            on_file_done()
+
+    embed_thread = threading.Thread(target=_embed_stage, name="trag-ingest-embed", daemon=True)
+    write_thread = threading.Thread(target=_write_stage, name="trag-ingest-write", daemon=True)
+    embed_thread.start()
+    write_thread.start()
+
+    pools = {}
+
+    def _pool_for(fmt: str):
+        if fmt not in pools:
+            workers = max(1, INGEST_FORMAT_WORKERS.get(fmt, 1))
+            if fmt in INGEST_PROCESS_FORMATS:
+                # 임베딩/writer 스레드(와 httpx/SQLite 락)가 살아 있는 프로세스를 fork하지 않도록 spawn으로 띄움
+                pools[fmt] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                pools[fmt] = ThreadPoolExecutor(max_workers=workers)
+        return pools[fmt]
 
-    # persist (가능한 경우)
     try:
-        client = getattr(vs, "_client", None)
-        if client is not None and hasattr(client, "persist"):
-            client.persist()
-    except Exception:
-        pass
+        formats = {file_format(p) for p, _ in todo}
+        max_inflight = sum(max(1, INGEST_FORMAT_WORKERS.get(f, 1)) for f in formats) + INGEST_QUEUE_MAXSIZE
+        pending_iter = iter(todo)
+        inflight = {}
+
+        def _submit_next() -> None:
+            nxt = next(pending_iter, None)
+            if nxt is not None:
+                fut = _pool_for(file_format(nxt[0])).submit(
+                    load_and_split_timed, nxt[0], CHUNK_SIZE, CHUNK_OVERLAP, CSV_ROWS_PER_CHUNK
+                )
+                inflight[fut] = nxt
+
+        for _ in range(max_inflight):
+            _submit_next()
+
+        while inflight:
+            done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+            for fut in done:
+                p, sha = inflight.pop(fut)
+                try:
+                    docs, parse_sec = fut.result()
+                except Exception as e:
+                    failed.append((os.path.basename(p), str(e)))
+                    on_file_done()
+                else:
+                    # embed_q가 가득 차면 여기서 대기(backpressure)
+                    embed_q.put((p, sha, _tag_chunks(docs, p, sha), parse_sec))
+                _submit_next()
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        embed_q.put(None)
+        embed_thread.join()
+        write_thread.join()
+
+
+def list_data_files(data_dir: str) -> List[str]:
+    # 확장자는 소문자로 비교(.PDF 등도 포함)
+    return sorted(p for p in glob.glob(os.path.join(data_dir, "*")) if file_format(p) in SUPPORTED_EXTENSIONS)
+
+
+def sync_pdf_dir(
+    data_dir: str,
+    pipelined: bool = None,
+    verify_all: bool = False,
+    progress: Callable[[Dict[str, Any]], None] = None,
+) -> Dict[str, Any]:
+    """
+    ✅ 폴더 내 파일 전체(PDF/DOCX/CSV/TXT/MD)를 스캔하여 '신규 파일만' 추가 임베딩.
+    - 기본: stat이 그대로인 파일은 해시 없이 스킵
+    - verify_all=True: 모든 파일을 다시 해시(감사용)
+    - progress: 파일 하나가 끝날 때마다 진행 상황 dict로 호출(백그라운드 작업 진행률 표시용)
+    """
+    _ensure_dir(data_dir)
+    vs = get_vectorstore()
+    store = get_manifest_store()
+
+    if pipelined is None:
+        pipelined = INGEST_PIPELINE_ENABLED
+
+    pdf_paths = list_data_files(data_dir)
+    stats_before = _embed_stats(vs)
+    report: Dict[str, Any] = {
+        "added": [],
+        "skipped": [],
+        "failed": [],
+        "chunks": {"added": 0, "kept": 0, "deleted": 0},
+        "scan": {"stat_hit": 0, "hashed": 0},
+        "by_format": {},
+    }
+
+    def _on_file_done() -> None:
+        if progress is None:
+            return
+        try:
+            progress({
+                "files_total": len(pdf_paths),
+                "files_done": len(report["added"]) + len(report["skipped"]) + len(report["failed"]),
+                "files_added": len(report["added"]),
+                "chunks_embedded": report["chunks"]["added"],
+            })
+        except Exception:
+            pass
+
+    if pipelined and len(pdf_paths) > 1:
+        _sync_pipelined(pdf_paths, vs, store, report, verify_all, _on_file_done)
+    else:
+        _sync_serial(pdf_paths, vs, store, report, verify_all, _on_file_done)
 
-    _save_manifest(manifest)
+    _persist(vs)
+
+    # 폴더에서 사라진 파일의 stat 캐시 정리
+    store.prune_stat(os.path.abspath(data_dir), {os.path.abspath(p) for p in pdf_paths})
 
     return {
         "data_dir": os.path.abspath(data_dir),
-        "total_pdf": len(pdf_paths),
-        "added": added,
-        "skipped": skipped,
-        "failed": failed,
+        "total_files": len(pdf_paths),
+        "total_pdf": sum(1 for p in pdf_paths if file_format(p) == ".pdf"),
+        **report,
+        "by_format": _finish_format_stats(report["by_format"]),
+        "embed": stats_delta(stats_before, _embed_stats(vs)),
     }
 
 
@@ -180,31 +847,31 @@ def save_uploaded_pdf_to_dir(uploaded_file, target_dir: str) -> str:
 
 
 def list_ingested_pdfs() -> List[Dict[str, Any]]:
-    manifest = _load_manifest()
     items = []
-    for sha, info in manifest.get("items", {}).items():
-        items.append({"sha256": sha, **info})
-    items.sort(key=lambda x: x.get("ingested_at", ""), reverse=True)
+    for row in get_manifest_store().list_versions():
+        row["chunk_count"] = len(row.pop("chunk_ids", None) or [])
+        items.append(row)
     return items
 
-def add_news_documents_to_vectorstore(news_docs, vs=None):
+def add_news_documents_to_vectorstore(news_docs, vs=None, embeddings: List[List[float]] = None):
     """
     news_docs: List[Document]
+    - 뉴스 전용 컬렉션에 저장하고, 기간 필터/최신성 가중치를 위해 published_ts(epoch 초)를 붙임
+    - embeddings: 유사 뉴스 판정 때 이미 계산한 벡터(있으면 재임베딩하지 않음)
     """
     if not news_docs:
         return 0
 
     if vs is None:
-        vs = get_vectorstore()
+        vs = get_news_vectorstore()
 
-    vs.add_documents(news_docs)
+    now = time.time()
+    for d in news_docs:
+        d.metadata.setdefault("published_ts", published_ts(d.metadata.get("published", ""), default=now))
+
+    _add_documents(vs, news_docs, embeddings=embeddings)
 
     # persist 가능한 경우 마지막에 1번만
-    try:
-        client = getattr(vs, "_client", None)
-        if client is not None and hasattr(client, "persist"):
-            client.persist()
-    except Exception:
-        pass
+    _persist(vs)
 
     return len(news_docs)
\ No newline at end of file